@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Affichage en direct d'une simulation, découplé du calcul.
+
+La simulation envoie un flux d'évènements (points de trajectoire et images de
+l'environnement) à un processus de rendu qui les consomme à son propre rythme :
+- les points de trajectoire sont tous conservés et ajoutés incrémentalement à la courbe,
+- seule la dernière image de l'environnement est affichée, les images intermédiaires
+  sont abandonnées si le rendu est plus lent que le calcul.
+"""
+import multiprocessing
+import queue
+
+import numpy as np
+
+# ---------------------------------------------------------------------------- #
+#                                     Rendu                                    #
+# ---------------------------------------------------------------------------- #
+
+
+class _Tampon:
+    """
+    Tableau extensible (capacité doublée à chaque dépassement) pour la trajectoire
+    """
+    def __init__(self, capacite=256):
+        self.donnees = np.empty((capacite, 2))
+        self.taille = 0
+
+    def ajout(self, points):
+        """
+        Ajout de points à la fin du tampon
+
+        Arguments:
+            points {(float, float) list} -- points à ajouter
+        """
+        n = len(points)
+        if n == 0:
+            return
+        while self.taille + n > len(self.donnees):
+            nouveau = np.empty((2 * len(self.donnees), 2))
+            nouveau[:self.taille] = self.donnees[:self.taille]
+            self.donnees = nouveau
+        self.donnees[self.taille:self.taille + n] = points
+        self.taille += n
+
+    def vue(self):
+        """
+        Returns:
+            np.ndarray -- points stockés, de forme (taille, 2)
+        """
+        return self.donnees[:self.taille]
+
+
+class _Rendu:
+    """
+    Artistes matplotlib mis à jour incrémentalement à partir des évènements
+    """
+    def __init__(self, ax, title, xlim, ylim):
+        """
+        Arguments:
+            ax {matplotlib.axes} -- axe de tracé
+            title {str} -- titre de la figure
+            xlim {(float, float)} -- limites de l'axe x
+            ylim {(float, float)} -- limites de l'axe y
+        """
+        from matplotlib.patches import Circle
+
+        self.ax = ax
+        self.title = title
+        self.trajectoire = _Tampon()
+        self.ligne, = ax.plot([], [], color='red')
+        self.bain = ax.scatter(np.empty(0), np.empty(0), c='blue', marker='.')
+        self.BP = ax.scatter([0], [0], c='red', marker='o', zorder=3)
+        self.fleches = None
+        self.cercle = Circle((0, 0), radius=0, color='orange', fill=False)
+        self.cercle.set_visible(False)
+        ax.add_patch(self.cercle)
+        ax.grid()
+        ax.set_xlim(*xlim)
+        ax.set_ylim(*ylim)
+        ax.set_title(title)
+
+    def ajout_points(self, points):
+        """
+        Ajout de points à la trajectoire de la grosse particule
+
+        Arguments:
+            points {(float, float) list} -- nouveaux points de la trajectoire
+        """
+        self.trajectoire.ajout(points)
+        vue = self.trajectoire.vue()
+        self.ligne.set_data(vue[:, 0], vue[:, 1])
+
+    def image(self, image):
+        """
+        Mise à jour de l'environnement affiché
+
+        Arguments:
+            image {dict} -- dernière image envoyée par la simulation (voir LiveDisplay.image)
+        """
+        positions = np.column_stack((image['x'], image['y']))
+        self.bain.set_offsets(positions)
+
+        if image.get('u') is not None:
+            # Le nombre de flèches d'un quiver est fixé à sa création
+            if self.fleches is None or self.fleches.N != len(positions):
+                if self.fleches is not None:
+                    self.fleches.remove()
+                self.fleches = self.ax.quiver(image['x'], image['y'], image['u'], image['v'],
+                                              color='blue', width=0.002)
+            else:
+                self.fleches.set_offsets(positions)
+                self.fleches.set_UVC(image['u'], image['v'])
+        elif self.fleches is not None:
+            self.fleches.remove()
+            self.fleches = None
+
+        self.BP.set_offsets([image['bp']])
+        if image.get('collision'):
+            self.BP.set_color('fuchsia')
+        else:
+            self.BP.set_color('red')
+
+        # Disque de l'image courante seulement (effacé si l'image n'en a pas)
+        if image.get('cercle') is not None:
+            x, y, radius = image['cercle']
+            self.cercle.set_center((x, y))
+            self.cercle.set_radius(radius)
+        self.cercle.set_visible(image.get('cercle') is not None)
+
+        self.ax.set_title(self.title + '\nt=' + str(round(image['t'], 4)))
+
+
+def _boucle_rendu(points, images, title, xlim, ylim, pause):
+    """
+    Boucle du processus de rendu : consomme les évènements jusqu'à la réception de None
+
+    Arguments:
+        points {multiprocessing.Queue} -- points de trajectoire (jamais abandonnés)
+        images {multiprocessing.Queue} -- images de l'environnement (seule la dernière est affichée)
+        title {str} -- titre de la figure
+        xlim {(float, float)} -- limites de l'axe x
+        ylim {(float, float)} -- limites de l'axe y
+        pause {float} -- délai entre deux rafraîchissements
+    """
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    rendu = _Rendu(ax, title, xlim, ylim)
+
+    fin = False
+    while not fin:
+        nouveaux_points = []
+        while True:
+            try:
+                evenement = points.get_nowait()
+            except queue.Empty:
+                break
+            if evenement is None:
+                fin = True
+                break
+            nouveaux_points.extend(evenement)
+
+        derniere_image = None
+        while True:
+            try:
+                derniere_image = images.get_nowait()
+            except queue.Empty:
+                break
+
+        rendu.ajout_points(nouveaux_points)
+        if derniere_image is not None:
+            rendu.image(derniere_image)
+        fig.canvas.draw_idle()
+        plt.pause(pause)
+
+    plt.close(fig)
+
+
+# ---------------------------------------------------------------------------- #
+#                            Interface de simulation                           #
+# ---------------------------------------------------------------------------- #
+
+
+class LiveDisplay:
+    """
+    Affichage en direct d'une simulation dans un processus séparé.
+
+    Côté simulation, les appels ne bloquent jamais :
+    - point() ajoute un point à la trajectoire,
+    - image() propose une nouvelle image de l'environnement, abandonnée si la précédente
+      n'a pas encore été consommée (voir image_attendue pour éviter de la construire).
+    """
+    def __init__(self, title, xlim, ylim, pause=0.25):
+        """
+        Arguments:
+            title {str} -- titre de la figure
+            xlim {(float, float)} -- limites de l'axe x
+            ylim {(float, float)} -- limites de l'axe y
+
+        Keyword Arguments:
+            pause {float} -- délai entre deux rafraîchissements de l'affichage (default: {0.25})
+        """
+        self.points = multiprocessing.Queue()
+        self.images = multiprocessing.Queue(maxsize=1)
+        self.processus = multiprocessing.Process(target=_boucle_rendu,
+                                                 args=(self.points, self.images, title, xlim, ylim, pause),
+                                                 daemon=True)
+        self.processus.start()
+
+    def point(self, x, y):
+        """
+        Ajout d'un point à la trajectoire de la grosse particule
+
+        Arguments:
+            x {float} -- coordonnée x
+            y {float} -- coordonnée y
+        """
+        self.points.put([(x, y)])
+
+    def image_attendue(self):
+        """
+        Returns:
+            bool -- True si le rendu est prêt à recevoir une nouvelle image
+        """
+        return self.images.empty()
+
+    def image(self, t, particles, BP, x_origin=0, y_origin=0, vector=False, collision=False, cercle=None):
+        """
+        Envoi d'une image de l'environnement (abandonnée si le rendu est occupé)
+
+        Arguments:
+            t {float} -- temps de la simulation
+            particles {Particle list} -- petites particules
+            BP {Particle} -- grosse particule
+
+        Keyword Arguments:
+            x_origin {float} -- coordonnée x de l'origine absolue des petites particules (default: {0})
+            y_origin {float} -- coordonnée y de l'origine absolue des petites particules (default: {0})
+            vector {bool} -- si True : envoi des vecteurs vitesses (default: {False})
+            collision {bool} -- si True : mise en évidence d'une grosse collision (default: {False})
+            cercle {(float, float, float)} -- centre et rayon d'un disque à afficher (default: {None})
+        """
+        if not self.image_attendue():
+            return
+        N = len(particles)
+        x = np.fromiter((p.x for p in particles), float, N) + x_origin
+        y = np.fromiter((p.y for p in particles), float, N) + y_origin
+        image = {'t': t, 'x': x, 'y': y, 'bp': (BP.x, BP.y), 'collision': collision, 'cercle': cercle}
+        if vector:
+            image['u'] = np.fromiter((p.vx for p in particles), float, N)
+            image['v'] = np.fromiter((p.vy for p in particles), float, N)
+        try:
+            self.images.put_nowait(image)
+        except queue.Full:
+            pass
+
+    def close(self):
+        """
+        Fin de l'affichage : le rendu consomme les derniers points puis se ferme
+        """
+        self.points.put(None)
+        self.processus.join()
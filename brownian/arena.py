@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Ensembles de simulations sans sérialisation des résultats.
+
+Les processus de calcul écrivent trajectoires et mesures directement dans une arène :
+un fichier projeté en mémoire (dans /dev/shm si disponible, donc en RAM) partagé avec
+le processus principal. Chaque processus réserve la place de sa trajectoire en avançant
+un pointeur commun, et ne renvoie par le pool que quatre entiers (indice, statut, position,
+longueur). Le processus principal lit les tableaux en place, sans copie ni désérialisation.
+
+Si l'arène est pleine, la trajectoire est renvoyée par le pool (copie) : le résultat reste
+correct, seul le gain de l'arène est perdu pour cette simulation.
+"""
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from .ensemble import COLONNES, ECHECS, new_seeds, run_simulation
+from .outils1_1 import RaggedTrajectories
+
+# Mesures numériques d'une simulation, stockées dans l'arène
+MESURES = [colonne for colonne in COLONNES if colonne not in ("Modèle", "Graine", "Statut")]
+STATUTS = ["ok"] + [echec.__name__ for echec in ECHECS]
+
+# ---------------------------------------------------------------------------- #
+#                                     Arène                                    #
+# ---------------------------------------------------------------------------- #
+
+
+def _projection(path, n, capacity, mode):
+    """
+    Tableaux de l'arène projetés depuis le fichier path
+
+    Returns:
+        np.ndarray -- mesures (n, len(MESURES))
+        np.ndarray -- temps, coordonnées x et y des trajectoires, de forme (3, capacity)
+    """
+    mesures = np.memmap(path, dtype=np.float64, mode=mode, shape=(n, len(MESURES)))
+    coordonnees = np.memmap(path, dtype=np.float64, mode=mode, shape=(3, capacity),
+                            offset=mesures.nbytes)
+    return mesures, coordonnees
+
+
+_ARENA = {}
+
+
+def _init_worker(path, n, capacity, pointer):
+    """
+    Initialisation d'un processus de calcul : projection de l'arène, une seule fois par processus
+    """
+    _ARENA["mesures"], _ARENA["coordonnees"] = _projection(path, n, capacity, "r+")
+    _ARENA["capacity"] = capacity
+    _ARENA["pointer"] = pointer
+
+
+def _run_into_arena(tache):
+    """
+    Calcul d'une simulation, écrite dans l'arène
+
+    Arguments:
+        tache {(int, str, dict, int)} -- indice, modèle, paramètres et graine
+
+    Returns:
+        int -- indice de la simulation
+        int -- statut (indice dans STATUTS)
+        int -- position de la trajectoire dans l'arène (-1 si renvoyée par le pool)
+        int -- longueur de la trajectoire
+        np.ndarray -- trajectoire (3, longueur) si l'arène est pleine, sinon None
+    """
+    index, modele, params, seed = tache
+    record, trajectoire = run_simulation(modele, params, seed, trajectory=True)
+    _ARENA["mesures"][index] = [record[mesure] for mesure in MESURES]
+    statut = STATUTS.index(record["Statut"])
+
+    longueur = len(trajectoire[0])
+    pointer = _ARENA["pointer"]
+    with pointer.get_lock():
+        position = pointer.value
+        if position + longueur <= _ARENA["capacity"]:
+            pointer.value = position + longueur
+        else:
+            position = -1
+    if position == -1:
+        return index, statut, -1, longueur, np.array(trajectoire, dtype=np.float64).reshape(3, longueur)
+    _ARENA["coordonnees"][:, position:position + longueur] = trajectoire
+    return index, statut, position, longueur, None
+
+
+class EnsembleArena:
+    """
+    Résultats d'un ensemble lus en place dans l'arène
+
+    Attributs :
+        modele {str} -- modèle simulé
+        seeds {int list} -- graines des simulations
+        statuts {str list} -- "ok" ou nom de l'interruption de chaque simulation
+        mesures {np.ndarray} -- mesures de chaque simulation (n, len(MESURES)), colonnes MESURES
+        coordonnees {np.ndarray} -- temps, x et y de toutes les trajectoires (3, nombre total de points)
+        offsets {np.ndarray} -- position de chaque trajectoire dans coordonnees
+        lengths {np.ndarray} -- longueur de chaque trajectoire
+    """
+    def __init__(self, modele, seeds, statuts, mesures, coordonnees, offsets, lengths):
+        self.modele = modele
+        self.seeds = seeds
+        self.statuts = statuts
+        self.mesures = mesures
+        self.coordonnees = coordonnees
+        self.offsets = offsets
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def trajectory(self, i):
+        """
+        Arguments:
+            i {int} -- indice de la simulation
+
+        Returns:
+            np.ndarray -- temps, x et y de la trajectoire (vue, sans copie), de forme (3, longueur)
+        """
+        return self.coordonnees[:, self.offsets[i]:self.offsets[i] + self.lengths[i]]
+
+    def trajectories(self):
+        """
+        Returns:
+            outils1_1.RaggedTrajectories -- positions de toutes les trajectoires, dans l'ordre des simulations,
+                                            avec leurs mesures vectorisées
+        """
+        return RaggedTrajectories.from_arena(self)
+
+    def records(self):
+        """
+        Returns:
+            dict list -- enregistrements des simulations (voir ensemble.run_simulation)
+        """
+        records = []
+        for i in range(len(self)):
+            record = {"Modèle": self.modele, "Graine": self.seeds[i], "Statut": self.statuts[i]}
+            record.update(zip(MESURES, self.mesures[i].tolist()))
+            records.append(record)
+        return records
+
+
+def run_ensemble_shared(modele, params, n, seeds=None, processes=None, capacity=None, directory=None):
+    """
+    Calcul de n simulations indépendantes, résultats transmis par une arène partagée
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+        n {int} -- nombre de simulations
+
+    Keyword Arguments:
+        seeds {int list} -- graines des simulations (default: {None}, graines aléatoires)
+        processes {int} -- nombre de processus, 1 pour un calcul séquentiel (default: {None}, tous les cœurs)
+        capacity {int} -- nombre total de points de trajectoire de l'arène (default: {None}, 2**16 par simulation ;
+                          le fichier est creux, seuls les points écrits occupent de la mémoire)
+        directory {str} -- dossier du fichier de l'arène (default: {None}, /dev/shm si disponible)
+
+    Returns:
+        EnsembleArena -- résultats, dans l'ordre des graines
+    """
+    if seeds is None:
+        seeds = new_seeds(n)
+    assert len(seeds) == n, "Il faut une graine par simulation"
+    if capacity is None:
+        capacity = n * 2**16
+    if directory is None and os.path.isdir("/dev/shm"):
+        directory = "/dev/shm"
+
+    descripteur, path = tempfile.mkstemp(dir=directory, prefix="brownian-", suffix=".arena")
+    try:
+        os.ftruncate(descripteur, 8 * (n * len(MESURES) + 3 * capacity))
+        os.close(descripteur)
+        pointer = multiprocessing.Value("q", 0)
+        taches = [(i, modele, params, seed) for i, seed in enumerate(seeds)]
+
+        if processes == 1:
+            _init_worker(path, n, capacity, pointer)
+            try:
+                resultats = [_run_into_arena(tache) for tache in taches]
+            finally:
+                _ARENA.clear()
+        else:
+            with multiprocessing.Pool(processes=processes, initializer=_init_worker,
+                                      initargs=(path, n, capacity, pointer)) as pool:
+                resultats = pool.map(_run_into_arena, taches)
+
+        # La projection reste valide après la suppression du fichier
+        mesures, coordonnees = _projection(path, n, capacity, "r")
+    finally:
+        os.remove(path)
+
+    statuts = [None] * n
+    offsets = np.zeros(n, dtype=np.int64)
+    lengths = np.zeros(n, dtype=np.int64)
+    debordements = []
+    for index, statut, position, longueur, trajectoire in resultats:
+        statuts[index] = STATUTS[statut]
+        offsets[index] = position
+        lengths[index] = longueur
+        if trajectoire is not None:
+            debordements.append((index, trajectoire))
+
+    utilise = pointer.value
+    coordonnees = coordonnees[:, :utilise]
+    if debordements:
+        # Arène pleine : les trajectoires renvoyées par le pool sont ajoutées à la fin (copie)
+        coordonnees = np.concatenate([coordonnees] + [trajectoire for _, trajectoire in debordements], axis=1)
+        for index, trajectoire in debordements:
+            offsets[index] = utilise
+            utilise += trajectoire.shape[1]
+
+    return EnsembleArena(modele, list(seeds), statuts, mesures, coordonnees, offsets, lengths)
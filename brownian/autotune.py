@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Réglage automatique des paramètres numériques d'un modèle par simulations pilotes.
+
+Pour chaque configuration d'une grille de paramètres numériques (epsilon_time, dim,
+time_interval, h, limit_collision_zone...), on exécute quelques simulations courtes, puis :
+- le coût par grosse collision est modélisé par une régression log-linéaire sur les paramètres,
+- la probabilité d'interruption (OutsideEnv, NoBigCollision...) et la proportion d'étapes sans
+  collision (modèle 1) par des régressions logistiques sur le logarithme des paramètres.
+Les modèles ajustés lissent le bruit des pilotes et sont extrapolés à la longueur de la
+simulation complète. La probabilité d'interruption d'une configuration n'est jamais estimée
+en dessous de la borne supérieure de confiance de ses propres pilotes (score de Wilson) :
+sans interruption observée sur n pilotes, elle reste d'environ 2.7 / n (confiance 95%).
+On renvoie la configuration de plus grand débit respectant les cibles.
+"""
+import itertools
+from math import isnan, log
+from statistics import NormalDist
+
+import numpy as np
+
+from .ensemble import run_ensemble
+
+# ---------------------------------------------------------------------------- #
+#                                   Régressions                                #
+# ---------------------------------------------------------------------------- #
+
+
+def _features(configurations, knobs):
+    """
+    Matrice des variables explicatives : constante et logarithme de chaque paramètre
+
+    Arguments:
+        configurations {dict list} -- valeurs des paramètres de chaque configuration
+        knobs {str list} -- paramètres variables
+
+    Returns:
+        np.ndarray -- matrice de taille (nb configurations, 1 + nb paramètres)
+    """
+    X = np.ones((len(configurations), 1 + len(knobs)))
+    for j, knob in enumerate(knobs):
+        X[:, j + 1] = [log(configuration[knob]) for configuration in configurations]
+    return X
+
+
+def logistic_fit(X, successes, trials, ridge=10**-2, nb_iterations=50):
+    """
+    Régression logistique binomiale par moindres carrés itérativement repondérés (IRLS),
+    avec une pénalité ridge qui garde finis les coefficients des paramètres. La constante
+    n'est pas pénalisée : si aucun succès n'est observé, elle diverge (nombre maximal
+    d'itérations) et les probabilités prédites tendent vers 0 (voir upper_bound).
+
+    Arguments:
+        X {np.ndarray} -- variables explicatives (n, p)
+        successes {np.ndarray} -- nombre de succès par ligne
+        trials {np.ndarray} -- nombre d'essais par ligne
+
+    Keyword Arguments:
+        ridge {float} -- pénalité sur les coefficients hors constante (default: {10**-2})
+        nb_iterations {int} -- nombre maximal d'itérations (default: {50})
+
+    Returns:
+        np.ndarray -- coefficients (p,)
+    """
+    successes = np.asarray(successes, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    penalite = ridge * np.eye(X.shape[1])
+    penalite[0, 0] = 0
+    # Initialisation avec la proportion globale (lissée) de succès
+    beta = np.zeros(X.shape[1])
+    p0 = (successes.sum() + 0.5) / (trials.sum() + 1)
+    beta[0] = log(p0 / (1 - p0))
+    for _ in range(nb_iterations):
+        p = 1 / (1 + np.exp(-X @ beta))
+        W = trials * p * (1 - p)
+        gradient = X.T @ (successes - trials * p) - penalite @ beta
+        hessienne = X.T @ (X * W[:, None]) + penalite
+        pas = np.linalg.solve(hessienne, gradient)
+        beta = beta + pas
+        if np.max(np.abs(pas)) < 10**-8:
+            break
+    return beta
+
+
+def upper_bound(successes, trials, confidence=0.95):
+    """
+    Borne supérieure de confiance unilatérale d'une proportion (score de Wilson),
+    environ 2.7 / trials à 95% si aucun succès n'est observé
+
+    Arguments:
+        successes {np.ndarray} -- nombre de succès
+        trials {np.ndarray} -- nombre d'essais
+
+    Keyword Arguments:
+        confidence {float} -- niveau de confiance (default: {0.95})
+
+    Returns:
+        np.ndarray -- bornes supérieures
+    """
+    successes = np.asarray(successes, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    z = NormalDist().inv_cdf(confidence)
+    p = successes / trials
+    centre = p + z**2 / (2 * trials)
+    marge = z * np.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2))
+    return np.minimum(1, (centre + marge) / (1 + z**2 / trials))
+
+
+def logistic_predict(X, beta):
+    """
+    Arguments:
+        X {np.ndarray} -- variables explicatives (n, p)
+        beta {np.ndarray} -- coefficients (p,)
+
+    Returns:
+        np.ndarray -- probabilités prédites (n,)
+    """
+    return 1 / (1 + np.exp(-X @ beta))
+
+
+# ---------------------------------------------------------------------------- #
+#                                    Réglage                                   #
+# ---------------------------------------------------------------------------- #
+
+
+def run_length(modele, params):
+    """
+    Longueur d'une simulation, dans l'unité fixée par ses paramètres
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du modèle
+
+    Returns:
+        str -- paramètre fixant la longueur ("nb_etapes", "nb_max_collisions" ou "duree")
+        float -- longueur
+    """
+    if modele == "1.1":
+        return "nb_etapes", params["nb_etapes"]
+    if params.get("nb_max_collisions", float("inf")) != float("inf"):
+        return "nb_max_collisions", params["nb_max_collisions"]
+    return "duree", params["duree"]
+
+
+def pilot_params(modele, params, ratio=10):
+    """
+    Paramètres par défaut des simulations pilotes : simulation ratio fois plus courte
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres de la simulation complète
+
+    Keyword Arguments:
+        ratio {float} -- rapport des longueurs (default: {10})
+
+    Returns:
+        dict -- paramètres modifiés pour les pilotes
+    """
+    cle, longueur = run_length(modele, params)
+    if cle == "duree":
+        return {cle: longueur / ratio}
+    return {cle: max(5, int(longueur / ratio))}
+
+
+def autotune(modele, params, grille, max_failure=0.01, max_no_collision=None, n_pilot=8, pilot=None,
+             processes=1, seed=None, confidence=0.95):
+    """
+    Choix de la configuration de plus grand débit respectant les cibles
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres de la simulation complète (voir ensemble.run_simulation)
+        grille {dict} -- valeurs candidates de chaque paramètre numérique, par ex. {"dim": [0.5, 1, 2]}
+
+    Keyword Arguments:
+        max_failure {float} -- probabilité maximale d'interruption de la simulation complète (default: {0.01})
+        max_no_collision {float} -- proportion maximale d'étapes sans collision, modèle 1 uniquement (default: {None})
+        n_pilot {int} -- nombre de simulations pilotes par configuration (default: {8})
+        pilot {dict} -- paramètres remplacés pour les pilotes (default: {None}, voir pilot_params)
+        processes {int} -- nombre de processus pour les pilotes (default: {1})
+        seed {int} -- graine des pilotes, les mêmes graines sont utilisées pour chaque configuration (default: {None})
+        confidence {float} -- niveau de la borne supérieure de la probabilité d'interruption des pilotes
+                              (default: {0.95})
+
+    Raises:
+        ValueError: aucune configuration ne respecte les cibles
+
+    Returns:
+        dict -- "params" : paramètres complets retenus,
+                "throughput" : débit prédit en grosses collisions par seconde de calcul
+                               (temps perdu dans les simulations interrompues compris),
+                "failure" : probabilité d'interruption prédite (au moins la borne de confiance des pilotes,
+                            extrapolée à la longueur complète),
+                "no_collision" : proportion d'étapes sans collision prédite (modèle 1, sinon None),
+                "configurations" : prédictions et observations pour chaque configuration
+    """
+    if max_no_collision is not None:
+        assert modele == "1", "La proportion d'étapes sans collision n'est définie que pour le modèle 1"
+    if pilot is None:
+        pilot = pilot_params(modele, params)
+
+    knobs = [knob for knob in grille if len(grille[knob]) > 1]
+    configurations = [dict(zip(grille, valeurs)) for valeurs in itertools.product(*grille.values())]
+
+    # Simulations pilotes
+    echecs, cout, no_collision, etapes = [], [], [], []
+    for configuration in configurations:
+        seeds = None if seed is None else [seed + k for k in range(n_pilot)]
+        records = run_ensemble(modele, {**params, **configuration, **pilot}, n_pilot, seeds=seeds, processes=processes)
+        ok = [record for record in records if record["Statut"] == "ok"]
+        echecs.append(n_pilot - len(ok))
+        # Coût par collision, en comptant le temps perdu dans les simulations interrompues
+        temps = sum(record["Temps de calcul"] for record in records)
+        collisions = sum(record["Nb collisions"] for record in ok)
+        cout.append(temps / max(collisions, 1))
+        if modele == "1":
+            no_collision.append(sum(record["Nb no collision"] for record in ok))
+            etapes.append(sum(record["Nb no collision"] + record["Nb collisions"] for record in ok))
+
+    X = _features(configurations, knobs)
+
+    # Modèle de coût : log(coût par collision) linéaire en log(paramètres)
+    beta_cout = np.linalg.lstsq(X, np.log(cout), rcond=None)[0]
+    throughput = 1 / np.exp(X @ beta_cout)
+
+    # Modèle d'échec : logistique, borné inférieurement par la borne de confiance des pilotes de chaque
+    # configuration, puis extrapolation à la longueur complète en supposant un risque constant par unité de longueur
+    p_pilote = logistic_predict(X, logistic_fit(X, echecs, [n_pilot] * len(configurations)))
+    p_pilote = np.maximum(p_pilote, upper_bound(echecs, n_pilot, confidence))
+    cle, longueur = run_length(modele, params)
+    failure = 1 - (1 - p_pilote) ** (longueur / pilot.get(cle, longueur))
+
+    if modele == "1":
+        p_no_collision = logistic_predict(X, logistic_fit(X, no_collision, etapes))
+    else:
+        p_no_collision = [None] * len(configurations)
+
+    resultats = []
+    for i, configuration in enumerate(configurations):
+        resultats.append({"params": configuration,
+                          "throughput": float(throughput[i]),
+                          "failure": float(failure[i]),
+                          "no_collision": None if p_no_collision[i] is None else float(p_no_collision[i]),
+                          "observed_failures": echecs[i],
+                          "observed_cost": cout[i]})
+
+    admissibles = [resultat for resultat in resultats
+                   if resultat["failure"] <= max_failure
+                   and (max_no_collision is None or resultat["no_collision"] <= max_no_collision)
+                   and not isnan(resultat["throughput"])]
+    if not admissibles:
+        raise ValueError("Aucune configuration de la grille ne respecte les cibles (probabilité d'interruption "
+                         "minimale prédite : " + str(round(float(np.min(failure)), 4)) + ")")
+
+    meilleur = max(admissibles, key=lambda resultat: resultat["throughput"])
+    return {"params": {**params, **meilleur["params"]},
+            "throughput": meilleur["throughput"],
+            "failure": meilleur["failure"],
+            "no_collision": meilleur["no_collision"],
+            "configurations": resultats}
@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+"""
+Environnement carré stocké dans des tableaux numpy (positions et vitesses des petites particules),
+en double (float64) ou simple précision (float32).
+
+Même interface que simulation2.Workzone_square (et collision_zone de simulation3.Workzone_square_v2),
+avec les mêmes tirages aléatoires : en float64, une simulation donne exactement les mêmes collisions
+qu'avec les listes de Particle (environnement fixe ou périodique).
+
+Les positions sont stockées relativement au centre de la zone, donc bornées par dim : la simple
+précision garde une erreur relative de l'ordre de 10**-7 sur des valeurs de l'ordre de dim.
+La grosse particule et le temps restent en float64.
+
+En float32, les tests de collision tiennent compte des erreurs d'arrondi : un premier filtre
+vectorisé en float32 élargit la tolérance epsilon_time d'une borne de l'erreur d'arrondi (aucune
+collision n'est manquée), puis les candidates sont vérifiées exactement en float64 à partir des
+valeurs stockées.
+
+Avec workers > 1, les recherches de collisions sont découpées en tranches de particules (ou en blocs
+de lignes pour les petites collisions) évaluées en parallèle par un pool de threads : les calculs
+vectorisés de numpy libèrent le GIL. Les minima des tranches sont ensuite réduits avec la même règle
+d'égalité que le calcul séquentiel, donc les résultats ne dépendent pas du nombre de threads.
+
+dsmc_collisions remplace la recherche exacte des petites collisions (collision_zone, en O(n²)) par un
+tirage stochastique des collisions par case d'une grille (Direct Simulation Monte Carlo), en
+O(n log n) par pas de temps pour le tri des particules par case (voir simulation3.Simulation3,
+option collision_rate).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from math import cos, pi, sin, sqrt
+
+import numpy as np
+
+from .outils import DEFAULT_STREAMS, Particle, minimum_image
+
+# Taille maximale (en éléments) des blocs de la recherche des petites collisions
+TAILLE_BLOC = 2**22
+
+
+def _random_state(dim, speed, uniforms, x_center=0, y_center=0):
+    """
+    Particule dans un carré à partir de trois tirages uniformes, mêmes calculs que simulation2.random_particle_square
+
+    Returns:
+        float -- coordonnées x, y absolues et vitesses vx, vy
+    """
+    u_x, u_y, u_speed = uniforms
+    x = x_center - dim + 2 * dim * u_x
+    y = y_center - dim + 2 * dim * u_y
+    theta_speed = 2 * pi * u_speed
+    return x, y, speed * cos(theta_speed), speed * sin(theta_speed)
+
+
+class ArrayBath:
+    """
+    Environnement : ensemble de particules dans un carré, stocké dans des tableaux numpy
+    """
+    def __init__(self, particle_number, dim, speed, epsilon_time, periodic=False, dtype=np.float32, streams=None,
+                 workers=1):
+        """
+        Définition d'un ensemble de particules aléatoires dans un carré
+
+        Arguments:
+            particle_number {int} -- nombre de particules
+            dim {float} -- carré de côté 2*dim
+            speed {float} -- vitesse des particules
+            epsilon_time {float} -- précision pour la détection de collision entre petites particules
+
+        Keyword Arguments:
+            periodic {bool} -- si True : conditions aux limites périodiques (default: {False})
+            dtype {numpy.dtype} -- précision du stockage, float32 ou float64 (default: {np.float32})
+            streams {Streams} -- flux aléatoires (default: {None}, générateur global)
+            workers {int} -- nombre de threads des recherches de collisions (default: {1})
+        """
+        self.streams = DEFAULT_STREAMS if streams is None else streams
+        self.workers = workers
+        self._pool = None
+        self.particle_number = particle_number
+        self.dim = dim
+        self.speed = speed
+        self.epsilon_time = epsilon_time
+        self.periodic = periodic
+        self.periodic_dim = dim if periodic else None
+        self.dtype = np.dtype(dtype)
+        assert self.dtype in (np.float32, np.float64), "Précision float32 ou float64"
+        # Centre de la zone (déplacé par recenter), en float64
+        self.x_center = 0
+        self.y_center = 0
+
+        etats = [_random_state(dim, speed, uniforms) for uniforms in self.streams.initial(particle_number)]
+        etats = np.array(etats, dtype=np.float64).reshape(particle_number, 4)
+        self.x = etats[:, 0].astype(self.dtype)
+        self.y = etats[:, 1].astype(self.dtype)
+        self.vx = etats[:, 2].astype(self.dtype)
+        self.vy = etats[:, 3].astype(self.dtype)
+
+    def __getstate__(self):
+        # Le pool de threads n'est pas copié (vidéo : copie de l'environnement)
+        etat = self.__dict__.copy()
+        etat["_pool"] = None
+        return etat
+
+    def _map(self, fonction, arguments):
+        """
+        Application d'une fonction à chaque élément, en parallèle si workers > 1
+
+        Returns:
+            list -- résultats, dans l'ordre des arguments
+        """
+        if self.workers <= 1 or len(arguments) <= 1:
+            return [fonction(argument) for argument in arguments]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers)
+        return list(self._pool.map(fonction, arguments))
+
+    def _tranches(self, n):
+        """
+        Returns:
+            (int, int) list -- bornes des tranches de [0, n) traitées en parallèle
+        """
+        taille = -(-n // max(self.workers, 1))
+        return [(debut, min(debut + taille, n)) for debut in range(0, n, taille)]
+
+    @property
+    def particles(self):
+        """
+        Returns:
+            Particle list -- copie des particules, en coordonnées absolues (affichage, vidéo)
+        """
+        particles = []
+        for x, y, vx, vy in zip(self.x.tolist(), self.y.tolist(), self.vx.tolist(), self.vy.tolist()):
+            particle = Particle(x + self.x_center, y + self.y_center, 0, 0, self.epsilon_time)
+            particle.vx = vx
+            particle.vy = vy
+            particles.append(particle)
+        return particles
+
+    def workzone_update_time(self, delta_time):
+        """
+        Mise à jour des positions de toutes les particules après un intervalle de temps
+
+        Arguments:
+            delta_time {float} -- intervalle de temps
+        """
+        self.x += delta_time * self.vx
+        self.y += delta_time * self.vy
+
+    def change_theta(self, i, new_theta):
+        """
+        Changement de l'angle theta du vecteur vitesse d'une particule
+
+        Arguments:
+            i {int} -- indice de la particule
+            new_theta {float} -- angle theta
+        """
+        vx, vy = float(self.vx[i]), float(self.vy[i])
+        speed = sqrt((vx ** 2) + (vy ** 2))
+        self.vx[i] = speed * cos(new_theta)
+        self.vy[i] = speed * sin(new_theta)
+
+    def _set(self, i, x, y, vx, vy):
+        self.x[i] = x - self.x_center
+        self.y[i] = y - self.y_center
+        self.vx[i] = vx
+        self.vy[i] = vy
+
+    def inside(self, x, y):
+        """
+        Arguments:
+            x {float} -- coordonnée x
+            y {float} -- coordonnée y
+
+        Returns:
+            bool -- True si le point (x, y) est dans la zone
+        """
+        return abs(x - self.x_center) <= self.dim and abs(y - self.y_center) <= self.dim
+
+    def _outside(self):
+        return np.flatnonzero((np.abs(self.x) > self.dim) | (np.abs(self.y) > self.dim)).tolist()
+
+    def delete_outside(self):
+        """
+        Suppression des particules en dehors de la zone
+        Génération d'une nouvelle particule aléatoire pour chaque sortie
+
+        Returns:
+            int list -- indices des particules supprimées
+        """
+        indices_suppression = self._outside()
+        for i in indices_suppression:
+            self._set(i, *_random_state(self.dim, self.speed, self.streams.uniforms(), self.x_center, self.y_center))
+        return indices_suppression
+
+    def recenter(self, x, y):
+        """
+        Translation de la zone pour la centrer en (x, y) (voir Workzone_square.recenter)
+
+        Arguments:
+            x {float} -- coordonnée x du nouveau centre
+            y {float} -- coordonnée y du nouveau centre
+
+        Returns:
+            int list -- indices des particules régénérées
+        """
+        x_old, y_old = self.x_center, self.y_center
+        self.x -= x - x_old
+        self.y -= y - y_old
+        self.x_center, self.y_center = x, y
+        indices_suppression = self._outside()
+        for i in indices_suppression:
+            # Tirage par rejet dans la bande nouvellement découverte
+            while True:
+                etat = _random_state(self.dim, self.speed, self.streams.uniforms(), x, y)
+                if abs(etat[0] - x_old) > self.dim or abs(etat[1] - y_old) > self.dim:
+                    break
+            self._set(i, *etat)
+        return indices_suppression
+
+    def wrap_inside(self):
+        """
+        Conditions périodiques : les particules sorties de la zone y reviennent par le côté opposé
+        """
+        periode = 2 * self.dim
+        self.x[:] = (self.x + self.dim) % periode - self.dim
+        self.y[:] = (self.y + self.dim) % periode - self.dim
+
+    def boundary(self):
+        """
+        Application des conditions aux limites de la zone
+
+        Returns:
+            int list -- indices des particules supprimées (vide si périodique)
+        """
+        if self.periodic:
+            self.wrap_inside()
+            return []
+        return self.delete_outside()
+
+    def periodic_horizon(self, relative_speed):
+        """
+        Durée pendant laquelle la détection à l'image minimale est exacte en périodique
+
+        Arguments:
+            relative_speed {float} -- vitesse relative maximale des deux particules
+
+        Returns:
+            float -- horizon de détection
+        """
+        return self.dim / relative_speed
+
+    def _collision_times(self, dx, dy, dvx, dvy, epsilon_time, marge=None):
+        """
+        Dates de collision vectorisées, même test que Particle.collision
+
+        Arguments:
+            dx, dy {np.ndarray} -- écarts de position (déjà à l'image minimale en périodique)
+            dvx, dvy {np.ndarray} -- écarts de vitesse
+            epsilon_time {float} -- précision pour la détection de collision
+
+        Keyword Arguments:
+            marge {np.ndarray} -- élargissement de la tolérance (erreur d'arrondi), None si calcul exact
+
+        Returns:
+            np.ndarray -- masque des collisions (candidates si marge est définie)
+            np.ndarray -- dates de collision selon x
+        """
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            tx = dx / dvx
+            ty = dy / dvy
+            if marge is None:
+                return (np.abs(tx - ty) < epsilon_time) & (tx > 0) & (ty > 0), tx
+            return (np.abs(tx - ty) < epsilon_time + marge) & (tx > -marge) & (ty > -marge), tx
+
+    def _error_bound(self, dx, dy, dvx, dvy, tx, echelle_x, echelle_y, vitesse_x, vitesse_y):
+        """
+        Borne de l'erreur d'arrondi sur |tx - ty| en simple précision (avec un facteur de sécurité)
+        """
+        u = 4 * np.finfo(self.dtype).eps
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            erreur_x = u * (echelle_x + np.abs(dx) + np.abs(tx) * (vitesse_x + np.abs(dvx))) / np.abs(dvx)
+            erreur_y = u * (echelle_y + np.abs(dy) + np.abs(tx) * (vitesse_y + np.abs(dvy))) / np.abs(dvy)
+            return np.nan_to_num(erreur_x + erreur_y + u * np.abs(tx), nan=np.inf)
+
+    def _minimum_image(self, d):
+        if self.periodic:
+            periode = 2 * self.dim
+            return d - periode * np.round(d / periode)
+        return d
+
+    def first_collision(self, BP, t_max=None):
+        """
+        Détection de la première collision de la grosse particule avec une petite particule
+
+        Arguments:
+            BP {Particle} -- grosse particule (float64)
+
+        Keyword Arguments:
+            t_max {float} -- inutilisé, toute la zone est testée (même signature que Workzone_square) (default: {None})
+
+        Returns:
+            int -- indice de la particule percutée, -1 si aucune collision
+            float -- date relative de la collision, inf si aucune collision
+        """
+        if self.particle_number == 0:
+            return -1, float("inf")
+        resultats = self._map(lambda tranche: self._first_collision(BP, *tranche), self._tranches(self.particle_number))
+        # Date minimale, et en cas d'égalité la dernière particule (comme dans la boucle sur les Particle)
+        t_min = min(t for _, t in resultats)
+        if t_min == float("inf"):
+            return -1, t_min
+        return max(i for i, t in resultats if t == t_min), t_min
+
+    def first_collision_among(self, BP, indices):
+        """
+        Détection de la première collision de la grosse particule parmi quelques particules
+
+        Arguments:
+            BP {Particle} -- grosse particule (float64)
+            indices {int list} -- indices des particules testées
+
+        Returns:
+            int -- indice de la particule percutée, -1 si aucune collision
+            float -- date relative de la collision, inf si aucune collision
+        """
+        # Peu de particules : test scalaire en float64, mêmes calculs que la vérification exacte de _first_collision
+        bx = BP.x - self.x_center
+        by = BP.y - self.y_center
+        i_argmin, t_min = -1, float("inf")
+        for i in indices:
+            dx = float(self.x[i]) - bx
+            dy = float(self.y[i]) - by
+            if self.periodic:
+                dx = minimum_image(dx, self.dim)
+                dy = minimum_image(dy, self.dim)
+            try:
+                tx = dx / (BP.vx - float(self.vx[i]))
+                ty = dy / (BP.vy - float(self.vy[i]))
+            except ZeroDivisionError:
+                continue
+            if abs(tx - ty) < BP.epsilon_time and tx > 0 and ty > 0 and (tx < t_min or (tx == t_min and i > i_argmin)):
+                i_argmin, t_min = i, tx
+        return i_argmin, t_min
+
+    def _first_collision(self, BP, debut, fin):
+        """
+        Première collision de la grosse particule avec les particules d'indices debut à fin - 1
+
+        Returns:
+            int -- indice de la particule percutée, -1 si aucune collision
+            float -- date relative de la collision, inf si aucune collision
+        """
+        bx = BP.x - self.x_center
+        by = BP.y - self.y_center
+        if self.dtype == np.float64:
+            candidats = np.arange(debut, fin)
+        else:
+            # Filtre en simple précision, tolérance élargie de l'erreur d'arrondi
+            dx = self._minimum_image(self.x[debut:fin] - self.dtype.type(bx))
+            dy = self._minimum_image(self.y[debut:fin] - self.dtype.type(by))
+            dvx = self.dtype.type(BP.vx) - self.vx[debut:fin]
+            dvy = self.dtype.type(BP.vy) - self.vy[debut:fin]
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                tx = dx / dvx
+            periode = 2 * self.dim if self.periodic else 0
+            marge = self._error_bound(dx, dy, dvx, dvy, tx, abs(bx) + periode, abs(by) + periode,
+                                      abs(BP.vx), abs(BP.vy))
+            masque, _ = self._collision_times(dx, dy, dvx, dvy, BP.epsilon_time, marge)
+            candidats = debut + np.flatnonzero(masque)
+            if len(candidats) == 0:
+                return -1, float("inf")
+
+        # Vérification exacte en float64 à partir des valeurs stockées
+        dx = self._minimum_image(self.x[candidats].astype(np.float64) - bx)
+        dy = self._minimum_image(self.y[candidats].astype(np.float64) - by)
+        dvx = BP.vx - self.vx[candidats].astype(np.float64)
+        dvy = BP.vy - self.vy[candidats].astype(np.float64)
+        masque, tx = self._collision_times(dx, dy, dvx, dvy, BP.epsilon_time)
+        if not masque.any():
+            return -1, float("inf")
+        t = np.where(masque, tx, np.inf)
+        # En cas d'égalité, la dernière particule est retenue (comme dans la boucle sur les Particle)
+        i = np.flatnonzero(t == t.min())[-1]
+        return int(candidats[i]), float(t[i])
+
+    def collision_zone(self):
+        """
+        Détection de la première collision dans toute la zone, par blocs de lignes
+        (voir Workzone_square_v2.collision_zone)
+
+        Returns:
+            bool -- True si collision, False sinon
+            float -- Date relative de la collision, 0 sinon
+            int, int tuple -- Indices des particules en collision, (-1, -1) sinon
+        """
+        n = self.particle_number
+        bloc = max(1, TAILLE_BLOC // max(n, 1))
+        if self.workers > 1:
+            # Au moins un bloc par thread
+            bloc = min(bloc, max(1, -(-(n - 1) // self.workers)))
+        resultats = self._map(self._collision_bloc, [np.arange(debut, min(debut + bloc, n - 1))
+                                                     for debut in range(0, n - 1, bloc)])
+        t_min = float("inf")
+        indices = -1, -1
+        # Première collision, le premier bloc en cas d'égalité
+        for t, paire in resultats:
+            if t < t_min:
+                t_min = t
+                indices = paire
+
+        if indices == (-1, -1):
+            return False, 0, indices
+        return True, t_min, indices
+
+    def _collision_bloc(self, lignes):
+        """
+        Première collision entre les particules i des lignes et les particules j > i
+
+        Returns:
+            float -- date relative de la collision, inf si aucune collision
+            int, int tuple -- indices des particules en collision, (-1, -1) sinon
+        """
+        n = self.particle_number
+        colonnes = np.arange(n)
+        # Couples (i, j) avec i < j : écart de la particule j par rapport à la particule i
+        dx = self._minimum_image(self.x[None, :] - self.x[lignes, None])
+        dy = self._minimum_image(self.y[None, :] - self.y[lignes, None])
+        dvx = self.vx[lignes, None] - self.vx[None, :]
+        dvy = self.vy[lignes, None] - self.vy[None, :]
+        if self.dtype == np.float64:
+            masque, tx = self._collision_times(dx, dy, dvx, dvy, self.epsilon_time)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                tx = dx / dvx
+            periode = 2 * self.dim if self.periodic else 0
+            marge = self._error_bound(dx, dy, dvx, dvy, tx, 2 * self.dim + periode, 2 * self.dim + periode,
+                                      self.speed, self.speed)
+            masque, _ = self._collision_times(dx, dy, dvx, dvy, self.epsilon_time, marge)
+        masque &= colonnes[None, :] > lignes[:, None]
+        a, b = np.nonzero(masque)
+        if len(a) == 0:
+            return float("inf"), (-1, -1)
+        if self.dtype != np.float64:
+            # Vérification exacte en float64 des candidates
+            i, j = lignes[a], b
+            dx = self._minimum_image(self.x[j].astype(np.float64) - self.x[i].astype(np.float64))
+            dy = self._minimum_image(self.y[j].astype(np.float64) - self.y[i].astype(np.float64))
+            dvx = self.vx[i].astype(np.float64) - self.vx[j].astype(np.float64)
+            dvy = self.vy[i].astype(np.float64) - self.vy[j].astype(np.float64)
+            exact, t = self._collision_times(dx, dy, dvx, dvy, self.epsilon_time)
+            a, b, t = a[exact], b[exact], t[exact]
+            if len(a) == 0:
+                return float("inf"), (-1, -1)
+        else:
+            t = tx[a, b]
+        # Première collision, la première paire (i, j) en cas d'égalité
+        k = int(np.argmin(t))
+        return float(t[k]), (int(lignes[a[k]]), int(b[k]))
+
+    def dsmc_collisions(self, rng, probabilite, grid_size):
+        """
+        Collisions stochastiques entre petites particules pendant un pas de temps (DSMC, méthode
+        "no time counter" de Bird) : les particules sont réparties dans les cases d'une grille, et dans
+        chaque case un nombre aléatoire de paires candidates (loi de Poisson de moyenne
+        probabilite * n (n - 1) / 2 pour n particules) est tiré. Chaque candidate est acceptée avec une
+        probabilité proportionnelle à sa vitesse relative (rapportée à la vitesse relative maximale 2 * speed).
+        Comme pour une petite collision exacte, les deux particules repartent avec des angles aléatoires.
+
+        Arguments:
+            rng {np.random.Generator} -- générateur aléatoire
+            probabilite {float} -- probabilité de collision d'une paire de la même case pendant le pas,
+                                   à vitesse relative maximale
+            grid_size {int} -- nombre de cases par côté
+
+        Returns:
+            int -- nombre de collisions
+        """
+        n = grid_size
+        inverse = n / (2 * self.dim)
+        ix = np.clip(((self.x + self.dim) * inverse).astype(np.int64), 0, n - 1)
+        iy = np.clip(((self.y + self.dim) * inverse).astype(np.int64), 0, n - 1)
+        cases = ix * n + iy
+        ordre = np.argsort(cases)
+        effectifs = np.bincount(cases, minlength=n * n)
+        debuts = np.cumsum(effectifs) - effectifs
+
+        # Paires candidates : deux particules distinctes de la même case
+        nb_candidates = rng.poisson(probabilite * effectifs * (effectifs - 1) / 2)
+        cases = np.repeat(np.arange(n * n), nb_candidates)
+        if len(cases) == 0:
+            return 0
+        effectifs = effectifs[cases]
+        a = (rng.random(len(cases)) * effectifs).astype(np.int64)
+        b = (rng.random(len(cases)) * (effectifs - 1)).astype(np.int64)
+        b += b >= a
+        i = ordre[debuts[cases] + a]
+        j = ordre[debuts[cases] + b]
+
+        # Acceptation proportionnelle à la vitesse relative
+        vitesse_relative = np.hypot(self.vx[i].astype(np.float64) - self.vx[j],
+                                    self.vy[i].astype(np.float64) - self.vy[j])
+        acceptees = rng.random(len(cases)) * 2 * self.speed < vitesse_relative
+        particules = np.concatenate((i[acceptees], j[acceptees]))
+        angles = 2 * pi * rng.random(len(particules))
+        self.vx[particules] = self.speed * np.cos(angles)
+        self.vy[particules] = self.speed * np.sin(angles)
+        return int(np.count_nonzero(acceptees))
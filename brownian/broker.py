@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+Calcul d'ensembles sur plusieurs machines : un coordinateur et des agents de calcul
+reliés par TCP.
+
+- Les agents demandent des tâches (une simulation chacune) au coordinateur et en gardent
+  quelques-unes d'avance (prefetch).
+- Quand il n'y a plus de tâche en attente, un agent inactif vole la moitié des tâches non
+  commencées de l'agent le plus chargé (vol de travail) : les ensembles se terminent sans
+  attendre l'agent le plus lent.
+- Chaque agent envoie un battement de cœur régulier ; un agent silencieux au-delà de
+  heartbeat_timeout est considéré comme perdu et ses tâches sont remises en attente.
+Une tâche calculée deux fois (vol ou relance) n'est comptée qu'une fois.
+
+Protocole : une ligne JSON par message.
+Agent -> coordinateur : {"type": "request", "max": k}, {"type": "started", "id": i},
+                        {"type": "result", "id": i, "record": {...}}, {"type": "heartbeat"}
+Coordinateur -> agent : {"type": "tasks", "tasks": [[i, modele, params, seed], ...]},
+                        {"type": "wait"}, {"type": "revoke", "ids": [...]}, {"type": "stop"}
+
+Lancement d'un agent : python -m brownian.broker HOTE PORT
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import socket
+import threading
+import time
+
+from .ensemble import new_seeds, run_simulation
+
+# ---------------------------------------------------------------------------- #
+#                                 Coordinateur                                 #
+# ---------------------------------------------------------------------------- #
+
+
+class _Agent:
+    """
+    Connexion d'un agent de calcul, vue du coordinateur
+    """
+    def __init__(self, writer):
+        self.writer = writer
+        self.assigned = set()   # Tâches confiées à l'agent, non terminées
+        self.started = set()    # Tâches commencées par l'agent
+        self.last_seen = time.monotonic()
+
+
+def _write(writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+
+
+class Coordinator:
+    """
+    Coordinateur asyncio : distribue les simulations des ensembles aux agents connectés
+    """
+    def __init__(self, host="127.0.0.1", port=0, heartbeat_timeout=10):
+        """
+        Keyword Arguments:
+            host {str} -- adresse d'écoute (default: {"127.0.0.1"})
+            port {int} -- port d'écoute, 0 pour un port libre (default: {0})
+            heartbeat_timeout {float} -- délai de silence au-delà duquel un agent est perdu, en secondes (default: {10})
+        """
+        self.host = host
+        self.port = port
+        self.heartbeat_timeout = heartbeat_timeout
+        self.agents = set()
+        self.tasks = {}     # Tâches non terminées : id -> (file de résultats, indice, tâche)
+        self.pending = collections.deque()
+        self.counter = itertools.count()
+        self.stolen = 0     # Nombre de tâches volées
+        self.requeued = 0   # Nombre de tâches relancées après la perte d'un agent
+        self.server = None
+        self.surveillance = None
+
+    async def start(self):
+        """
+        Démarrage de l'écoute des agents et de la surveillance des battements de cœur
+        """
+        self.server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.surveillance = asyncio.ensure_future(self._surveillance())
+
+    async def close(self):
+        """
+        Arrêt des agents et de l'écoute
+        """
+        for agent in list(self.agents):
+            _write(agent.writer, {"type": "stop"})
+            agent.writer.close()
+        self.agents.clear()
+        self.surveillance.cancel()
+        await asyncio.gather(self.surveillance, return_exceptions=True)
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def stream(self, modele, params, n, seeds=None):
+        """
+        Calcul de n simulations par les agents, résultats renvoyés au fil de l'eau
+
+        Arguments:
+            modele {str} -- "1", "1.1", "2" ou "3"
+            params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+            n {int} -- nombre de simulations
+
+        Keyword Arguments:
+            seeds {int list} -- graines des simulations (default: {None}, graines aléatoires)
+
+        Yields:
+            (int, dict) -- indice de la simulation et enregistrement (voir ensemble.run_simulation),
+                           dans l'ordre d'arrivée
+        """
+        if seeds is None:
+            seeds = new_seeds(n)
+        assert len(seeds) == n, "Il faut une graine par simulation"
+        resultats = asyncio.Queue()
+        ids = []
+        for index, seed in enumerate(seeds):
+            identifiant = next(self.counter)
+            self.tasks[identifiant] = (resultats, index, [identifiant, modele, params, seed])
+            self.pending.append(identifiant)
+            ids.append(identifiant)
+        try:
+            for _ in range(n):
+                yield await resultats.get()
+        finally:
+            # Lecture abandonnée : les tâches restantes sont annulées
+            for identifiant in ids:
+                self.tasks.pop(identifiant, None)
+            for agent in self.agents:
+                agent.assigned.difference_update(ids)
+
+    async def run_ensemble(self, modele, params, n, seeds=None):
+        """
+        Calcul de n simulations par les agents
+
+        Arguments:
+            modele {str} -- "1", "1.1", "2" ou "3"
+            params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+            n {int} -- nombre de simulations
+
+        Keyword Arguments:
+            seeds {int list} -- graines des simulations (default: {None}, graines aléatoires)
+
+        Returns:
+            dict list -- enregistrements des simulations, dans l'ordre des graines (voir ensemble.run_ensemble)
+        """
+        records = [None] * n
+        async for index, record in self.stream(modele, params, n, seeds):
+            records[index] = record
+        return records
+
+    async def _handle(self, reader, writer):
+        """
+        Connexion d'un agent
+        """
+        agent = _Agent(writer)
+        self.agents.add(agent)
+        try:
+            while True:
+                ligne = await reader.readline()
+                if not ligne:
+                    break
+                agent.last_seen = time.monotonic()
+                message = json.loads(ligne)
+                if message["type"] == "request":
+                    self._request(agent, message["max"])
+                elif message["type"] == "started":
+                    agent.started.add(message["id"])
+                elif message["type"] == "result":
+                    self._result(message["id"], message["record"])
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._lost(agent)
+
+    def _request(self, agent, nombre):
+        """
+        Envoi d'au plus nombre tâches à un agent : tâches en attente, sinon tâches volées
+        """
+        taches = []
+        while self.pending and len(taches) < nombre:
+            identifiant = self.pending.popleft()
+            if identifiant in self.tasks:
+                taches.append(identifiant)
+        if not taches:
+            taches = self._steal(agent)
+        if not taches:
+            _write(agent.writer, {"type": "wait"})
+            return
+        agent.assigned.update(taches)
+        _write(agent.writer, {"type": "tasks", "tasks": [self.tasks[identifiant][2] for identifiant in taches]})
+
+    def _steal(self, voleur):
+        """
+        Vol de la moitié des tâches non commencées de l'agent le plus chargé
+
+        Returns:
+            int list -- tâches volées
+        """
+        # Seules les tâches encore demandées (non annulées) sont volées
+        charges = [([identifiant for identifiant in agent.assigned - agent.started if identifiant in self.tasks],
+                    agent) for agent in self.agents if agent is not voleur]
+        if not charges:
+            return []
+        libres, victime = max(charges, key=lambda charge: len(charge[0]))
+        charge = len(libres)
+        if charge < 2:
+            return []
+        # Les dernières tâches de la victime sont celles qu'elle aurait calculées en dernier
+        vol = sorted(libres)[charge - charge // 2:]
+        victime.assigned.difference_update(vol)
+        _write(victime.writer, {"type": "revoke", "ids": vol})
+        self.stolen += len(vol)
+        return vol
+
+    def _result(self, identifiant, record):
+        for agent in self.agents:
+            agent.assigned.discard(identifiant)
+            agent.started.discard(identifiant)
+        if identifiant in self.tasks:     # Sinon déjà calculée par un autre agent, ou annulée
+            resultats, index, _ = self.tasks.pop(identifiant)
+            resultats.put_nowait((index, record))
+
+    def _lost(self, agent):
+        """
+        Agent perdu : ses tâches non terminées sont remises en tête de la file d'attente
+        """
+        if agent not in self.agents:
+            return
+        self.agents.discard(agent)
+        relance = sorted(identifiant for identifiant in agent.assigned if identifiant in self.tasks)
+        self.pending.extendleft(reversed(relance))
+        self.requeued += len(relance)
+        agent.writer.close()
+
+    async def _surveillance(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_timeout / 4)
+            maintenant = time.monotonic()
+            for agent in list(self.agents):
+                if maintenant - agent.last_seen > self.heartbeat_timeout:
+                    self._lost(agent)
+
+
+# ---------------------------------------------------------------------------- #
+#                                     Agent                                    #
+# ---------------------------------------------------------------------------- #
+
+
+def worker_agent(host, port, prefetch=2, heartbeat=1.0, wait=0.1):
+    """
+    Agent de calcul : exécute les tâches du coordinateur jusqu'à son arrêt
+
+    Arguments:
+        host {str} -- adresse du coordinateur
+        port {int} -- port du coordinateur
+
+    Keyword Arguments:
+        prefetch {int} -- nombre de tâches gardées d'avance (default: {2})
+        heartbeat {float} -- intervalle entre deux battements de cœur, en secondes (default: {1.0})
+        wait {float} -- délai avant une nouvelle demande quand aucune tâche n'est disponible (default: {0.1})
+
+    Returns:
+        int -- nombre de simulations calculées
+    """
+    connexion = socket.create_connection((host, port))
+    verrou = threading.Lock()
+    condition = threading.Condition()
+    locales = collections.deque()
+    etat = {"stop": False, "requested": False, "attente": False}
+
+    def envoi(message):
+        with verrou:
+            connexion.sendall(json.dumps(message).encode() + b"\n")
+
+    def lecture():
+        try:
+            for ligne in connexion.makefile("rb"):
+                message = json.loads(ligne)
+                with condition:
+                    if message["type"] == "tasks":
+                        locales.extend(message["tasks"])
+                        etat["requested"] = False
+                    elif message["type"] == "wait":
+                        etat["requested"] = False
+                        etat["attente"] = True
+                    elif message["type"] == "revoke":
+                        revoquees = set(message["ids"])
+                        gardees = [tache for tache in locales if tache[0] not in revoquees]
+                        locales.clear()
+                        locales.extend(gardees)
+                    elif message["type"] == "stop":
+                        etat["stop"] = True
+                    condition.notify_all()
+        except OSError:
+            pass
+        with condition:
+            etat["stop"] = True
+            condition.notify_all()
+
+    def battements():
+        while not etat["stop"]:
+            time.sleep(heartbeat)
+            try:
+                envoi({"type": "heartbeat"})
+            except OSError:
+                return
+
+    def tache_suivante():
+        with condition:
+            while not etat["stop"]:
+                if len(locales) < prefetch and not etat["requested"]:
+                    if etat["attente"]:
+                        # Aucune tâche disponible : nouvelle demande plus tard
+                        etat["attente"] = False
+                        condition.wait(wait)
+                        continue
+                    etat["requested"] = True
+                    envoi({"type": "request", "max": prefetch - len(locales)})
+                if locales:
+                    return locales.popleft()
+                condition.wait()
+            return None
+
+    threading.Thread(target=lecture, daemon=True).start()
+    threading.Thread(target=battements, daemon=True).start()
+
+    nb = 0
+    try:
+        while True:
+            tache = tache_suivante()
+            if tache is None:
+                break
+            identifiant, modele, params, seed = tache
+            envoi({"type": "started", "id": identifiant})
+            record = run_simulation(modele, params, seed)
+            envoi({"type": "result", "id": identifiant, "record": record})
+            nb += 1
+    except OSError:
+        pass    # Coordinateur arrêté
+    finally:
+        etat["stop"] = True
+        connexion.close()
+    return nb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent de calcul brownian")
+    parser.add_argument("host", help="adresse du coordinateur")
+    parser.add_argument("port", type=int, help="port du coordinateur")
+    parser.add_argument("--prefetch", type=int, default=2, help="nombre de tâches gardées d'avance")
+    args = parser.parse_args()
+    worker_agent(args.host, args.port, prefetch=args.prefetch)
+
+
+if __name__ == '__main__':
+    main()
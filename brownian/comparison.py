@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Comparaison statistique de modèles (ou de configurations) à partir des enregistrements
+des ensembles (voir ensemble.run_ensemble, sweep.sweep, arena.EnsembleArena.records).
+
+Pour chaque mesure et chaque paire de groupes :
+- intervalle de confiance bootstrap (percentile) de la moyenne de chaque groupe et de la
+  différence des moyennes, avec la p-value bootstrap associée (hypothèse : même moyenne),
+- distance de Kolmogorov-Smirnov entre les deux distributions et sa p-value asymptotique.
+
+Tous les rééchantillonnages d'une mesure sont tirés en une seule passe vectorisée : les valeurs
+de tous les groupes sont concaténées, un tableau d'indices (n_resamples, nombre total de valeurs)
+tire chaque colonne dans son propre groupe, et les moyennes des groupes sont des sommes par segment.
+Les différences de toutes les paires sont ensuite calculées ensemble, de même que les distances
+de Kolmogorov-Smirnov (fonctions de répartition de tous les groupes évaluées une seule fois).
+"""
+import itertools
+
+import numpy as np
+
+# Mesures comparées par défaut
+MESURES = ["Fréquence", "lpm", "Distance moyenne", "Distance max"]
+
+# ---------------------------------------------------------------------------- #
+#                                    Groupes                                   #
+# ---------------------------------------------------------------------------- #
+
+
+def _groupes(records, by, mesure):
+    """
+    Valeurs abouties (non nan) d'une mesure dans chaque groupe
+
+    Returns:
+        list -- clés des groupes (ordre de première apparition)
+        np.ndarray list -- valeurs de chaque groupe
+    """
+    cles = by if isinstance(by, (list, tuple)) else [by]
+    groupes = {}
+    for record in records:
+        valeur = record.get(mesure, np.nan)
+        cle = tuple(record[c] for c in cles) if len(cles) > 1 else record[cles[0]]
+        liste = groupes.setdefault(cle, [])
+        if valeur is not None and not np.isnan(valeur):
+            liste.append(valeur)
+    noms = [cle for cle in groupes if len(groupes[cle]) >= 2]
+    return noms, [np.array(groupes[cle], dtype=np.float64) for cle in noms]
+
+
+def bootstrap_means(groupes, n_resamples=2000, rng=None):
+    """
+    Moyennes bootstrap de plusieurs groupes, en une seule passe vectorisée
+
+    Arguments:
+        groupes {np.ndarray list} -- valeurs de chaque groupe
+
+    Keyword Arguments:
+        n_resamples {int} -- nombre de rééchantillonnages (default: {2000})
+        rng {np.random.Generator} -- générateur aléatoire (default: {None}, nouveau générateur)
+
+    Returns:
+        np.ndarray -- moyennes rééchantillonnées, de forme (n_resamples, nombre de groupes)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    valeurs = np.concatenate(groupes)
+    tailles = np.array([len(groupe) for groupe in groupes])
+    offsets = np.concatenate(([0], np.cumsum(tailles)[:-1]))
+    # Chaque colonne est tirée dans son groupe : indice = début du groupe + entier dans [0, taille)
+    debut = np.repeat(offsets, tailles)
+    taille = np.repeat(tailles, tailles)
+    indices = debut + rng.integers(0, taille, size=(n_resamples, len(valeurs)))
+    return np.add.reduceat(valeurs[indices], offsets, axis=1) / tailles
+
+
+def ks_distance(a, b):
+    """
+    Distance de Kolmogorov-Smirnov entre deux échantillons et sa p-value asymptotique
+
+    Arguments:
+        a {np.ndarray} -- premier échantillon
+        b {np.ndarray} -- second échantillon
+
+    Returns:
+        float -- distance maximale entre les fonctions de répartition empiriques
+        float -- p-value (approximation de Stephens de la loi de Kolmogorov)
+    """
+    distances, p_values = ks_distances([np.asarray(a), np.asarray(b)], np.array([0]), np.array([1]))
+    return float(distances[0]), float(p_values[0])
+
+
+def ks_distances(groupes, i, j, block=10**7):
+    """
+    Distances de Kolmogorov-Smirnov de plusieurs paires de groupes, en une passe vectorisée
+
+    Les fonctions de répartition empiriques de tous les groupes sont évaluées aux valeurs de
+    tous les groupes réunies (la distance de deux fonctions en escalier est atteinte en l'un
+    de leurs sauts), puis comparées pour toutes les paires, par blocs de paires.
+
+    Arguments:
+        groupes {np.ndarray list} -- valeurs de chaque groupe
+        i {np.ndarray} -- premier groupe de chaque paire
+        j {np.ndarray} -- second groupe de chaque paire
+
+    Keyword Arguments:
+        block {int} -- nombre maximal de valeurs d'un bloc de différences (default: {10**7})
+
+    Returns:
+        np.ndarray -- distance de chaque paire
+        np.ndarray -- p-value de chaque paire (approximation de Stephens de la loi de Kolmogorov)
+    """
+    points = np.concatenate(groupes)
+    repartitions = np.array([np.searchsorted(np.sort(groupe), points, side="right") / len(groupe)
+                             for groupe in groupes])
+    distances = np.empty(len(i))
+    pas = max(1, block // max(len(points), 1))
+    for debut in range(0, len(i), pas):
+        fin = debut + pas
+        distances[debut:fin] = np.max(np.abs(repartitions[i[debut:fin]] - repartitions[j[debut:fin]]), axis=1)
+
+    tailles = np.array([len(groupe) for groupe in groupes])
+    n = tailles[i] * tailles[j] / (tailles[i] + tailles[j])
+    lam = (np.sqrt(n) + 0.12 + 0.11 / np.sqrt(n)) * distances
+    k = np.arange(1, 101)
+    p_values = 2 * np.sum((-1.0)**(k - 1) * np.exp(-2 * k**2 * lam[:, None]**2), axis=1)
+    p_values = np.where(lam == 0, 1.0, np.clip(p_values, 0, 1))
+    return distances, p_values
+
+
+# ---------------------------------------------------------------------------- #
+#                                  Comparaisons                                #
+# ---------------------------------------------------------------------------- #
+
+
+def compare(records, mesures=None, by="Modèle", n_resamples=2000, confidence=0.95, seed=None):
+    """
+    Comparaison de toutes les paires de groupes sur chaque mesure
+
+    Arguments:
+        records {dict list} -- enregistrements des simulations (ou pandas.DataFrame)
+
+    Keyword Arguments:
+        mesures {str list} -- mesures comparées (default: {None}, MESURES)
+        by {str or str list} -- colonne(s) définissant les groupes (default: {"Modèle"})
+        n_resamples {int} -- nombre de rééchantillonnages bootstrap (default: {2000})
+        confidence {float} -- niveau de confiance des intervalles (default: {0.95})
+        seed {int} -- graine du bootstrap (default: {None})
+
+    Returns:
+        dict list -- une ligne par mesure et par paire de groupes (A, B) :
+                     "Mesure", "A", "B", "n A", "n B", "Moyenne A", "IC A", "Moyenne B", "IC B",
+                     "Différence" (moyenne A - moyenne B), "IC différence", "p-value différence",
+                     "KS", "p-value KS" ; les groupes de moins de deux simulations abouties sont ignorés
+    """
+    if hasattr(records, "to_dict"):
+        records = records.to_dict("records")
+    if mesures is None:
+        mesures = MESURES
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    quantiles = [alpha, 1 - alpha]
+
+    lignes = []
+    for mesure in mesures:
+        noms, groupes = _groupes(records, by, mesure)
+        if len(groupes) < 2:
+            continue
+        moyennes = np.array([groupe.mean() for groupe in groupes])
+        boot = bootstrap_means(groupes, n_resamples, rng)
+        ic = np.quantile(boot, quantiles, axis=0)
+
+        # Différences de toutes les paires
+        i, j = np.array(list(itertools.combinations(range(len(groupes)), 2))).T
+        differences = boot[:, i] - boot[:, j]
+        ic_differences = np.quantile(differences, quantiles, axis=0)
+        # p-value bootstrap bilatérale : proportion des différences de l'autre côté de 0
+        p_values = np.minimum(1, 2 * np.minimum(np.mean(differences <= 0, axis=0), np.mean(differences >= 0, axis=0)))
+
+        ks, p_ks = ks_distances(groupes, i, j)
+
+        for k in range(len(i)):
+            a, b = i[k], j[k]
+            lignes.append({"Mesure": mesure, "A": noms[a], "B": noms[b],
+                           "n A": len(groupes[a]), "n B": len(groupes[b]),
+                           "Moyenne A": float(moyennes[a]), "IC A": (float(ic[0, a]), float(ic[1, a])),
+                           "Moyenne B": float(moyennes[b]), "IC B": (float(ic[0, b]), float(ic[1, b])),
+                           "Différence": float(moyennes[a] - moyennes[b]),
+                           "IC différence": (float(ic_differences[0, k]), float(ic_differences[1, k])),
+                           "p-value différence": float(p_values[k]),
+                           "KS": float(ks[k]), "p-value KS": float(p_ks[k])})
+    return lignes
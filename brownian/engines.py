@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Moteurs de calcul : interface commune aux quatre modèles et registre des backends.
+
+Un moteur (Engine) associe un modèle ("1", "1.1", "2", "3") et un backend ("python" pour
+le calcul de référence sur des listes de Particle, "numpy" pour l'environnement vectorisé
+de bath.ArrayBath...). Tous les moteurs ont la même interface : run(params) renvoie un
+Result (trajectoire de la grosse particule et mesures), quelle que soit la façon dont le
+modèle est construit, exécuté et mesuré.
+
+Le backend est choisi explicitement, ou automatiquement ("auto") d'après la taille du
+problème (nombre de particules de l'environnement) : le moteur retenu est le moteur
+disponible de plus grand seuil min_size inférieur ou égal à cette taille. Un backend compilé
+s'enregistre avec register(...) en indiquant le module dont il dépend (requires) : il n'est
+proposé que si ce module est installé.
+"""
+import importlib.util
+from collections import namedtuple
+
+from .outils import stats
+from .outils1_1 import statsSimulation
+from .simulation1 import Simulation1
+from .simulation1_1 import BrownianMotion1_1
+from .simulation2 import Simulation2
+from .simulation3 import Simulation3
+
+MODELES = {"1": Simulation1, "1.1": BrownianMotion1_1, "2": Simulation2, "3": Simulation3}
+
+# Résultat d'une simulation :
+# - T, X, Y : temps et positions de la grosse particule au départ et à chaque collision,
+# - duree : durée simulée,
+# - mesures : colonnes de l'enregistrement (voir ensemble.COLONNES) calculées par le moteur
+Result = namedtuple("Result", ["T", "X", "Y", "duree", "mesures"])
+
+# ---------------------------------------------------------------------------- #
+#                                    Moteurs                                   #
+# ---------------------------------------------------------------------------- #
+
+
+class Engine:
+    """
+    Moteur de calcul d'un modèle
+    """
+    def __init__(self, modele, backend, requires=None, min_size=0, inexact=()):
+        """
+        Arguments:
+            modele {str} -- "1", "1.1", "2" ou "3"
+            backend {str} -- nom du backend
+
+        Keyword Arguments:
+            requires {str} -- module nécessaire au backend (default: {None})
+            min_size {int} -- taille de problème à partir de laquelle le backend est choisi
+                              automatiquement, None pour un choix explicite uniquement (default: {0})
+            inexact {str tuple} -- paramètres pour lesquels le backend ne reproduit pas exactement les
+                                   résultats du backend de référence, ou qu'il ignore : s'ils sont activés,
+                                   le backend n'est pas choisi automatiquement (default: {()})
+        """
+        self.modele = modele
+        self.backend = backend
+        self.requires = requires
+        self.min_size = min_size
+        self.inexact = inexact
+
+    def __repr__(self):
+        return "Engine(" + repr(self.modele) + ", " + repr(self.backend) + ")"
+
+    def available(self):
+        """
+        Returns:
+            bool -- True si le module nécessaire au backend est installé
+        """
+        return self.requires is None or importlib.util.find_spec(self.requires) is not None
+
+    def size(self, params):
+        """
+        Arguments:
+            params {dict} -- paramètres du modèle
+
+        Returns:
+            int -- taille du problème (nombre de particules de l'environnement, 0 si non défini)
+        """
+        return 0
+
+    def run(self, params):
+        """
+        Calcul d'une simulation
+
+        Arguments:
+            params {dict} -- paramètres du modèle
+
+        Raises:
+            NoBigCollision, OutsideEnv, NoBigLittleCollision: simulation interrompue
+
+        Returns:
+            Result -- trajectoire et mesures
+        """
+        raise NotImplementedError
+
+
+class HistoricEngine(Engine):
+    """
+    Moteur des modèles 1, 2 et 3 : calcul par calcul(), trajectoire dans historic_BP,
+    mesures par outils.stats
+    """
+    def __init__(self, modele, backend, options=None, requires=None, min_size=0, inexact=()):
+        """
+        Arguments:
+            modele {str} -- "1", "2" ou "3"
+            backend {str} -- nom du backend
+
+        Keyword Arguments:
+            options {dict} -- paramètres ajoutés au constructeur du modèle pour ce backend (default: {None})
+            requires {str} -- module nécessaire au backend (default: {None})
+            min_size {int} -- seuil du choix automatique (default: {0})
+            inexact {str tuple} -- paramètres excluant le choix automatique (default: {()})
+        """
+        super().__init__(modele, backend, requires, min_size, inexact)
+        self.options = {} if options is None else options
+
+    def size(self, params):
+        return getattr(MODELES[self.modele](**params), "particle_number", 0)
+
+    def run(self, params):
+        simulation = MODELES[self.modele](**{**params, **self.options})
+        simulation.calcul()
+        T = [elem[0] for elem in simulation.historic_BP]
+        X = [elem[1].x for elem in simulation.historic_BP]
+        Y = [elem[1].y for elem in simulation.historic_BP]
+        mesures = {}
+        if len(X) > 1:
+            freq, l_p_m, d_moy, d_max, nb = stats(simulation)
+            mesures.update({"Fréquence": freq, "lpm": l_p_m, "Distance moyenne": d_moy, "Distance max": d_max})
+        if hasattr(simulation, "nb_no_collision"):
+            mesures["Nb no collision"] = simulation.nb_no_collision
+        return Result(T, X, Y, T[-1], mesures)
+
+
+class EventEngine(Engine):
+    """
+    Moteur du modèle 1.1 : calcul par iter_events (mêmes tirages que simulation(nb_etapes),
+    sans conserver chaque étape), mesures par outils1_1.statsSimulation
+    """
+    def run(self, params):
+        params = dict(params)
+        nb_etapes = params.pop("nb_etapes")
+        simulation = BrownianMotion1_1(**params)
+        T, X, Y = [], [], []
+        for event in simulation.iter_events(nb_etapes):
+            if event.kind != "no_collision":
+                T.append(event.time)
+                X.append(event.x)
+                Y.append(event.y)
+        duree = nb_etapes * simulation.h
+        mesures = {}
+        if len(X) > 1:
+            l_p_m, d_moy, d_max, nb = statsSimulation(X, Y)
+            mesures.update({"Fréquence": nb / duree, "lpm": l_p_m, "Distance moyenne": d_moy, "Distance max": d_max})
+        return Result(T, X, Y, duree, mesures)
+
+
+# ---------------------------------------------------------------------------- #
+#                                    Registre                                  #
+# ---------------------------------------------------------------------------- #
+
+BACKENDS = {modele: {} for modele in MODELES}
+
+
+def register(engine):
+    """
+    Enregistrement d'un moteur (remplace le moteur de même modèle et de même backend)
+
+    Arguments:
+        engine {Engine} -- moteur
+    """
+    BACKENDS[engine.modele][engine.backend] = engine
+
+
+def engines(modele):
+    """
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+
+    Returns:
+        Engine list -- moteurs disponibles du modèle
+    """
+    return [engine for engine in BACKENDS[modele].values() if engine.available()]
+
+
+def select(modele, params, backend="auto"):
+    """
+    Choix du moteur d'une simulation
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du modèle
+
+    Keyword Arguments:
+        backend {str} -- nom du backend, ou "auto" pour un choix d'après la taille du problème (default: {"auto"})
+
+    Raises:
+        ValueError: modèle ou backend inconnu, ou backend indisponible
+
+    Returns:
+        Engine -- moteur retenu
+    """
+    if modele not in BACKENDS:
+        raise ValueError("Modèle inconnu : " + str(modele))
+    if backend != "auto":
+        if backend not in BACKENDS[modele]:
+            raise ValueError("Backend inconnu pour le modèle " + modele + " : " + str(backend))
+        engine = BACKENDS[modele][backend]
+        if not engine.available():
+            raise ValueError("Backend " + backend + " indisponible : module " + engine.requires + " non installé")
+        return engine
+
+    candidats = [engine for engine in engines(modele) if engine.min_size is not None
+                 and not any(params.get(nom) for nom in engine.inexact)]
+    # Précision de l'environnement choisie explicitement : backend de référence du constructeur
+    if params.get("dtype") is not None:
+        candidats = [engine for engine in candidats if not getattr(engine, "options", None)]
+    taille = candidats[0].size(params) if len(candidats) > 1 else 0
+    return max((engine for engine in candidats if engine.min_size <= taille), key=lambda engine: engine.min_size)
+
+
+register(HistoricEngine("1", "python"))
+register(EventEngine("1.1", "python"))
+# Seuils mesurés : le backend numpy est plus rapide à partir d'environ 40 particules (modèle 2)
+# et 20 particules (modèle 3, recherche des petites collisions en O(n²)). En float64 il reproduit
+# exactement le backend python, sauf avec l'environnement mobile (positions relatives au centre).
+# Il ignore la grille (grid=True) : la recherche sur grille demandée reste au backend python
+register(HistoricEngine("2", "python"))
+register(HistoricEngine("2", "numpy", {"dtype": "float64"}, requires="numpy", min_size=40,
+                        inexact=("moving_window", "grid")))
+register(HistoricEngine("2", "numpy32", {"dtype": "float32"}, requires="numpy", min_size=None))
+register(HistoricEngine("2", "grid", {"grid": True}, min_size=None))
+register(HistoricEngine("3", "python"))
+register(HistoricEngine("3", "numpy", {"dtype": "float64"}, requires="numpy", min_size=20))
+register(HistoricEngine("3", "numpy32", {"dtype": "float32"}, requires="numpy", min_size=None))
+
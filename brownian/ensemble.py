@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Exécution d'ensembles de simulations (plusieurs calculs indépendants d'un même modèle).
+
+Chaque simulation produit un enregistrement (dict) dont les clés sont les colonnes
+du tableau de résultats utilisé dans bench.py.
+"""
+import multiprocessing
+import random
+from math import nan
+from time import process_time
+
+from .engines import MODELES, select
+from .outils import Streams
+from .simulation2 import NoBigCollision, OutsideEnv
+from .simulation3 import NoBigLittleCollision
+
+# ---------------------------------------------------------------------------- #
+#                                   Ensembles                                  #
+# ---------------------------------------------------------------------------- #
+
+# Interruptions d'une simulation (le calcul est perdu)
+ECHECS = (NoBigCollision, OutsideEnv, NoBigLittleCollision)
+
+COLONNES = ["Modèle", "Graine", "Statut", "Temps de calcul", "Durée", "Fréquence", "lpm",
+            "Distance moyenne", "Distance max", "Nb collisions", "Nb no collision"]
+
+
+def run_simulation(modele, params, seed=None, trajectory=False, variance=None):
+    """
+    Calcul d'une simulation et de ses mesures
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du constructeur du modèle, avec en plus "nb_etapes" pour le modèle 1.1
+                         et éventuellement "backend" (voir engines.select, default: "auto")
+
+    Keyword Arguments:
+        seed {int} -- graine du générateur aléatoire (default: {None})
+        trajectory {bool} -- si True : renvoie aussi la trajectoire (default: {False})
+        variance {dict} -- si défini : flux aléatoires séparés tirés de la graine (voir outils.Streams), avec
+                           les options de Streams ({"antithetic": bool, "sobol": bool}) ; deux simulations
+                           de même graine partagent alors leurs angles de déviation (default: {None})
+
+    Returns:
+        dict -- enregistrement de la simulation (clés : COLONNES), Statut = "ok" ou nom de l'interruption,
+                Temps de calcul = temps CPU du processus (indépendant de la charge de la machine)
+        (float list, float list, float list) -- (si trajectory=True) temps et positions de la grosse particule
+                                                au départ et à chaque collision (vides si interrompue)
+    """
+    params = dict(params)
+    if seed is not None:
+        random.seed(seed)
+    if variance is not None:
+        params["streams"] = Streams(seed, **variance)
+
+    record = dict.fromkeys(COLONNES, nan)
+    record.update({"Modèle": modele, "Graine": seed, "Statut": "ok"})
+
+    engine = select(modele, params, params.pop("backend", "auto"))
+    debut = process_time()
+    try:
+        T, X, Y, duree, mesures = engine.run(params)
+    except ECHECS as erreur:
+        record["Statut"] = type(erreur).__name__
+        record["Temps de calcul"] = process_time() - debut
+        if trajectory:
+            return record, ([], [], [])
+        return record
+
+    record.update(mesures)
+    record.update({"Temps de calcul": process_time() - debut, "Durée": duree, "Nb collisions": len(X) - 1})
+    if trajectory:
+        return record, (T, X, Y)
+    return record
+
+
+def _run_simulation(args):
+    return run_simulation(*args)
+
+
+def new_seeds(n):
+    """
+    Graines indépendantes (les processus d'un Pool partagent sinon le même état aléatoire)
+
+    Arguments:
+        n {int} -- nombre de graines
+
+    Returns:
+        int list -- graines
+    """
+    generateur = random.SystemRandom()
+    return [generateur.getrandbits(32) for _ in range(n)]
+
+
+def run_ensemble(modele, params, n, seeds=None, processes=None, variance=None):
+    """
+    Calcul de n simulations indépendantes d'un même modèle
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du modèle (voir run_simulation)
+        n {int} -- nombre de simulations
+
+    Keyword Arguments:
+        seeds {int list} -- graines des simulations (default: {None}, graines aléatoires)
+        processes {int} -- nombre de processus, 1 pour un calcul séquentiel (default: {None}, tous les cœurs)
+        variance {dict} -- options des flux aléatoires séparés (voir run_simulation) (default: {None})
+
+    Returns:
+        dict list -- enregistrements des simulations, dans l'ordre des graines
+    """
+    if seeds is None:
+        seeds = new_seeds(n)
+    assert len(seeds) == n, "Il faut une graine par simulation"
+    taches = [(modele, params, seed, False, variance) for seed in seeds]
+
+    if processes == 1:
+        return [_run_simulation(tache) for tache in taches]
+    with multiprocessing.Pool(processes=processes) as pool:
+        return pool.map(_run_simulation, taches)
+
+
+def dataframe(records):
+    """
+    Tableau des résultats d'un ensemble (nécessite pandas)
+
+    Arguments:
+        records {dict list} -- enregistrements (voir run_simulation), éventuellement complétés
+                               par d'autres colonnes (paramètres d'un balayage...)
+
+    Returns:
+        pandas.DataFrame -- une ligne par simulation
+    """
+    import pandas as pd
+
+    colonnes = list(COLONNES)
+    for record in records:
+        colonnes.extend(cle for cle in record if cle not in colonnes)
+    return pd.DataFrame(records, columns=colonnes)
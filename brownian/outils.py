@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+from collections import namedtuple
 from math import cos, sin, sqrt
+import random
+import warnings
 import numpy as np
 
 # ---------------------------------------------------------------------------- #
@@ -23,6 +26,21 @@ def distance(x1, y1, x2, y2):
     return sqrt((x2 - x1)**2 + (y2 - y1)**2)
 
 
+def minimum_image(d, dim):
+    """
+    Image minimale d'un écart dans un environnement périodique
+
+    Arguments:
+        d {float} -- écart selon un axe
+        dim {float} -- environnement carré périodique de côté 2*dim
+
+    Returns:
+        float -- écart équivalent dans [-dim, dim]
+    """
+    periode = 2 * dim
+    return d - periode * round(d / periode)
+
+
 class Particle:
     def __init__(self, x, y, speed, theta, epsilon_time):
         """
@@ -55,13 +73,17 @@ class Particle:
         self.x = new_x
         self.y = new_y
 
-    def collision(self, particle2):
+    def collision(self, particle2, periodic_dim=None):
         """
         Détection de collision avec une autre particule
 
         Arguments:
             particle2 {Particle} -- Autre particule
 
+        Keyword Arguments:
+            periodic_dim {float} -- si défini : environnement périodique de côté 2*periodic_dim,
+                                    l'écart entre les particules est pris à l'image minimale (default: {None})
+
         Returns:
             bool -- True si collision, False sinon
             float -- Date relative de la collision, 0 sinon
@@ -70,14 +92,15 @@ class Particle:
         vy1 = self.vy
         vx2 = particle2.vx
         vy2 = particle2.vy
-        x1 = self.x
-        y1 = self.y
-        x2 = particle2.x
-        y2 = particle2.y
+        dx = particle2.x - self.x
+        dy = particle2.y - self.y
+        if periodic_dim is not None:
+            dx = minimum_image(dx, periodic_dim)
+            dy = minimum_image(dy, periodic_dim)
 
         try:
-            tx = (x2 - x1) / (vx1 - vx2)
-            ty = (y2 - y1) / (vy1 - vy2)
+            tx = dx / (vx1 - vx2)
+            ty = dy / (vy1 - vy2)
         except ZeroDivisionError:
             return False, 0
 
@@ -100,6 +123,181 @@ class Particle:
         self.vy = speed * sin(new_theta)
 
 
+class Event(namedtuple("Event", ["time", "x", "y", "vx", "vy", "kind"])):
+    """
+    Évènement d'une simulation : date, position et vitesse de la grosse particule
+    juste après l'évènement.
+
+    Types d'évènements (kind) :
+        "start" -- état initial
+        "collision" -- grosse collision
+        "no_collision" -- étape sans collision (modèle 1)
+        "small_collision" -- collision entre deux petites particules (modèle 3)
+        "dsmc" -- pas de temps des petites collisions tirées par DSMC (modèle 3, option collision_rate)
+        "advance" -- avance sans collision jusqu'à l'horizon de détection (environnement périodique ou mobile)
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_particle(cls, time, particle, kind):
+        """
+        Arguments:
+            time {float} -- date de l'évènement
+            particle {Particle} -- grosse particule
+            kind {str} -- type d'évènement
+
+        Returns:
+            Event -- évènement
+        """
+        return cls(time, particle.x, particle.y, particle.vx, particle.vy, kind)
+
+    def particle(self, epsilon_time):
+        """
+        Arguments:
+            epsilon_time {float} -- précision pour la détection des collisions
+
+        Returns:
+            Particle -- grosse particule au moment de l'évènement
+        """
+        particle = Particle(self.x, self.y, 0, 0, epsilon_time)
+        particle.vx = self.vx
+        particle.vy = self.vy
+        return particle
+
+
+class Streams:
+    """
+    Flux aléatoires d'une simulation :
+    - angle : angles de déviation de la grosse particule après chaque collision,
+    - bath : tout le reste (environnement, régénérations, déviations des petites particules).
+
+    Sans graine, les deux flux sont le générateur global du module random (comportement par défaut
+    des simulations). Avec une graine, chaque flux a son propre générateur : deux simulations
+    de même graine (modèles ou paramètres différents) partagent la suite des angles de déviation,
+    quel que soit le nombre de tirages consommés par l'environnement (nombres aléatoires communs).
+    """
+    def __init__(self, seed=None, antithetic=False, sobol=False):
+        """
+        Keyword Arguments:
+            seed {int} -- graine des flux (default: {None}, générateur global)
+            antithetic {bool} -- si True : angles antithétiques, chaque tirage u est remplacé par 1 - u (default: {False})
+            sobol {bool} -- si True : environnements initiaux tirés dans une suite de Sobol brouillée,
+                            nécessite scipy (default: {False})
+        """
+        if seed is None:
+            self._angle = random.random
+            self._bath = random.random
+        else:
+            self._angle = random.Random(str(seed) + "-angle").random
+            self._bath = random.Random(str(seed) + "-bath").random
+        self.antithetic = antithetic
+        self.sobol = sobol
+
+    def angle(self):
+        """
+        Returns:
+            float -- tirage uniforme dans [0, 1] pour un angle de déviation de la grosse particule
+        """
+        u = self._angle()
+        if self.antithetic:
+            return 1 - u
+        return u
+
+    def bath(self):
+        """
+        Returns:
+            float -- tirage uniforme dans [0, 1) pour l'environnement
+        """
+        return self._bath()
+
+    def uniforms(self):
+        """
+        Returns:
+            (float, float, float) -- trois tirages uniformes pour générer une petite particule
+        """
+        return self._bath(), self._bath(), self._bath()
+
+    def initial(self, n):
+        """
+        Tirages pour générer un environnement de n particules
+
+        Arguments:
+            n {int} -- nombre de particules
+
+        Returns:
+            (float, float, float) list -- trois tirages uniformes par particule
+        """
+        if not self.sobol:
+            return [self.uniforms() for _ in range(n)]
+        try:
+            from scipy.stats import qmc
+        except ImportError:
+            raise ImportError("L'option sobol nécessite scipy")
+        # Brouillage tiré dans le flux de l'environnement : suites indépendantes d'un environnement à l'autre
+        moteur = qmc.Sobol(d=3, scramble=True, seed=int(self._bath() * 2**32))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")     # n n'est pas forcément une puissance de 2
+            return [tuple(point) for point in moteur.random(n).tolist()]
+
+
+DEFAULT_STREAMS = Streams()
+
+
+def radial_index(u, radius):
+    """
+    Index radial d'un environnement en disque : particules triées par distance croissante au centre,
+    regroupées en couronnes d'environ sqrt(n) particules
+
+    Arguments:
+        u {float list} -- carrés des distances des particules au centre, divisés par radius ** 2
+        radius {float} -- rayon du disque
+
+    Returns:
+        (float, int list) list -- pour chaque couronne, par distance croissante : distance au centre de sa
+                                  particule la plus proche et indices de ses particules
+    """
+    ordre = sorted(range(len(u)), key=u.__getitem__)
+    taille = max(1, int(sqrt(len(u))))
+    return [(radius * sqrt(u[ordre[k]]), ordre[k:k + taille]) for k in range(0, len(u), taille)]
+
+
+def first_collision(collision, nb_particles, t_max, index=None, relative_speed=None, epsilon_time=0):
+    """
+    Première collision de la grosse particule, placée au centre du disque, avec les particules d'un environnement.
+    Avec un index radial, les particules sont visitées par distance d croissante et la recherche s'arrête dès
+    que la borne inférieure des dates de collision d / (v + V) - epsilon_time (égalité à epsilon_time près des
+    dates selon x et y) de la couronne suivante dépasse la meilleure date trouvée. Le résultat est celui d'un
+    parcours complet : date minimale, et à égalité la particule de plus grand indice.
+
+    Arguments:
+        collision {function} -- indice i -> (bool, float) : collision avec la particule i et date relative
+        nb_particles {int} -- nombre de particules
+        t_max {float} -- date maximale de collision
+
+    Keyword Arguments:
+        index {list} -- index radial (voir radial_index) (default: {None}, parcours complet)
+        relative_speed {float} -- majorant de la vitesse relative v + V (si index) (default: {None})
+        epsilon_time {float} -- précision pour la détection des collisions (default: {0})
+
+    Returns:
+        int -- indice de la particule percutée, -1 si aucune collision
+        float -- date relative de la collision, t_max si aucune collision
+    """
+    if index is None:
+        index = [(0, range(nb_particles))]
+    t_min = t_max
+    i_argmin = -1
+    for rayon, indices in index:
+        if rayon and rayon / relative_speed - epsilon_time > t_min:
+            break
+        for i in indices:
+            collision_i, t = collision(i)
+            if collision_i and (t < t_min or (t == t_min and i > i_argmin)):
+                t_min = t
+                i_argmin = i
+    return i_argmin, t_min
+
+
 # ---------------------------------------------------------------------------- #
 #                                 Outils finaux                                #
 # ---------------------------------------------------------------------------- #
@@ -1,6 +1,7 @@
+import itertools
 import math
-import pandas as pd
-from matplotlib import pyplot as plt
+
+import numpy as np
 
 
 def lpm(X, Y):
@@ -17,6 +18,119 @@ def lpm(X, Y):
     return S / (len(X) - 1)
 
 
+class RaggedTrajectories():
+    """
+    Collection de trajectoires de longueurs différentes, stockées bout à bout.
+
+    Attributs :
+        x {np.ndarray} : abscisses de toutes les trajectoires, concaténées
+        y {np.ndarray} : ordonnées de toutes les trajectoires, concaténées
+        lengths {np.ndarray} : nombre de points de chaque trajectoire
+        offsets {np.ndarray} : position du premier point de chaque
+        trajectoire dans x et y
+
+    Les mesures sont calculées pour toutes les trajectoires à la fois par des
+    réductions par segment, sans boucle Python sur les trajectoires. Le
+    premier point de chaque trajectoire est sa position initiale, les
+    suivants sont ses collisions.
+    """
+    def __init__(self, x, y, lengths):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.offsets = np.cumsum(self.lengths) - self.lengths
+        assert len(self.x) == len(self.y) == self.lengths.sum(), \
+            "Les longueurs ne correspondent pas aux coordonnées"
+        # indice de la trajectoire de chaque point
+        self.ids = np.repeat(np.arange(len(self.lengths)), self.lengths)
+
+    @classmethod
+    def from_lists(cls, LX, LY):
+        """
+        Construit la collection à partir des listes d'abscisses LX et
+        d'ordonnées LY de chaque simulation.
+        """
+        lengths = np.fromiter(map(len, LX), dtype=np.int64, count=len(LX))
+        total = int(lengths.sum())
+        x = np.fromiter(itertools.chain.from_iterable(LX), dtype=np.float64, count=total)
+        y = np.fromiter(itertools.chain.from_iterable(LY), dtype=np.float64, count=total)
+        return cls(x, y, lengths)
+
+    @classmethod
+    def from_arena(cls, arena):
+        """
+        Construit la collection à partir des trajectoires d'une arène (voir
+        arena.EnsembleArena), remises dans l'ordre des simulations par un seul
+        indiçage.
+        """
+        lengths = np.asarray(arena.lengths, dtype=np.int64)
+        debuts = np.cumsum(lengths) - lengths
+        indices = np.arange(lengths.sum()) + np.repeat(np.asarray(arena.offsets) - debuts, lengths)
+        return cls(arena.coordonnees[1, indices], arena.coordonnees[2, indices], lengths)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def trajectory(self, i):
+        """
+        Renvoie les abscisses et ordonnées de la trajectoire i (vues, sans
+        copie).
+        """
+        debut = self.offsets[i]
+        return self.x[debut:debut + self.lengths[i]], self.y[debut:debut + self.lengths[i]]
+
+    def nb_collisions(self):
+        """
+        Renvoie le nombre de collisions de chaque trajectoire.
+        """
+        return np.maximum(self.lengths - 1, 0)
+
+    def _par_collision(self, sommes):
+        nb = self.nb_collisions()
+        resultat = np.full(len(self), np.nan)
+        np.divide(sommes, nb, out=resultat, where=nb > 0)
+        return resultat
+
+    def lpms(self):
+        """
+        Renvoie le libre parcours moyen de chaque trajectoire (nan si aucune
+        collision).
+        """
+        longueurs = np.sqrt(np.diff(self.x)**2 + np.diff(self.y)**2)
+        # segments entre deux points d'une même trajectoire
+        interieurs = self.ids[1:] == self.ids[:-1]
+        sommes = np.bincount(self.ids[1:][interieurs], weights=longueurs[interieurs],
+                             minlength=len(self))
+        return self._par_collision(sommes)
+
+    def distances(self):
+        """
+        Renvoie la distance moyenne à la position initiale de chaque
+        trajectoire et la distance maximale atteinte (nan si aucune
+        collision).
+        """
+        non_vides = self.lengths > 0
+        debuts = self.offsets[non_vides]
+        origine = np.zeros(len(self), dtype=np.int64)
+        origine[non_vides] = debuts
+        d = np.sqrt((self.x - self.x[origine[self.ids]])**2 + (self.y - self.y[origine[self.ids]])**2)
+        d_moy = self._par_collision(np.bincount(self.ids, weights=d, minlength=len(self)))
+        d_max = np.full(len(self), np.nan)
+        if debuts.size:
+            d_max[non_vides] = np.maximum.reduceat(d, debuts)
+        d_max[self.nb_collisions() == 0] = np.nan
+        return d_moy, d_max
+
+    def stats(self):
+        """
+        Renvoie un dictionnaire des mesures de chaque trajectoire : lpm,
+        distance moyenne, distance max et nombre de collisions.
+        """
+        d_moy, d_max = self.distances()
+        return {"lpm": self.lpms(), "Distance moyenne": d_moy,
+                "Distance max": d_max, "Nb collisions": self.nb_collisions()}
+
+
 def lpms(LX, LY):
     """
     Renvoie la liste des lpm de chacune des simulations.
@@ -26,10 +140,7 @@ def lpms(LX, LY):
     LY est une liste contenant les listes des ordonnées des collisions de
     chaque simulation.
     """
-    LPM = []
-    for i in range(len(LX)):
-        LPM.append(lpm(LX[i], LY[i]))
-    return LPM
+    return RaggedTrajectories.from_lists(LX, LY).lpms().tolist()
 
 
 def distance(X, Y):
@@ -60,13 +171,8 @@ def distances(LX, LY):
     LY est une liste contenant les listes des ordonnées des collisions de
     chaque simulation.
     """
-    DMOY = []
-    DMAX = []
-    for i in range(len(LX)):
-        d_moy, d_max = distance(LX[i], LY[i])
-        DMOY.append(d_moy)
-        DMAX.append(d_max)
-    return DMOY, DMAX
+    DMOY, DMAX = RaggedTrajectories.from_lists(LX, LY).distances()
+    return DMOY.tolist(), DMAX.tolist()
 
 
 def nb_collisions(LX, LY):
@@ -79,10 +185,7 @@ def nb_collisions(LX, LY):
     LY est une liste contenant les listes des ordonnées des collisions de
     chaque simulation.
     """
-    N = []
-    for i in range(len(LX)):
-        N.append(len(LX[i])-1)
-    return N
+    return (np.fromiter(map(len, LX), dtype=np.int64, count=len(LX)) - 1).tolist()
 
 
 def statsSimulation(X, Y, verbose=False):
@@ -105,15 +208,16 @@ def statsSimulations(LX, LY, boxes=False, verbose=False):
     chaque simulation.
     LY est une liste contenant les listes des ordonnées des collisions de
     chaque simulation.
+
+    Nécessite pandas (et matplotlib si boxes=True), importés seulement ici.
     """
-    LPM = lpms(LX, LY)
-    DMOY, DMAX = distances(LX, LY)
-    Nb = nb_collisions(LX, LY)
-    df = pd.DataFrame({"lpm": LPM, "Distance moyenne": DMOY,
-                      "Distance max": DMAX, "Nb collisions": Nb})
+    import pandas as pd
+
+    df = pd.DataFrame(RaggedTrajectories.from_lists(LX, LY).stats())
     if verbose:
-        print(stats_des)
+        print(df.describe())
     if boxes:
-        df.boxplot(column=["lpm", "Distance moyenne", "Distance maximale"])
+        from matplotlib import pyplot as plt
+        df.boxplot(column=["lpm", "Distance moyenne", "Distance max"])
         plt.show()
     return df
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Ensembles à arrêt séquentiel : les simulations sont lancées par lots jusqu'à ce que la
+précision visée soit atteinte pour chaque mesure, ou que le budget soit épuisé.
+
+La précision d'une mesure est la demi-largeur relative de l'intervalle de confiance de sa
+moyenne : z * écart type / sqrt(n) / |moyenne|. Après chaque lot, la taille du lot suivant est
+extrapolée de la précision courante (la demi-largeur décroît en 1 / sqrt(n)) : les mesures qui
+convergent vite ne coûtent que quelques lots, les autres reçoivent le calcul nécessaire.
+"""
+import multiprocessing
+import statistics
+from math import ceil, inf, isnan, sqrt
+
+from .ensemble import _run_simulation, new_seeds
+
+# Précisions visées par défaut (demi-largeurs relatives)
+CIBLES = {"lpm": 0.05, "Distance moyenne": 0.05, "Fréquence": 0.05}
+
+# ---------------------------------------------------------------------------- #
+#                                   Précision                                  #
+# ---------------------------------------------------------------------------- #
+
+
+def precision(records, mesures, confidence=0.95):
+    """
+    Demi-largeur relative de l'intervalle de confiance de la moyenne de chaque mesure
+
+    Arguments:
+        records {dict list} -- enregistrements (voir ensemble.run_simulation)
+        mesures {str list} -- colonnes des enregistrements
+
+    Keyword Arguments:
+        confidence {float} -- niveau de confiance (default: {0.95})
+
+    Returns:
+        dict -- demi-largeur relative de chaque mesure (inf si moins de deux simulations abouties
+                ou moyenne nulle), les simulations interrompues (mesure nan) sont ignorées
+    """
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    resultat = {}
+    for mesure in mesures:
+        valeurs = [record[mesure] for record in records if not isnan(record[mesure])]
+        if len(valeurs) < 2 or statistics.mean(valeurs) == 0:
+            resultat[mesure] = inf
+        else:
+            resultat[mesure] = z * statistics.stdev(valeurs) / sqrt(len(valeurs)) / abs(statistics.mean(valeurs))
+    return resultat
+
+
+def _taille_lot(records, precisions, targets, batch):
+    """
+    Nombre de simulations supplémentaires nécessaires d'après la précision courante
+
+    Returns:
+        int -- taille du prochain lot (au moins batch)
+    """
+    n = len(records)
+    n_ok = sum(record["Statut"] == "ok" for record in records)
+    if n_ok < 2 or inf in precisions.values():
+        return batch
+    # Simulations abouties nécessaires, puis simulations à lancer compte tenu des interruptions
+    besoin = max(n_ok * (precisions[mesure] / cible)**2 for mesure, cible in targets.items())
+    return max(batch, ceil((besoin - n_ok) * n / n_ok))
+
+
+# ---------------------------------------------------------------------------- #
+#                                   Ensembles                                  #
+# ---------------------------------------------------------------------------- #
+
+
+def run_until(modele, params, targets=None, batch=16, budget=1024, min_runs=8, confidence=0.95, seed=None,
+              processes=None, variance=None):
+    """
+    Calcul d'un ensemble de simulations jusqu'à la précision visée pour chaque mesure
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+
+    Keyword Arguments:
+        targets {dict} -- demi-largeur relative visée pour chaque mesure (default: {None}, CIBLES)
+        batch {int} -- taille minimale d'un lot (default: {16})
+        budget {int} -- nombre maximal de simulations (default: {1024})
+        min_runs {int} -- nombre minimal de simulations avant le premier test d'arrêt (default: {8})
+        confidence {float} -- niveau de confiance des intervalles (default: {0.95})
+        seed {int} -- graine de la première simulation, les suivantes ont les graines seed + 1, seed + 2...
+                      (default: {None}, graines aléatoires)
+        processes {int} -- nombre de processus, 1 pour un calcul séquentiel (default: {None}, tous les cœurs)
+        variance {dict} -- options des flux aléatoires séparés (voir ensemble.run_simulation) (default: {None})
+
+    Returns:
+        dict -- "records" : enregistrements des simulations, dans l'ordre des graines,
+                "precision" : demi-largeur relative atteinte pour chaque mesure,
+                "targets" : précisions visées,
+                "converged" : True si toutes les précisions visées sont atteintes, False si le budget est épuisé,
+                "batches" : tailles des lots lancés
+    """
+    if targets is None:
+        targets = CIBLES
+    assert budget >= 2, "Le budget doit permettre au moins deux simulations"
+    records = []
+    lots = []
+    taille = min(max(batch, min_runs), budget)
+
+    pool = None if processes == 1 else multiprocessing.Pool(processes=processes)
+    try:
+        while True:
+            if seed is None:
+                seeds = new_seeds(taille)
+            else:
+                seeds = [seed + len(records) + k for k in range(taille)]
+            taches = [(modele, params, graine, False, variance) for graine in seeds]
+            if pool is None:
+                records.extend(_run_simulation(tache) for tache in taches)
+            else:
+                records.extend(pool.map(_run_simulation, taches))
+            lots.append(taille)
+
+            precisions = precision(records, targets, confidence)
+            converged = all(precisions[mesure] <= cible for mesure, cible in targets.items())
+            if converged or len(records) >= budget:
+                break
+            taille = min(_taille_lot(records, precisions, targets, batch), budget - len(records))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return {"records": records,
+            "precision": precisions,
+            "targets": dict(targets),
+            "converged": converged,
+            "batches": lots}
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Serveur local de simulations : un unique pool de processus persistant, partagé par
+tous les scripts et notebooks d'une machine.
+
+Les clients se connectent par un socket Unix (ou TCP sur localhost) et envoient des
+travaux (une simulation ou un ensemble). Chaque simulation d'un travail est une tâche
+placée dans une file à priorités :
+- une priorité plus petite passe avant,
+- à priorité égale, les tâches des différents travaux sont alternées (la k-ième
+  simulation de chaque travail passe avant les (k+1)-ièmes), pour un partage équitable.
+Les résultats sont renvoyés au fil de l'eau avec l'avancement du travail.
+
+Protocole : une ligne JSON par message.
+Requête : {"modele": "2", "params": {...}, "n": 10, "seeds": [...], "priority": 0}
+          (seeds facultatif, une graine par simulation)
+Réponses : {"type": "result", "index": i, "record": {...}, "done": k, "total": n} par simulation,
+           puis {"type": "done", "total": n} (ou {"type": "error", "message": ...}).
+
+Lancement : python -m brownian.server --socket /tmp/brownian.sock
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .ensemble import MODELES, _run_simulation, new_seeds
+
+# ---------------------------------------------------------------------------- #
+#                                    Serveur                                   #
+# ---------------------------------------------------------------------------- #
+
+
+class _Job:
+    """
+    Travail d'un client : ses simulations restant à calculer et sa file de réponses
+    """
+    def __init__(self, modele, params, seeds):
+        self.modele = modele
+        self.params = params
+        self.seeds = seeds
+        self.done = 0
+        self.cancelled = False
+        self.responses = asyncio.Queue()
+
+
+class JobServer:
+    """
+    Serveur asyncio de simulations adossé à un pool de processus persistant
+    """
+    def __init__(self, path=None, host="127.0.0.1", port=0, processes=None):
+        """
+        Keyword Arguments:
+            path {str} -- chemin du socket Unix (default: {None}, TCP sur host:port)
+            host {str} -- adresse d'écoute en TCP (default: {"127.0.0.1"})
+            port {int} -- port d'écoute en TCP, 0 pour un port libre (default: {0})
+            processes {int} -- nombre de processus du pool (default: {None}, tous les cœurs)
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+        self.processes = processes or os.cpu_count()
+        self.tasks = None
+        self.executor = None
+        self.server = None
+        self.workers = []
+        self.counter = itertools.count()
+
+    async def start(self):
+        """
+        Démarrage du pool, des répartiteurs et de l'écoute des clients
+        """
+        self.tasks = asyncio.PriorityQueue()
+        # Les processus sont créés une seule fois, au démarrage du serveur
+        self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        self.workers = [asyncio.ensure_future(self._worker()) for _ in range(self.processes)]
+        if self.path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """
+        Arrêt de l'écoute, des répartiteurs et du pool
+        """
+        self.server.close()
+        await self.server.wait_closed()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.executor.shutdown()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    def submit(self, modele, params, seeds, priority=0):
+        """
+        Mise en file des simulations d'un travail
+
+        Arguments:
+            modele {str} -- "1", "1.1", "2" ou "3"
+            params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+            seeds {int list} -- une graine par simulation
+
+        Keyword Arguments:
+            priority {int} -- priorité du travail, la plus petite passe avant (default: {0})
+
+        Returns:
+            _Job -- travail, dont la file responses reçoit les réponses
+        """
+        job = _Job(modele, params, seeds)
+        for index in range(len(seeds)):
+            self.tasks.put_nowait((priority, index, next(self.counter), job))
+        if not seeds:
+            job.responses.put_nowait({"type": "done", "total": 0})
+        return job
+
+    async def _worker(self):
+        """
+        Répartiteur : envoie une tâche à la fois au pool (il y a un répartiteur par processus)
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            _, index, _, job = await self.tasks.get()
+            if job.cancelled:
+                continue
+            try:
+                record = await loop.run_in_executor(self.executor, _run_simulation,
+                                                    (job.modele, job.params, job.seeds[index]))
+            except Exception as erreur:
+                job.cancelled = True
+                job.responses.put_nowait({"type": "error", "message": repr(erreur)})
+                continue
+            job.done += 1
+            total = len(job.seeds)
+            job.responses.put_nowait({"type": "result", "index": index, "record": record,
+                                      "done": job.done, "total": total})
+            if job.done == total:
+                job.responses.put_nowait({"type": "done", "total": total})
+
+    async def _handle(self, reader, writer):
+        """
+        Connexion d'un client : un travail par requête, réponses envoyées au fil de l'eau
+        """
+        job = None
+        try:
+            while True:
+                ligne = await reader.readline()
+                if not ligne:
+                    break
+                try:
+                    requete = json.loads(ligne)
+                    modele = requete["modele"]
+                    if modele not in MODELES:
+                        raise ValueError("Modèle inconnu : " + str(modele))
+                    seeds = requete.get("seeds")
+                    if seeds is None:
+                        seeds = new_seeds(requete.get("n", 1))
+                    if len(seeds) != requete.get("n", len(seeds)):
+                        raise ValueError("Il faut une graine par simulation")
+                except (ValueError, KeyError) as erreur:
+                    await _send(writer, {"type": "error", "message": repr(erreur)})
+                    continue
+
+                job = self.submit(modele, requete.get("params", {}), seeds, requete.get("priority", 0))
+                while True:
+                    reponse = await job.responses.get()
+                    await _send(writer, reponse)
+                    if reponse["type"] in ("done", "error"):
+                        break
+                job = None
+        except ConnectionError:
+            pass
+        finally:
+            # Client parti : ses simulations restantes sont abandonnées
+            if job is not None:
+                job.cancelled = True
+            writer.close()
+
+
+async def _send(writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+# ---------------------------------------------------------------------------- #
+#                                    Client                                    #
+# ---------------------------------------------------------------------------- #
+
+
+class Client:
+    """
+    Client asyncio du serveur de simulations
+    """
+    def __init__(self, path=None, host="127.0.0.1", port=None):
+        """
+        Keyword Arguments:
+            path {str} -- chemin du socket Unix du serveur (default: {None}, TCP sur host:port)
+            host {str} -- adresse du serveur en TCP (default: {"127.0.0.1"})
+            port {int} -- port du serveur en TCP (default: {None})
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+
+    async def _connect(self):
+        if self.path is not None:
+            return await asyncio.open_unix_connection(self.path)
+        return await asyncio.open_connection(self.host, self.port)
+
+    async def stream(self, modele, params, n=1, seeds=None, priority=0):
+        """
+        Envoi d'un travail et lecture des réponses au fil de l'eau
+
+        Arguments:
+            modele {str} -- "1", "1.1", "2" ou "3"
+            params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+
+        Keyword Arguments:
+            n {int} -- nombre de simulations (default: {1})
+            seeds {int list} -- graines des simulations (default: {None}, graines aléatoires)
+            priority {int} -- priorité du travail, la plus petite passe avant (default: {0})
+
+        Raises:
+            RuntimeError: erreur renvoyée par le serveur
+
+        Yields:
+            dict -- réponses "result" (voir le protocole en tête du module)
+        """
+        reader, writer = await self._connect()
+        try:
+            await _send(writer, {"modele": modele, "params": params, "n": n, "seeds": seeds,
+                                 "priority": priority})
+            while True:
+                ligne = await reader.readline()
+                if not ligne:
+                    raise RuntimeError("Connexion interrompue par le serveur")
+                reponse = json.loads(ligne)
+                if reponse["type"] == "error":
+                    raise RuntimeError(reponse["message"])
+                if reponse["type"] == "done":
+                    return
+                yield reponse
+        finally:
+            writer.close()
+
+    async def run_ensemble(self, modele, params, n, seeds=None, priority=0, progress=None):
+        """
+        Calcul de n simulations par le serveur
+
+        Arguments:
+            modele {str} -- "1", "1.1", "2" ou "3"
+            params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+            n {int} -- nombre de simulations
+
+        Keyword Arguments:
+            seeds {int list} -- graines des simulations (default: {None}, graines aléatoires)
+            priority {int} -- priorité du travail, la plus petite passe avant (default: {0})
+            progress {callable} -- appelée avec (nombre calculé, total) après chaque simulation (default: {None})
+
+        Returns:
+            dict list -- enregistrements des simulations, dans l'ordre des graines (voir ensemble.run_ensemble)
+        """
+        records = [None] * n
+        async for reponse in self.stream(modele, params, n, seeds, priority):
+            records[reponse["index"]] = reponse["record"]
+            if progress is not None:
+                progress(reponse["done"], reponse["total"])
+        return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local de simulations brownian")
+    parser.add_argument("--socket", help="chemin du socket Unix")
+    parser.add_argument("--host", default="127.0.0.1", help="adresse d'écoute en TCP")
+    parser.add_argument("--port", type=int, default=8765, help="port d'écoute en TCP")
+    parser.add_argument("--processes", type=int, help="nombre de processus du pool")
+    args = parser.parse_args()
+
+    server = JobServer(path=args.socket, host=args.host, port=args.port, processes=args.processes)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
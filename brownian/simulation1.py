@@ -1,8 +1,8 @@
-from .outils import Particle, show_listparticles_point, show_listparticles_vector
-from random import random
-import matplotlib.pyplot as plt
+from .outils import Particle, Event, DEFAULT_STREAMS, radial_index, first_collision
+from .affichage import LiveDisplay
 import copy
 from math import pi, sqrt, cos, sin
+import numpy as np
 
 # ---------------------------------------------------------------------------- #
 #                             Simulation de type 1                             #
@@ -10,7 +10,7 @@ from math import pi, sqrt, cos, sin
 infini = float('inf')
 
 
-def random_particle(radius, speed, epsilon_time):
+def random_particle(radius, speed, epsilon_time, uniforms=None):
     """
     Génération aléatoire d'une particule dans un disque
 
@@ -19,23 +19,54 @@ def random_particle(radius, speed, epsilon_time):
         speed {float} -- vitesse de la particule
         epsilon_time {float} -- précision pour la détection de collision
 
+    Keyword Arguments:
+        uniforms {(float, float, float)} -- tirages uniformes à utiliser (default: {None}, générateur global)
+
     Returns:
         Particle -- particule générée
     """
-    r = random()
-    theta = 2 * pi * random()
+    if uniforms is None:
+        uniforms = DEFAULT_STREAMS.uniforms()
+    r, u_theta, u_speed = uniforms
+    theta = 2 * pi * u_theta
     x = radius * sqrt(r) * cos(theta)
     y = radius * sqrt(r) * sin(theta)
-    theta_speed = 2 * pi * random()
+    theta_speed = 2 * pi * u_speed
 
     return Particle(x, y, speed, theta_speed, epsilon_time)
 
 
+def optimal_time_interval(rate, particles_per_time2, step_overhead, time_interval_min, time_interval_max, nb_points=200):
+    """
+    Intervalle de temps minimisant le coût de calcul par unité de temps simulé.
+
+    Avec des collisions de taux rate (temps de collision exponentiel), une étape d'horizon h
+    fait avancer le temps de (1 - exp(-rate*h)) / rate en moyenne, et coûte
+    step_overhead + particles_per_time2 * h**2 (nombre de particules du disque).
+
+    Arguments:
+        rate {float} -- taux de grosses collisions estimé
+        particles_per_time2 {float} -- nombre de particules du disque divisé par h**2
+        step_overhead {float} -- coût fixe d'une étape, en équivalent nombre de particules
+        time_interval_min {float} -- borne inférieure de h
+        time_interval_max {float} -- borne supérieure de h
+
+    Keyword Arguments:
+        nb_points {int} -- nombre de valeurs de h testées (échelle logarithmique) (default: {200})
+
+    Returns:
+        float -- intervalle de temps optimal dans [time_interval_min, time_interval_max]
+    """
+    h = np.geomspace(time_interval_min, time_interval_max, nb_points)
+    cout = (step_overhead + particles_per_time2 * h**2) * rate / -np.expm1(-rate * h)
+    return float(h[np.argmin(cout)])
+
+
 class Workzone():
     """
     Environnement : ensemble de particules dans un disque
     """
-    def __init__(self, particle_number, radius, speed, epsilon_time):
+    def __init__(self, particle_number, radius, speed, epsilon_time, streams=None, index=False):
         """
         Définition d'un ensemble de particules aléatoires dans un disque
 
@@ -44,9 +75,97 @@ class Workzone():
             radius {float} -- rayon du disque
             speed {float} -- vitesse des particules
             epsilon_time {float} -- précision pour la détection des collisions
+
+        Keyword Arguments:
+            streams {Streams} -- flux aléatoires (default: {None}, générateur global)
+            index {bool} -- si True : construction de l'index radial des particules (default: {False})
+
+        Sauvegarde dans la classe Workzone:
+            self.index {list} -- index radial (voir outils.radial_index), None si index=False
         """
+        if streams is None:
+            streams = DEFAULT_STREAMS
         self.particle_number = particle_number
-        self.particles = [random_particle(radius, speed, epsilon_time) for i in range(particle_number)]
+        self.radius = radius
+        self.speed = speed
+        self.epsilon_time = epsilon_time
+        self.streams = streams
+        tirages = streams.initial(particle_number)
+        self.particles = [random_particle(radius, speed, epsilon_time, uniforms) for uniforms in tirages]
+        # Le premier tirage de chaque particule est le carré de sa distance au centre divisé par radius ** 2
+        self.index = radial_index([uniforms[0] for uniforms in tirages], radius) if index else None
+
+    def radial_index(self):
+        """
+        Returns:
+            list -- index radial des particules autour du centre du disque (voir outils.radial_index)
+        """
+        radius2 = self.radius ** 2
+        return radial_index([(particle.x ** 2 + particle.y ** 2) / radius2 for particle in self.particles], self.radius)
+
+    def shift(self, dx, dy, delta_time, density):
+        """
+        Environnement de l'étape suivante, après une étape sans collision : nouveau disque de même
+        rayon centré sur la grosse particule, qui s'est déplacée de (dx, dy) pendant delta_time.
+
+        Les particules de l'ancien disque, déjà avancées de delta_time, sont conservées si elles sont
+        dans le nouveau disque : le bain étant un champ de Poisson ouvert à vitesses indépendantes,
+        elles restent un échantillon valide de la partie du nouveau disque issue de l'ancien.
+        On complète uniquement par les particules qui proviennent de l'extérieur de l'ancien disque.
+        Pour une vitesse d'angle theta, ce sont les particules du croissant : nouveau disque privé de
+        l'ancien disque translaté de delta_time * vitesse (centre c, à la distance d de l'origine).
+        Dans le repère d'axe c, la tranche d'ordonnée y du croissant est [-w, -w + min(2w, d)] avec
+        w = sqrt(R² - y²) : des triplets (theta, y, u) uniformes dans [0, 2pi) x [-R, R] x [0, d_max]
+        sont acceptés si u < min(2w, d), en x = -w + u (amincissement d'un champ de Poisson).
+        Avec R = (v + V) * delta_time, cela fait 2/pi des tirages d'un nouveau disque complet.
+
+        Arguments:
+            dx {float} -- déplacement en x de la grosse particule (centre du disque)
+            dy {float} -- déplacement en y de la grosse particule (centre du disque)
+            delta_time {float} -- durée de l'étape écoulée
+            density {float} -- densité surfacique de petites particules
+        """
+        radius, radius2 = self.radius, self.radius ** 2
+        # Particules conservées, en coordonnées relatives au nouveau centre
+        particles = []
+        for particle in self.particles:
+            x = particle.x - dx
+            y = particle.y - dy
+            if x * x + y * y <= radius2:
+                particle.x = x
+                particle.y = y
+                particles.append(particle)
+
+        # Particules venant de l'extérieur de l'ancien disque
+        reach = self.speed * delta_time
+        d_max = reach + sqrt(dx ** 2 + dy ** 2)
+        uniforms = self.streams.uniforms
+        for _ in range(int(density * 2 * radius * d_max)):
+            u_theta, u_y, u = uniforms()
+            y = radius * (2 * u_y - 1)
+            w = sqrt(radius2 - y * y)
+            u *= d_max
+            if u >= 2 * w:
+                continue
+            theta = 2 * pi * u_theta
+            # Centre de l'ancien disque translaté
+            cos_theta, sin_theta = cos(theta), sin(theta)
+            cx = reach * cos_theta - dx
+            cy = reach * sin_theta - dy
+            d = sqrt(cx * cx + cy * cy)
+            if u < d:
+                x = u - w
+                cx /= d
+                cy /= d
+                particle = Particle(x * cx - y * cy, x * cy + y * cx, 0, 0, self.epsilon_time)
+                particle.vx = self.speed * cos_theta
+                particle.vy = self.speed * sin_theta
+                particles.append(particle)
+
+        self.particles = particles
+        self.particle_number = len(particles)
+        if self.index is not None:
+            self.index = self.radial_index()
 
     def workzone_update_time(self, delta_time):
         """
@@ -60,7 +179,7 @@ class Workzone():
 
 
 class Simulation1:
-    def __init__(self, nb_max_collisions=infini, duree=infini, density=10**4, speed_BP_init=1, theta_BP_init=-pi / 4, speed=1, time_interval=0.10, epsilon_time=0.25):
+    def __init__(self, nb_max_collisions=infini, duree=infini, density=10**4, speed_BP_init=1, theta_BP_init=-pi / 4, speed=1, time_interval=0.10, epsilon_time=0.25, adaptive=False, time_interval_min=None, time_interval_max=None, step_overhead=20, streams=None, incremental=False):
         """
         Définition de l'espace de travail pour une simulation de type 1
 
@@ -73,6 +192,16 @@ class Simulation1:
             speed {float} -- vitesse des petites particules (default: {1})
             time_interval {float} -- intervalle de temps maximal pour une grosse collision (default: {0.10})
             epsilon_time {float} -- précision pour la détection des collisions (default: {0.25})
+            adaptive {bool} -- si True : time_interval est la valeur initiale, ajustée à chaque étape à partir
+                               du taux de collision observé (default: {False})
+            time_interval_min {float} -- borne inférieure de time_interval en mode adaptatif (default: {time_interval / 10})
+            time_interval_max {float} -- borne supérieure de time_interval en mode adaptatif (default: {10 * time_interval})
+            step_overhead {float} -- coût fixe d'une étape en équivalent nombre de particules, utilisé
+                                     pour le choix de time_interval en mode adaptatif (default: {20})
+            streams {Streams} -- flux aléatoires : angles de déviation et environnements (default: {None}, générateur global)
+            incremental {bool} -- si True : après une étape sans collision, le nouvel environnement conserve les
+                                  particules de l'ancien et ne tire que celles venant de l'extérieur de l'ancien
+                                  disque (voir Workzone.shift) (default: {False})
         """
         assert nb_max_collisions != infini or duree != infini, "Choisir un nombre max de grosses collisions ou une durée max"
         if nb_max_collisions != infini:
@@ -91,6 +220,14 @@ class Simulation1:
         self.nb_max_collisions = nb_max_collisions
         self.duree = duree
         self.epsilon_time = epsilon_time
+        self.density = density
+
+        self.adaptive = adaptive
+        self.time_interval_min = time_interval / 10 if time_interval_min is None else time_interval_min
+        self.time_interval_max = 10 * time_interval if time_interval_max is None else time_interval_max
+        self.step_overhead = step_overhead
+        self.streams = DEFAULT_STREAMS if streams is None else streams
+        self.incremental = incremental
 
         self.title = "Simulation de type 1"
 
@@ -101,123 +238,167 @@ class Simulation1:
         Keyword Arguments:
             show {bool} -- si True : affichage de chaque étape (default: {False})
             vector {bool} -- si True : affichage des vecteurs vitesses (si show=True) (default: {True})
-            pause {float} -- délai entre chaque affichage (si show=True) (default: {1})
+            pause {float} -- délai entre deux rafraîchissements de l'affichage, sans bloquer le calcul (si show=True) (default: {1})
             coeff_affichage {float} -- zoom de l'affichage (si show=True) (default: {1})
 
         Sauvegarde dans la classe Simulation1:
             self.historic_BP {(float, Particle) list} -- historique des temps et de la grosse particule à chaque collision
             self.nb_no_collision {int} -- Nombre d'absences de collision au cours de la simulation
+            self.historic_time_interval {float list} -- intervalle de temps utilisé à chaque étape
         """
-        if show:
-            fig, ax = plt.subplots()
-
-        time = 0
-        nb_collision = 0
+        historic_BP = []
         nb_no_collision = 0     # Nombre d'absences de collision
+        historic_time_interval = []
 
-        # Initialisation de la grosse particule
-        BP = Particle(0, 0, self.speed_BP_init, self.theta_BP_init, self.epsilon_time)
+        for event in self.iter_events(show=show, vector=vector, pause=pause, coeff_affichage=coeff_affichage):
+            if event.kind == "no_collision":
+                nb_no_collision += 1
+            else:
+                # Seulement collision dans historique
+                historic_BP.append((event.time, event.particle(self.epsilon_time)))
+            if event.kind != "start":
+                historic_time_interval.append(self.current_time_interval)
 
-        # Initialisation de l'historique de la grosse particule
-        historic_BP = []
-        historic_BP.append((time, copy.copy(BP)))
+        # Sauvegarde de l'historique de la grosse particule et du nombre d'absence de collision.
+        self.historic_BP = historic_BP
+        self.nb_no_collision = nb_no_collision
+        self.historic_time_interval = historic_time_interval
 
-        # Boucle de calcul des grosses collisions
-        while nb_collision < self.nb_max_collisions and time < self.duree:
-            # Définition d'un nouvel environnement
-            zone = Workzone(self.particle_number, self.radius, self.speed, self.epsilon_time)
-            # Définition de la grosse particule en coordonnées relatives dans cet environnement
-            BP_in_zone = copy.copy(BP)
-            BP_in_zone.x = 0    # Grosse particule à l'origine dans chaque environnement
-            BP_in_zone.y = 0
+    def iter_events(self, show=False, vector=True, pause=1, coeff_affichage=1, endless=False):
+        """
+        Générateur des évènements d'une simulation, calculés au fur et à mesure :
+        un évènement "start", puis un évènement "collision" ou "no_collision" par étape.
+        L'arrêt anticipé de la lecture arrête le calcul.
 
-            # Sauvegarde de la position de la grosse particule
-            x_origin, y_origin = BP.x, BP.y
+        Keyword Arguments:
+            show {bool} -- si True : affichage de chaque étape (default: {False})
+            vector {bool} -- si True : affichage des vecteurs vitesses (si show=True) (default: {True})
+            pause {float} -- délai entre deux rafraîchissements de l'affichage, sans bloquer le calcul (si show=True) (default: {1})
+            coeff_affichage {float} -- zoom de l'affichage (si show=True) (default: {1})
+            endless {bool} -- si True : ignore nb_max_collisions et duree, le calcul s'arrête avec la lecture (default: {False})
 
-            if show:
-                #####
-                ax.clear()
-
-                X = [elem[1].x for elem in historic_BP]
-                Y = [elem[1].y for elem in historic_BP]
-                plt.plot(X, Y, color='red')
-
-                circ = plt.Circle((BP.x, BP.y), radius=self.radius, color='orange', fill=False)
-                ax.add_artist(circ)
-                show_listparticles_vector(ax, zone.particles, 'blue', BP.x, BP.y)
-                show_listparticles_vector(ax, [BP], 'red')
-
-                plt.grid()
-                plt.xlim(-coeff_affichage * self.radius, coeff_affichage * self.radius)
-                plt.ylim(-coeff_affichage * self.radius, coeff_affichage * self.radius)
-                plt.title(self.title + '\nt=' + str(round(time, 4)))
-                plt.draw()
-                plt.pause(pause)
-                #####
-
-            # Calcul de la première collision
-            t_min = self.time_interval
-            i_argmin = -1
-            for i in range(self.particle_number):
-                collision, t = BP_in_zone.collision(zone.particles[i])
-                if collision and t <= t_min:
-                    t_min = t
-                    i_argmin = i
-
-            # Si pas de grosse collision
-            if i_argmin == -1:
-                delta_time = self.time_interval
-                BP.update_time(delta_time)
-                nb_no_collision += 1
+        Yields:
+            Event -- évènement (voir outils.Event)
 
-            # Si grosse collision possible
-            else:
-                nb_collision += 1
-                delta_time = t_min  # Date relative de la collision
-                BP.update_time(delta_time)
+        Sauvegarde dans la classe Simulation1:
+            self.current_time_interval {float} -- intervalle de temps de la dernière étape
+        """
+        if show:
+            display = LiveDisplay(self.title, (-coeff_affichage * self.radius, coeff_affichage * self.radius),
+                                  (-coeff_affichage * self.radius, coeff_affichage * self.radius), pause)
 
-                # Changement de l'angle de la vitesse de la grosse particule
-                new_theta = 2 * pi * random()
-                BP.change_theta(new_theta)
+        time = 0
+        nb_collision = 0
 
-                # Sauvegarde de la grosse particule dans l'historique
-                historic_BP.append((time + delta_time, copy.copy(BP)))   # Seulement collision dans historique
+        # Intervalle de temps de l'étape (constant sauf en mode adaptatif)
+        time_interval = self.time_interval
+        radius = self.radius
+        particle_number = self.particle_number
+        exposure = 0    # Durée totale observée (censurée à time_interval sans collision)
 
-            # Mise à jour du temps et de l'environnement
-            time += delta_time
-            zone.workzone_update_time(delta_time)
+        # Initialisation de la grosse particule
+        BP = Particle(0, 0, self.speed_BP_init, self.theta_BP_init, self.epsilon_time)
+        zone = None
+        kind = "start"
 
+        try:
+            yield Event.from_particle(time, BP, "start")
             if show:
-                ####
-                ax.clear()
+                display.point(BP.x, BP.y)
 
-                X = [elem[1].x for elem in historic_BP]
-                Y = [elem[1].y for elem in historic_BP]
-                plt.plot(X, Y, color='red')
-
-                show_listparticles_point(ax, zone.particles, 'blue', x_origin, y_origin)
+            # Boucle de calcul des grosses collisions
+            while endless or (nb_collision < self.nb_max_collisions and time < self.duree):
+                # Définition d'un nouvel environnement (mis à jour après une étape sans collision en mode incrémental)
+                if self.incremental and kind == "no_collision" and radius == zone.radius:
+                    zone.shift(BP.x - x_origin, BP.y - y_origin, delta_time, self.density)
+                else:
+                    # Index radial utile seulement si la borne d / (v + V) - epsilon_time peut dépasser time_interval
+                    zone = Workzone(particle_number, radius, self.speed, self.epsilon_time, self.streams,
+                                    index=self.epsilon_time < time_interval)
+                # Définition de la grosse particule en coordonnées relatives dans cet environnement
+                BP_in_zone = copy.copy(BP)
+                BP_in_zone.x = 0    # Grosse particule à l'origine dans chaque environnement
+                BP_in_zone.y = 0
+
+                # Sauvegarde de la position de la grosse particule
+                x_origin, y_origin = BP.x, BP.y
+
+                if show:
+                    display.image(time, zone.particles, BP, x_origin, y_origin, vector=vector,
+                                  cercle=(BP.x, BP.y, radius))
+
+                # Calcul de la première collision (par distance croissante si l'environnement est indexé)
+                particles = zone.particles
+                i_argmin, t_min = first_collision(lambda i: BP_in_zone.collision(particles[i]), zone.particle_number,
+                                                  time_interval, zone.index, self.speed_BP_init + self.speed,
+                                                  self.epsilon_time)
+
+                # Si pas de grosse collision
                 if i_argmin == -1:
-                    show_listparticles_point(ax, [BP], 'red', marker='o')
+                    delta_time = time_interval
+                    BP.update_time(delta_time)
+                    kind = "no_collision"
+
+                # Si grosse collision possible
                 else:
-                    show_listparticles_point(ax, [BP], 'fuchsia', marker='*')
-                    circ = plt.Circle((BP.x, BP.y), radius=self.radius * coeff_affichage / 15, color='fuchsia', fill=False)
-                    ax.add_artist(circ)
-
-                plt.grid()
-                plt.xlim(-coeff_affichage * self.radius, coeff_affichage * self.radius)
-                plt.ylim(-coeff_affichage * self.radius, coeff_affichage * self.radius)
-                plt.title(self.title + '\nt=' + str(round(time, 4)))
-                plt.draw()
-                plt.pause(pause)
-                #####
-
-        # print("No collision : ", nb_no_collision)
-        if show:
-            plt.close()
+                    nb_collision += 1
+                    delta_time = t_min  # Date relative de la collision
+                    BP.update_time(delta_time)
+
+                    # Changement de l'angle de la vitesse de la grosse particule
+                    new_theta = 2 * pi * self.streams.angle()
+                    BP.change_theta(new_theta)
+                    kind = "collision"
+
+                # Mise à jour du temps et de l'environnement
+                time += delta_time
+                zone.workzone_update_time(delta_time)
+                self.current_time_interval = time_interval
+
+                if show:
+                    if i_argmin != -1:
+                        display.point(BP.x, BP.y)
+                    # Même environnement, donc même disque, qu'avant l'étape
+                    display.image(time, zone.particles, BP, x_origin, y_origin, collision=i_argmin != -1,
+                                  cercle=(x_origin, y_origin, radius))
+
+                yield Event.from_particle(time, BP, kind)
+
+                # Ajustement de l'intervalle de temps pour l'étape suivante
+                if self.adaptive:
+                    exposure += delta_time
+                    time_interval = self.adapt_time_interval(time_interval, nb_collision, exposure)
+                    radius = (self.speed_BP_init + self.speed) * time_interval
+                    particle_number = int(self.density * pi * (radius ** 2))
+        finally:
+            if show:
+                display.close()
 
-        # Sauvegarde de l'historique de la grosse particule et du nombre d'absence de collision.
-        self.historic_BP = historic_BP
-        self.nb_no_collision = nb_no_collision
+    def adapt_time_interval(self, time_interval, nb_collision, exposure):
+        """
+        Choix de l'intervalle de temps de l'étape suivante en mode adaptatif.
+        Le taux de collision est estimé par maximum de vraisemblance d'une loi exponentielle
+        censurée (nombre de collisions / durée observée), puis time_interval est rapproché de
+        l'optimum de coût (voir optimal_time_interval), d'un facteur 2 au plus par étape.
+
+        Arguments:
+            time_interval {float} -- intervalle de temps de l'étape écoulée
+            nb_collision {int} -- nombre de grosses collisions depuis le début
+            exposure {float} -- durée totale observée depuis le début
+
+        Returns:
+            float -- intervalle de temps de l'étape suivante
+        """
+        if nb_collision == 0:
+            # Aucune collision observée : on élargit le disque
+            new_time_interval = 2 * time_interval
+        else:
+            rate = nb_collision / exposure
+            particles_per_time2 = self.density * pi * (self.speed_BP_init + self.speed) ** 2
+            new_time_interval = optimal_time_interval(rate, particles_per_time2, self.step_overhead,
+                                                      self.time_interval_min, self.time_interval_max)
+            new_time_interval = min(max(new_time_interval, time_interval / 2), 2 * time_interval)
+        return min(max(new_time_interval, self.time_interval_min), self.time_interval_max)
 
     def traj_image(self, coeff_affichage=1):
         """
@@ -227,6 +408,8 @@ class Simulation1:
         Keyword Arguments:
             coeff_affichage {float} -- zoom de l'affichage (default: {1})
         """
+        import matplotlib.pyplot as plt
+
         historic = self.historic_BP
         fig, ax = plt.subplots()
         X = [elem[1].x for elem in historic]
@@ -245,3 +428,4 @@ class Simulation1:
 #     time_interval : le plus faible possible, tout en conservant un nombre faible de no_collision
 #                     le but est d'avoir un disque assez grand pour avoir une grosse collision, mais
 #                     assez faible pour minimiser le temps d'exécution
+#                     (ou adaptive=True pour un ajustement automatique entre time_interval_min et time_interval_max)
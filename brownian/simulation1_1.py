@@ -2,7 +2,7 @@
 import math
 import random
 
-from matplotlib import pyplot as plt
+from .outils import Event, DEFAULT_STREAMS, radial_index, first_collision
 
 # --------------------------------------------------------------------------- #
 #                             Simulation de type 1_1                          #
@@ -24,9 +24,15 @@ class BrownianMotion1_1():
         theta {float} : angle initial du vecteur vitesse de la grosse particule
         epsilon {float} : précision pour la détection des collision, est relié
         directement aux rayons des petites et de la grosse particules
+        incremental {bool} : si True, après une collision l'environnement est
+        mis à jour au lieu d'être régénéré (voir updateEnvironment) (par
+        défaut : {False})
+        streams {Streams} : flux aléatoires, angles de déviation et
+        environnements (par défaut : {None}, générateur global)
     """
     def __init__(self, n_etoile=10**4, V=1, v=10, h=10**-2,
-                 theta=random.uniform(-math.pi, math.pi), epsilon=10**-2):
+                 theta=random.uniform(-math.pi, math.pi), epsilon=10**-2,
+                 incremental=False, streams=None):
         self.n_etoile = n_etoile
         self.V = V
         self.v = v
@@ -47,9 +53,16 @@ class BrownianMotion1_1():
         self.CollisionsX = [0]
         self.CollisionsY = [0]
 
+        # évènements de collision non encore lus, enregistrés seulement pendant
+        # iter_events (None sinon)
+        self.evenements = None
+
         # précision souhaitée
         self.epsilon = epsilon
 
+        self.incremental = incremental
+        self.streams = DEFAULT_STREAMS if streams is None else streams
+
     def generEnvironment(self, e, R):
         """
         Génère aléatoirement les particules dans le disque local de la grosse
@@ -69,20 +82,139 @@ class BrownianMotion1_1():
 
         S = math.pi * R**2
         N = int(S * self.n_etoile)
+        # carrés des distances au centre divisés par R**2 (voir firstCollision)
+        self.distances = []
 
         for _ in range(N):
-            u = random.uniform(0, 1)
+            u = self.streams.bath()
+            self.distances.append(u)
             # vient du changement de variable polaire, pour
             r = R * math.sqrt(u)
             # avoir une loi unif dans le cercle
-            theta = random.uniform(-math.pi, math.pi)
+            theta = -math.pi + 2 * math.pi * self.streams.bath()
             self.particules_X.append(r * math.cos(theta) + self.Particule_X[e])
             self.particules_Y.append(r * math.sin(theta) + self.Particule_Y[e])
 
-            theta = random.uniform(-math.pi, math.pi)
+            theta = -math.pi + 2 * math.pi * self.streams.bath()
             self.vitesses_X.append(self.v * math.cos(theta))
             self.vitesses_Y.append(self.v * math.sin(theta))
 
+        # disque de l'environnement (utilisé par updateEnvironment)
+        self.centre_X = self.Particule_X[e]
+        self.centre_Y = self.Particule_Y[e]
+        self.rayon = R
+
+    def updateEnvironment(self, e, R, t, i_collision):
+        """
+        Met à jour l'environnement après une collision survenue au bout d'une
+        durée t, dans un disque de rayon R centré sur le point d'impact.
+
+        Les particules de l'ancien disque (sauf celle percutée) sont avancées
+        de t et conservées si elles sont dans le nouveau disque : le bain étant
+        un champ de Poisson ouvert à vitesses indépendantes, elles restent un
+        échantillon valide de la partie du nouveau disque issue de l'ancien.
+        On complète uniquement par les particules qui proviennent de
+        l'extérieur de l'ancien disque : des candidates sont tirées dans la
+        couronne où de telles particules peuvent se trouver, et acceptées si
+        leur position t plus tôt était hors de l'ancien disque.
+
+        Arguments :
+            e {int} : indice désignant l'étape durant laquelle on travaille
+            R {float} : rayon du nouveau disque
+            t {float} : durée écoulée depuis la génération précédente
+            i_collision {int} : indice de la particule percutée
+        """
+        X = self.Particule_X[e]
+        Y = self.Particule_Y[e]
+        X_old, Y_old, R_old = self.centre_X, self.centre_Y, self.rayon
+
+        particules_X = []
+        particules_Y = []
+        vitesses_X = []
+        vitesses_Y = []
+
+        # particules conservées
+        for i in range(len(self.particules_X)):
+            if i == i_collision:
+                continue
+            x = self.particules_X[i] + t * self.vitesses_X[i]
+            y = self.particules_Y[i] + t * self.vitesses_Y[i]
+            if (x - X)**2 + (y - Y)**2 <= R**2:
+                particules_X.append(x)
+                particules_Y.append(y)
+                vitesses_X.append(self.vitesses_X[i])
+                vitesses_Y.append(self.vitesses_Y[i])
+
+        # particules venant de l'extérieur de l'ancien disque : elles sont à
+        # plus de R_old - (v + V) * t du nouveau centre
+        r_min = max(0, R_old - (self.v + self.V) * t)
+        N = int(math.pi * (R**2 - r_min**2) * self.n_etoile)
+        for _ in range(N):
+            u = self.streams.bath()
+            # loi uniforme dans la couronne
+            r = math.sqrt(r_min**2 + u * (R**2 - r_min**2))
+            theta = -math.pi + 2 * math.pi * self.streams.bath()
+            x = r * math.cos(theta) + X
+            y = r * math.sin(theta) + Y
+
+            theta = -math.pi + 2 * math.pi * self.streams.bath()
+            vx = self.v * math.cos(theta)
+            vy = self.v * math.sin(theta)
+            if (x - t * vx - X_old)**2 + (y - t * vy - Y_old)**2 > R_old**2:
+                particules_X.append(x)
+                particules_Y.append(y)
+                vitesses_X.append(vx)
+                vitesses_Y.append(vy)
+
+        self.particules_X = particules_X
+        self.particules_Y = particules_Y
+        self.vitesses_X = vitesses_X
+        self.vitesses_Y = vitesses_Y
+        self.centre_X = X
+        self.centre_Y = Y
+        self.rayon = R
+        self.distances = None
+
+    def firstCollision(self, e, t_max):
+        """
+        Renvoie l'indice de la petite particule percutée en premier par la
+        grosse particule (au centre du disque) avant t_max, et la date de
+        collision ; -1 et t_max s'il n'y a aucune collision.
+
+        Les particules sont visitées par distance croissante au centre grâce à
+        l'index radial (voir outils.radial_index) construit à partir des
+        distances tirées par generEnvironment : la recherche s'arrête dès que
+        la borne inférieure d / (v + V) - epsilon des dates de collision
+        dépasse la meilleure date trouvée. L'index n'est construit que si
+        cette borne peut dépasser h (epsilon < h), sinon toutes les particules
+        sont testées.
+
+        Arguments :
+            e {int} : indice désignant l'étape durant laquelle on travaille
+            t_max {float} : date maximale de collision
+        """
+        index = None
+        if self.epsilon < self.h and self.distances is not None:
+            index = radial_index(self.distances, self.rayon)
+        return first_collision(lambda i: self.collision(i, e), len(self.particules_X), t_max,
+                               index, self.v + self.V, self.epsilon)
+
+    def renewEnvironment(self, e, R, t, i_collision):
+        """
+        Nouvel environnement après une collision : régénération complète, ou
+        mise à jour si incremental est activé.
+
+        Arguments :
+            e {int} : indice désignant l'étape durant laquelle on travaille
+            R {float} : rayon du nouveau disque
+            t {float} : durée écoulée depuis la génération précédente
+            i_collision {int} : indice de la particule percutée
+        """
+        if self.incremental:
+            self.updateEnvironment(e, R, t, i_collision)
+        else:
+            self.generEnvironment(e, R)
+
     def show(self, e, fig, ax):
         """
         Affiche la situation a l’étape e.
@@ -94,6 +226,8 @@ class BrownianMotion1_1():
             fig {matplotlib.figure.Figure} : figure de tracé
             ax {matplotlib.axes._subplots.AxesSubplot} : axe de tracé
         """
+        from matplotlib import pyplot as plt
+
         ax.clear()
         circle = plt.Circle((self.Particule_X[e], self.Particule_Y[e]), self.R)
         circle.fill = False
@@ -140,23 +274,22 @@ class BrownianMotion1_1():
         else:
             return False, 0
 
-    def nextPos(self, e):
+    def nextPos(self, e, t_debut=None):
         """
         Calcule la position et la vitesse de la grosse particule à l'étape e+1
         en prenant en compte toutes les collisions : celles-ci sont
-        sauvegardées dans les attributs CollisionsX et CollisionsY.
+        sauvegardées dans les attributs CollisionsX et CollisionsY, et dans
+        evenements pendant iter_events.
 
         Argument :
             e {int} : indice désignant l'étape durant laquelle on travaille
+            t_debut {float} : date du début de l'étape (par défaut : {e*h})
         """
+        if t_debut is None:
+            t_debut = e * self.h
+
         # calcul de la première collision et du temps correspondant
-        t_min = self.h
-        i_argmin = -1
-        for i in range(len(self.particules_X)):
-            collision, t = self.collision(i, e)
-            if collision and t <= t_min:
-                t_min = t
-                i_argmin = i
+        i_argmin, t_min = self.firstCollision(e, self.h)
 
         duree = t_min  # pour que la durée de l'étape ne dépasse pas h
 
@@ -174,12 +307,20 @@ class BrownianMotion1_1():
             self.CollisionsX.append(self.Particule_X[e])
             self.CollisionsY.append(self.Particule_Y[e])
             # et on change sa direction ainsi que l'environnement
-            self.generEnvironment(e, self.R - self.V * duree)
-            theta = random.uniform(-math.pi, math.pi)
+            self.renewEnvironment(e, self.R - self.V * duree, t_min, i_argmin)
+            theta = -math.pi + 2 * math.pi * self.streams.angle()
             self.Vitesse_X[e] = self.V * math.cos(theta)
             self.Vitesse_Y[e] = self.V * math.sin(theta)
+            if self.evenements is not None:
+                self.evenements.append(Event(t_debut + duree,
+                                             self.Particule_X[e],
+                                             self.Particule_Y[e],
+                                             self.Vitesse_X[e],
+                                             self.Vitesse_Y[e], "collision"))
 
         while i_argmin != -1:  # et on regarde s'il y a d'autres collisions
+            # (dernière particule percutée dans l'ordre des indices, pas la
+            # première dans le temps : toutes les particules sont testées)
             i_argmin = -1
             for i in range(len(self.particules_X)):
                 collision, t = self.collision(i, e)
@@ -200,10 +341,17 @@ class BrownianMotion1_1():
                 self.CollisionsY.append(self.Particule_Y[e])
                 duree += t_min  # la durée augmente
                 # et on change la direction et l'environnement
-                self.generEnvironment(e, self.R - self.V * duree)
-                theta = random.uniform(-math.pi, math.pi)
+                self.renewEnvironment(e, self.R - self.V * duree, t_min, i_argmin)
+                theta = -math.pi + 2 * math.pi * self.streams.angle()
                 self.Vitesse_X[e] = self.V * math.cos(theta)
                 self.Vitesse_Y[e] = self.V * math.sin(theta)
+                if self.evenements is not None:
+                    self.evenements.append(Event(t_debut + duree,
+                                                 self.Particule_X[e],
+                                                 self.Particule_Y[e],
+                                                 self.Vitesse_X[e],
+                                                 self.Vitesse_Y[e],
+                                                 "collision"))
 
     def simulationAnimated(self, nb_etapes):
         """
@@ -216,6 +364,8 @@ class BrownianMotion1_1():
         nb_etapes est directement relié à la durée théorique de la simulation
         par la formule : durée_totale = nb_etapes * h
         """
+        from matplotlib import pyplot as plt
+
         fig, ax = plt.subplots()
         for e in range(nb_etapes):
             self.generEnvironment(e, self.R)
@@ -240,7 +390,9 @@ class BrownianMotion1_1():
         (on considère le point de départ comme étant une collision).
         """
         self.__init__(n_etoile=self.n_etoile, V=self.V, v=self.v,
-                      h=self.h, epsilon=self.epsilon)  # on réinitialise
+                      h=self.h, epsilon=self.epsilon,
+                      incremental=self.incremental,
+                      streams=self.streams)  # on réinitialise
         for e in range(nb_etapes):
             self.generEnvironment(e, self.R)
             posX, posY, vX, vY = self.nextPos(e)
@@ -250,10 +402,57 @@ class BrownianMotion1_1():
             self.Vitesse_Y.append(vY)
         return self.CollisionsX, self.CollisionsY
 
+    def iter_events(self, nb_etapes=None):
+        """
+        Générateur des évènements d'une simulation de nb_etapes étapes,
+        calculés au fur et à mesure : un évènement "start", puis un évènement
+        "collision" par collision, ou "no_collision" pour une étape sans
+        collision. L'arrêt anticipé de la lecture arrête le calcul.
+
+        Contrairement à simulation, seule l'étape courante est conservée dans
+        Particule_X, Particule_Y, Vitesse_X, Vitesse_Y, CollisionsX et
+        CollisionsY : la mémoire utilisée ne dépend pas de nb_etapes.
+
+        Argument:
+            nb_etapes {int} : nombre total d'étapes (par défaut : {None}, sans
+            fin)
+        """
+        self.__init__(n_etoile=self.n_etoile, V=self.V, v=self.v,
+                      h=self.h, epsilon=self.epsilon,
+                      incremental=self.incremental,
+                      streams=self.streams)  # on réinitialise
+        self.evenements = []
+        yield Event(0, 0, 0, self.Vitesse_X[0], self.Vitesse_Y[0], "start")
+
+        e = 0
+        while nb_etapes is None or e < nb_etapes:
+            self.generEnvironment(0, self.R)
+            posX, posY, vX, vY = self.nextPos(0, t_debut=e * self.h)
+            e += 1
+
+            evenements = self.evenements
+            if not evenements:
+                evenements = [Event(e * self.h, posX, posY, vX, vY,
+                                    "no_collision")]
+            self.evenements = []
+
+            # seule l'étape suivante est conservée
+            self.Particule_X = [posX]
+            self.Particule_Y = [posY]
+            self.Vitesse_X = [vX]
+            self.Vitesse_Y = [vY]
+            self.CollisionsX = self.CollisionsX[-1:]
+            self.CollisionsY = self.CollisionsY[-1:]
+
+            for evenement in evenements:
+                yield evenement
+
     def trajectoire(self):
         """
         Affiche le trajectoire préalablement calculée.
         """
+        from matplotlib import pyplot as plt
+
         plt.plot(self.CollisionsX, self.CollisionsY)
         plt.show()
 
@@ -1,8 +1,8 @@
-from .outils import Particle, show_listparticles_point, show_listparticles_vector, regular_time
-from random import random
-import matplotlib.pyplot as plt
+from .outils import Particle, Event, regular_time, DEFAULT_STREAMS
+from .affichage import LiveDisplay
+from .bath import ArrayBath
 import copy
-from math import pi
+from math import pi, ceil, floor, sqrt
 
 # ---------------------------------------------------------------------------- #
 #                             Simulation de type 2                             #
@@ -10,7 +10,7 @@ from math import pi
 infini = float('inf')
 
 
-def random_particle_square(dim, speed, epsilon_time):
+def random_particle_square(dim, speed, epsilon_time, x_center=0, y_center=0, uniforms=None):
     """
     Génération aléatoire d'une particule dans un carré
 
@@ -19,21 +19,58 @@ def random_particle_square(dim, speed, epsilon_time):
         speed {float} -- vitesse de la particule
         epsilon_time {float} -- précision pour la détection de collision
 
+    Keyword Arguments:
+        x_center {float} -- coordonnée x du centre du carré (default: {0})
+        y_center {float} -- coordonnée y du centre du carré (default: {0})
+        uniforms {(float, float, float)} -- tirages uniformes à utiliser (default: {None}, générateur global)
+
     Returns:
         Particle -- particule générée
     """
-    x = -dim + 2 * dim * random()
-    y = -dim + 2 * dim * random()
-    theta_speed = 2 * pi * random()
+    if uniforms is None:
+        uniforms = DEFAULT_STREAMS.uniforms()
+    u_x, u_y, u_speed = uniforms
+    x = x_center - dim + 2 * dim * u_x
+    y = y_center - dim + 2 * dim * u_y
+    theta_speed = 2 * pi * u_speed
 
     return Particle(x, y, speed, theta_speed, epsilon_time)
 
 
+def random_particle_strip(dim, speed, epsilon_time, x_center, y_center, x_old, y_old, streams=None):
+    """
+    Génération aléatoire d'une particule dans la bande nouvellement découverte après
+    une translation du carré : carré centré en (x_center, y_center) privé du carré
+    centré en (x_old, y_old), par rejet.
+
+    Arguments:
+        dim {float} -- carrés de côté 2*dim
+        speed {float} -- vitesse de la particule
+        epsilon_time {float} -- précision pour la détection de collision
+        x_center {float} -- coordonnée x du centre du nouveau carré
+        y_center {float} -- coordonnée y du centre du nouveau carré
+        x_old {float} -- coordonnée x du centre de l'ancien carré
+        y_old {float} -- coordonnée y du centre de l'ancien carré
+
+    Keyword Arguments:
+        streams {Streams} -- flux aléatoires (default: {None}, générateur global)
+
+    Returns:
+        Particle -- particule générée
+    """
+    if streams is None:
+        streams = DEFAULT_STREAMS
+    while True:
+        particle = random_particle_square(dim, speed, epsilon_time, x_center, y_center, streams.uniforms())
+        if abs(particle.x - x_old) > dim or abs(particle.y - y_old) > dim:
+            return particle
+
+
 class Workzone_square():
     """
     Environnement : ensemble de particules dans un carré
     """
-    def __init__(self, particle_number, dim, speed, epsilon_time):
+    def __init__(self, particle_number, dim, speed, epsilon_time, periodic=False, streams=None, grid=False):
         """
         Définition d'un ensemble de particules aléatoires dans un carré
 
@@ -42,13 +79,32 @@ class Workzone_square():
             dim {float} -- carré de côté 2*dim
             speed {float} -- vitesse des particules
             epsilon_time {float} -- précision pour la détection de collision
+
+        Keyword Arguments:
+            periodic {bool} -- si True : conditions aux limites périodiques (default: {False})
+            streams {Streams} -- flux aléatoires (default: {None}, générateur global)
+            grid {bool} -- si True : recherche des grosses collisions sur une grille (voir grid_first_collision) (default: {False})
         """
+        self.streams = DEFAULT_STREAMS if streams is None else streams
         self.particle_number = particle_number
         self.dim = dim
         self.speed = speed
         self.epsilon_time = epsilon_time
-
-        self.particles = [random_particle_square(dim, speed, epsilon_time) for i in range(particle_number)]
+        self.periodic = periodic
+        self.periodic_dim = dim if periodic else None
+        # Centre de la zone (déplacé par recenter)
+        self.x_center = 0
+        self.y_center = 0
+
+        self.particles = [random_particle_square(dim, speed, epsilon_time, uniforms=uniforms)
+                          for uniforms in self.streams.initial(particle_number)]
+
+        # Grille de recherche des grosses collisions : environ deux particules par case
+        self.grid = grid
+        if grid:
+            self.grid_size = max(1, int(sqrt(particle_number / 2)))
+            self.cell = 2 * dim / self.grid_size
+            self.build_grid()
 
     def workzone_update_time(self, delta_time):
         """
@@ -59,6 +115,138 @@ class Workzone_square():
         """
         for i in range(self.particle_number):
             self.particles[i].update_time(delta_time)
+        if self.grid:
+            self.drift += self.speed * delta_time
+
+    # ---------------------------- Grille de recherche --------------------------- #
+
+    def build_grid(self):
+        """
+        Répartition des particules dans les cases de la grille, à partir de leurs positions actuelles
+
+        Sauvegarde dans la classe Workzone_square:
+            self.cells {int list list} -- indices des particules de chaque case
+            self.cell_of {int list} -- case de chaque particule
+            self.drift {float} -- déplacement maximal des particules depuis leur case (vitesse * durée écoulée)
+            self.nb_tests {int} -- nombre de particules testées depuis la construction
+            self.regenerated {int set} -- particules régénérées depuis la construction (hors de leur case,
+                                          testées à chaque recherche)
+        """
+        n = self.grid_size
+        x0 = self.x_center - self.dim
+        y0 = self.y_center - self.dim
+        if self.periodic:
+            periode = 2 * self.dim
+            X = [(particle.x - x0) % periode for particle in self.particles]
+            Y = [(particle.y - y0) % periode for particle in self.particles]
+        else:
+            X = [particle.x - x0 for particle in self.particles]
+            Y = [particle.y - y0 for particle in self.particles]
+        inverse = 1 / self.cell
+        self.cell_of = [min(int(x * inverse), n - 1) * n + min(int(y * inverse), n - 1) for x, y in zip(X, Y)]
+        self.cells = [[] for _ in range(n * n)]
+        for i, case in enumerate(self.cell_of):
+            self.cells[case].append(i)
+        self.drift = 0
+        self.nb_tests = 0
+        self.regenerated = set()
+
+    def grid_first_collision(self, BP, t_max=infini):
+        """
+        Détection de la première collision de la grosse particule, en ne testant que les particules
+        des cases balayées par sa trajectoire.
+
+        Une particule de vitesse v qui percute la grosse particule à la date t est au départ à moins de
+        v*t + (v+V)*epsilon_time (égalité à epsilon_time près des dates selon x et y) de la position de la
+        grosse particule à la date t, et à moins de drift de sa case. Les cases sont visitées par tranches
+        de durée cell / (v+V), dans l'ordre du temps, et la recherche s'arrête dès qu'une collision est
+        trouvée avant la fin de la tranche, après t_max, ou (zone non périodique) quand la région balayée est
+        sortie de la zone. Le résultat est celui de first_collision
+        (date minimale, et à égalité la particule de plus grand indice) pour toute collision avant t_max.
+
+        Arguments:
+            BP {Particle} -- grosse particule
+
+        Keyword Arguments:
+            t_max {float} -- date au-delà de laquelle les collisions ne sont pas utiles (default: {infini})
+
+        Returns:
+            int -- indice de la particule percutée, -1 si aucune collision
+            float -- date relative de la collision, inf si aucune collision
+        """
+        # Les cases visitées s'étendent avec drift : la grille est reconstruite (coût d'un parcours complet)
+        # dès que les recherches depuis la construction ont testé autant de particules que la zone en contient
+        if self.nb_tests > self.particle_number:
+            self.build_grid()
+
+        n = self.grid_size
+        vitesse_relative = self.speed + sqrt(BP.vx ** 2 + BP.vy ** 2)
+        portee = self.drift + vitesse_relative * self.epsilon_time + 1e-9 * self.dim
+        bx = BP.x - self.x_center + self.dim
+        by = BP.y - self.y_center + self.dim
+        if self.periodic:
+            bx %= 2 * self.dim
+            by %= 2 * self.dim
+        tranche = self.cell / vitesse_relative
+
+        t_min = infini
+        i_argmin = -1
+        # Particules régénérées depuis la construction de la grille
+        self.nb_tests += len(self.regenerated)
+        for i in self.regenerated:
+            collision, t = BP.collision(self.particles[i], self.periodic_dim)
+            if collision and (t < t_min or (t == t_min and i > i_argmin)):
+                t_min = t
+                i_argmin = i
+
+        visitees = set()
+        k = 0
+        while len(visitees) < n * n:
+            t_debut, t_fin = k * tranche, (k + 1) * tranche
+            rayon = self.speed * t_fin + portee
+            cases = []
+            for centre, v in ((bx, BP.vx), (by, BP.vy)):
+                debut = floor((centre + min(v * t_debut, v * t_fin) - rayon) / self.cell)
+                fin = floor((centre + max(v * t_debut, v * t_fin) + rayon) / self.cell)
+                if not self.periodic:
+                    cases.append(range(max(debut, 0), min(fin, n - 1) + 1))
+                elif fin - debut + 1 >= n:
+                    cases.append(range(n))
+                else:
+                    cases.append([j % n for j in range(debut, fin + 1)])
+            # Zone ouverte : la région balayée a quitté la zone (elle n'y revient pas, la grosse particule
+            # s'éloignant plus vite que les petites particules), aucune collision au-delà
+            if not all(cases):
+                break
+
+            for ix in cases[0]:
+                for iy in cases[1]:
+                    case = ix * n + iy
+                    if case in visitees:
+                        continue
+                    visitees.add(case)
+                    self.nb_tests += len(self.cells[case])
+                    for i in self.cells[case]:
+                        collision, t = BP.collision(self.particles[i], self.periodic_dim)
+                        if collision and (t < t_min or (t == t_min and i > i_argmin)):
+                            t_min = t
+                            i_argmin = i
+
+            if t_min < t_fin or t_fin >= t_max:
+                break
+            k += 1
+        return i_argmin, t_min
+
+    def inside(self, x, y):
+        """
+        Arguments:
+            x {float} -- coordonnée x
+            y {float} -- coordonnée y
+
+        Returns:
+            bool -- True si le point (x, y) est dans la zone
+        """
+        return abs(x - self.x_center) <= self.dim and abs(y - self.y_center) <= self.dim
 
     def delete_outside(self):
         """
@@ -70,11 +258,131 @@ class Workzone_square():
         """
         indices_suppression = []
         for i in range(self.particle_number):
-            if abs(self.particles[i].x) > self.dim or abs(self.particles[i].y) > self.dim:
-                self.particles[i] = random_particle_square(self.dim, self.speed, self.epsilon_time)
+            if not self.inside(self.particles[i].x, self.particles[i].y):
+                self.particles[i] = random_particle_square(self.dim, self.speed, self.epsilon_time, self.x_center, self.y_center,
+                                                          self.streams.uniforms())
                 indices_suppression.append(i)
+                if self.grid:
+                    self.regenerated.add(i)
         return indices_suppression
 
+    def recenter(self, x, y):
+        """
+        Translation de la zone pour la centrer en (x, y).
+        Les particules de la bande abandonnée sont supprimées et autant de particules
+        sont générées dans la bande nouvellement découverte (même aire, donc densité constante).
+        Les particules de la partie commune sont conservées.
+
+        Arguments:
+            x {float} -- coordonnée x du nouveau centre
+            y {float} -- coordonnée y du nouveau centre
+
+        Returns:
+            int list -- indices des particules régénérées
+        """
+        x_old, y_old = self.x_center, self.y_center
+        self.x_center, self.y_center = x, y
+        indices_suppression = []
+        for i in range(self.particle_number):
+            if not self.inside(self.particles[i].x, self.particles[i].y):
+                self.particles[i] = random_particle_strip(self.dim, self.speed, self.epsilon_time, x, y, x_old, y_old,
+                                                         self.streams)
+                indices_suppression.append(i)
+        if self.grid:
+            self.build_grid()
+        return indices_suppression
+
+    def wrap_inside(self):
+        """
+        Conditions périodiques : les particules sorties de la zone y reviennent par le côté opposé
+        """
+        periode = 2 * self.dim
+        for particle in self.particles:
+            particle.x = (particle.x - self.x_center + self.dim) % periode - self.dim + self.x_center
+            particle.y = (particle.y - self.y_center + self.dim) % periode - self.dim + self.y_center
+
+    def boundary(self):
+        """
+        Application des conditions aux limites de la zone
+
+        Returns:
+            int list -- indices des particules supprimées (vide si périodique)
+        """
+        if self.periodic:
+            self.wrap_inside()
+            return []
+        return self.delete_outside()
+
+    def first_collision(self, BP, t_max=infini):
+        """
+        Détection de la première collision de la grosse particule avec une petite particule
+
+        Arguments:
+            BP {Particle} -- grosse particule
+
+        Keyword Arguments:
+            t_max {float} -- date au-delà de laquelle les collisions ne sont pas utiles (utilisée par la
+                             recherche sur grille) (default: {infini})
+
+        Returns:
+            int -- indice de la particule percutée, -1 si aucune collision
+            float -- date relative de la collision, inf si aucune collision
+        """
+        if self.grid:
+            return self.grid_first_collision(BP, t_max)
+        t_min = float("inf")
+        i_argmin = -1
+        for i in range(self.particle_number):
+            collision, t = BP.collision(self.particles[i], self.periodic_dim)
+            if collision and t <= t_min:
+                t_min = t
+                i_argmin = i
+        return i_argmin, t_min
+
+    def first_collision_among(self, BP, indices):
+        """
+        Détection de la première collision de la grosse particule parmi quelques particules
+
+        Arguments:
+            BP {Particle} -- grosse particule
+            indices {int list} -- indices des particules testées
+
+        Returns:
+            int -- indice de la particule percutée, -1 si aucune collision
+            float -- date relative de la collision, inf si aucune collision
+        """
+        t_min = float("inf")
+        i_argmin = -1
+        for i in indices:
+            collision, t = BP.collision(self.particles[i], self.periodic_dim)
+            if collision and (t < t_min or (t == t_min and i > i_argmin)):
+                t_min = t
+                i_argmin = i
+        return i_argmin, t_min
+
+    def change_theta(self, i, new_theta):
+        """
+        Changement de l'angle theta du vecteur vitesse d'une particule
+
+        Arguments:
+            i {int} -- indice de la particule
+            new_theta {float} -- angle theta
+        """
+        self.particles[i].change_theta(new_theta)
+
+    def periodic_horizon(self, relative_speed):
+        """
+        Durée pendant laquelle la détection à l'image minimale est exacte en périodique :
+        une collision avant cette date implique un écart initial inférieur à dim selon chaque axe.
+
+        Arguments:
+            relative_speed {float} -- vitesse relative maximale des deux particules
+
+        Returns:
+            float -- horizon de détection
+        """
+        return self.dim / relative_speed
+
 
 class NoBigCollision(Exception):
     """
@@ -91,7 +399,7 @@ class OutsideEnv(Exception):
 
 
 class Simulation2:
-    def __init__(self, nb_max_collisions=infini, duree=infini, density=10**4, speed_BP_init=1, theta_BP_init=-pi / 4, speed=1, dim=0.2, epsilon_time=0.005):
+    def __init__(self, nb_max_collisions=infini, duree=infini, density=10**4, speed_BP_init=1, theta_BP_init=-pi / 4, speed=1, dim=0.2, epsilon_time=0.005, periodic=False, moving_window=False, dtype=None, streams=None, grid=False, workers=1, tracers=1):
         """
         Définition de l'espace de travail pour une simulation de type 2
 
@@ -104,12 +412,31 @@ class Simulation2:
             speed {float} -- vitesse des petites particules (default: {1})
             dim {float} -- environnement carré de côté 2*dim (default: {0.2})
             epsilon_time {float} -- précision pour la détection des collisions (default: {0.005})
+            periodic {bool} -- si True : environnement périodique (torique), la grosse particule ne sort
+                               jamais de l'environnement et ses coordonnées sont conservées non repliées (default: {False})
+            moving_window {bool} -- si True : l'environnement est translaté pour suivre la grosse particule
+                                    lorsqu'elle s'éloigne de plus de dim/2 de son centre, la simulation
+                                    n'est jamais interrompue (default: {False})
+            dtype {str} -- si défini ("float32" ou "float64") : environnement stocké dans des tableaux numpy
+                           de cette précision (voir bath.ArrayBath), la grosse particule et le temps restent
+                           en float64 (default: {None}, listes de Particle)
+            streams {Streams} -- flux aléatoires : angles de déviation et environnement (default: {None}, générateur global)
+            grid {bool} -- si True (environnement en listes de Particle) : recherche des grosses collisions dans les
+                           seules cases d'une grille balayées par la trajectoire de la grosse particule, mêmes
+                           résultats (voir Workzone_square.grid_first_collision) (default: {False})
+            workers {int} -- nombre de threads des recherches de collisions, avec dtype défini (voir bath.ArrayBath),
+                             mêmes résultats quel que soit ce nombre (default: {1})
+            tracers {int} -- nombre de grosses particules (traceurs) suivies dans le même environnement, sans
+                             interaction entre elles (voir iter_tracer_events) (default: {1})
         """
         assert nb_max_collisions != infini or duree != infini, "Choisir un nombre max de grosses collisions ou une durée max"
         if nb_max_collisions != infini:
             assert duree == infini, "Impossible de choisir à la foix un nombre max de grosses collisions et une durée max"
         if duree != infini:
             assert nb_max_collisions == infini, "Impossible de choisir à la foix un nombre max de grosses collisions et une durée max"
+        assert not (periodic and moving_window), "Impossible de choisir à la fois un environnement périodique et mobile"
+        assert workers == 1 or dtype is not None, "Recherche parallèle (workers > 1) seulement avec dtype défini"
+        assert tracers == 1 or not moving_window, "Impossible de suivre plusieurs traceurs avec un environnement mobile"
 
         # Nombre de particules dans l'environnement
         self.particle_number = int(density * 4 * dim**2)
@@ -121,6 +448,13 @@ class Simulation2:
         self.duree = duree
         self.dim = dim
         self.epsilon_time = epsilon_time
+        self.periodic = periodic
+        self.moving_window = moving_window
+        self.dtype = dtype
+        self.streams = DEFAULT_STREAMS if streams is None else streams
+        self.grid = grid
+        self.workers = workers
+        self.tracers = tracers
 
         self.title = "Simulation de type 2"
 
@@ -131,23 +465,64 @@ class Simulation2:
         Keyword Arguments:
             show {bool} -- si True : affichage de chaque étape (default: {False})
             vector {bool} -- si True : affichage des vecteurs vitesses (si show=True) (default: {True})
-            pause {float} -- délai entre chaque affichage (si show=True) (default: {0.25})
+            pause {float} -- délai entre deux rafraîchissements de l'affichage, sans bloquer le calcul (si show=True) (default: {0.25})
             coeff_affichage {float} -- zoom de l'affichage (si show=True) (default: {1})
             movie {bool} -- si True : sauvegarde de l'environnement pour créer une vidéo (default: {False})
 
         Raises:
-            NoBigCollision: Aucune grosse collision n'est possible dans le futur
-            OutsideEnv: Grosse particule en dehors de la zone
+            NoBigCollision: Aucune grosse collision n'est possible dans le futur (jamais en périodique ou mobile, sauf environnement vide)
+            OutsideEnv: Grosse particule en dehors de la zone (jamais en périodique ou mobile)
 
         Sauvegarde dans la classe Simulation2:
             self.historic_BP {(float, Particle) list} -- historique du temps et de la grosse particule à chaque collision
             self.historic_PP {(float, Workzone_square) list} -- (Si movie=True) historique temps et de l'environnement à chaque collision
+            self.historic_tracers {(float, Particle) list list} -- historique de chaque traceur (voir calcul_tracers,
+                                                                   [historic_BP] avec un seul traceur)
+        """
+        if self.tracers > 1:
+            assert not show and not movie, "Affichage et vidéo impossibles avec plusieurs traceurs"
+            self.calcul_tracers()
+            return
+
+        historic_BP = []
+        for event in self.iter_events(show=show, vector=vector, pause=pause, coeff_affichage=coeff_affichage,
+                                      movie=movie):
+            if event.kind != "advance":
+                # Seulement collision dans historique
+                historic_BP.append((event.time, event.particle(self.epsilon_time)))
+
+        # Sauvegarde de l'historique de la grosse particule
+        self.historic_BP = historic_BP
+        self.historic_tracers = [historic_BP]
+
+    def iter_events(self, show=False, vector=True, pause=0.25, coeff_affichage=1, movie=False, endless=False):
+        """
+        Générateur des évènements d'une simulation, calculés au fur et à mesure :
+        un évènement "start", puis un évènement "collision" par grosse collision
+        (et "advance" à chaque avance jusqu'à l'horizon de détection en périodique ou mobile).
+        L'arrêt anticipé de la lecture arrête le calcul.
+
+        Keyword Arguments:
+            show {bool} -- si True : affichage de chaque étape (default: {False})
+            vector {bool} -- si True : affichage des vecteurs vitesses (si show=True) (default: {True})
+            pause {float} -- délai entre deux rafraîchissements de l'affichage, sans bloquer le calcul (si show=True) (default: {0.25})
+            coeff_affichage {float} -- zoom de l'affichage (si show=True) (default: {1})
+            movie {bool} -- si True : sauvegarde de l'environnement pour créer une vidéo (default: {False})
+            endless {bool} -- si True : ignore nb_max_collisions et duree, le calcul s'arrête avec la lecture (default: {False})
+
+        Raises:
+            NoBigCollision: Aucune grosse collision n'est possible dans le futur (jamais en périodique ou mobile, sauf environnement vide)
+            OutsideEnv: Grosse particule en dehors de la zone (jamais en périodique ou mobile)
+
+        Yields:
+            Event -- évènement (voir outils.Event)
+
+        Sauvegarde dans la classe Simulation2:
+            self.historic_PP {(float, Workzone_square) list} -- (Si movie=True) historique temps et de l'environnement à chaque collision
         """
         if show:
-            fig, ax = plt.subplots()
-            plt.grid()
-            plt.xlim(-self.dim, self.dim)
-            plt.ylim(-self.dim, self.dim)
+            display = LiveDisplay(self.title, (-coeff_affichage * self.dim, coeff_affichage * self.dim),
+                                  (-coeff_affichage * self.dim, coeff_affichage * self.dim), pause)
 
         time = 0
         nb_collision = 0
@@ -155,118 +530,290 @@ class Simulation2:
         # Initialisation de la grosse particule
         BP = Particle(0, 0, self.speed_BP_init, self.theta_BP_init, self.epsilon_time)
 
-        # Initialisation de l'historique de la grosse particule
-        historic_BP = []
-        historic_BP.append((time, copy.copy(BP)))
-
-        # Initialisation de l'environnement unique
-        zone = Workzone_square(self.particle_number, self.dim, self.speed, self.epsilon_time)
-
-        # Initialisation de l'historique des petites particules pour la vidéo
-        if movie:
-            historic_PP = []
-            historic_PP.append((time, copy.deepcopy(zone)))
-
-        # Boucle de calcul des grosses collisions
-        while nb_collision < self.nb_max_collisions and time < self.duree:
-            if show and vector:
-                ####
-                ax.clear()
-
-                X = [elem[1].x for elem in historic_BP]
-                Y = [elem[1].y for elem in historic_BP]
-                plt.plot(X, Y, color='red')
-
-                show_listparticles_vector(ax, zone.particles, 'blue')
-                show_listparticles_vector(ax, [BP], 'red')
-
-                plt.title(self.title + '\nt=' + str(round(time, 4)))
-                plt.xlim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                plt.ylim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                plt.draw()
-                plt.pause(pause)
-                #####
-
-            # Calcul de la première collision
-            t_min = float("inf")
-            i_argmin = -1
-            for i in range(self.particle_number):
-                collision, t = BP.collision(zone.particles[i])
-                if collision and t <= t_min:
-                    t_min = t
-                    i_argmin = i
-
-            # Si pas de grosse collision
-            if i_argmin == -1:
-                raise NoBigCollision
+        try:
+            yield Event.from_particle(time, BP, "start")
+            if show:
+                display.point(BP.x, BP.y)
 
-            # Si grosse collision possible
+            # Initialisation de l'environnement unique
+            if self.dtype is None:
+                zone = Workzone_square(self.particle_number, self.dim, self.speed, self.epsilon_time, self.periodic,
+                                       self.streams, self.grid)
             else:
-                nb_collision += 1
-                delta_time = t_min      # Date relative de la collision
+                zone = ArrayBath(self.particle_number, self.dim, self.speed, self.epsilon_time, self.periodic,
+                                 self.dtype, self.streams, self.workers)
+
+            # Horizon au-delà duquel une collision détectée n'est pas fiable :
+            # - en périodique, une autre image peut percuter la grosse particule avant,
+            # - en environnement mobile, une particule encore hors de la zone peut la percuter avant
+            #   (la grosse particule reste à moins de dim/2 du centre, donc à plus de dim/2 du bord).
+            horizon = None
+            if self.periodic:
+                horizon = zone.periodic_horizon(self.speed + self.speed_BP_init)
+            elif self.moving_window:
+                horizon = (self.dim / 2) / (self.speed + self.speed_BP_init)
+            if horizon is not None and self.particle_number == 0:
+                raise NoBigCollision
 
-                # Mise à jour du temps et de l'environnement
-                time += delta_time
-                zone.workzone_update_time(delta_time)
-                BP.update_time(delta_time)
+            # Initialisation de l'historique des petites particules pour la vidéo
+            if movie:
+                self.historic_PP = []
+                self.historic_PP.append((time, copy.deepcopy(zone)))
+
+            # Boucle de calcul des grosses collisions
+            while endless or (nb_collision < self.nb_max_collisions and time < self.duree):
+                if show and vector:
+                    display.image(time, zone.particles, BP, vector=True)
+
+                # Calcul de la première collision
+                i_argmin, t_min = zone.first_collision(BP, infini if horizon is None else horizon)
+
+                # Aucune collision fiable avant l'horizon : on avance jusqu'à l'horizon et on recommence
+                if horizon is not None and (i_argmin == -1 or t_min > horizon):
+                    time += horizon
+                    zone.workzone_update_time(horizon)
+                    BP.update_time(horizon)
+                    zone.boundary()
+                    if self.moving_window:
+                        self.follow(zone, BP)
+                    yield Event.from_particle(time, BP, "advance")
+                    continue
+
+                # Si pas de grosse collision
+                if i_argmin == -1:
+                    raise NoBigCollision
 
-                # Changement de l'angle de la vitesse de la grosse particule
-                new_theta = 2 * pi * random()
-                BP.change_theta(new_theta)
+                # Si grosse collision possible
+                else:
+                    nb_collision += 1
+                    delta_time = t_min      # Date relative de la collision
 
-                # Changement de l'angle de la vitesse de la petite particule percutée
-                PP = zone.particles[i_argmin]
-                new_theta = 2 * pi * random()
-                PP.change_theta(new_theta)
+                    # Mise à jour du temps et de l'environnement
+                    time += delta_time
+                    zone.workzone_update_time(delta_time)
+                    BP.update_time(delta_time)
 
-                # Sauvegarde de la grosse particule dans l'historique
-                historic_BP.append((time, copy.copy(BP)))   # Seulement collision dans historique
+                    # Changement de l'angle de la vitesse de la grosse particule
+                    new_theta = 2 * pi * self.streams.angle()
+                    BP.change_theta(new_theta)
 
-                if movie:
-                    historic_PP.append((time, copy.deepcopy(zone)))
+                    # Changement de l'angle de la vitesse de la petite particule percutée
+                    new_theta = 2 * pi * self.streams.bath()
+                    zone.change_theta(i_argmin, new_theta)
 
-                # Supression des particules en dehors de l'environnement et régénération
-                indices_suppression = zone.delete_outside()
+                    if movie:
+                        self.historic_PP.append((time, copy.deepcopy(zone)))
 
-                if movie:
-                    historic_PP.append((time, copy.deepcopy(zone)))
+                    # Supression des particules en dehors de l'environnement et régénération
+                    # (ou repliement dans l'environnement en périodique)
+                    zone.boundary()
 
-                # Vérification que la grosse particule est toujours dans l'environnement
-                if abs(BP.x) > self.dim or abs(BP.y) > self.dim:
-                    raise OutsideEnv
+                    if movie:
+                        self.historic_PP.append((time, copy.deepcopy(zone)))
 
+                    # Translation de l'environnement pour suivre la grosse particule
+                    if self.moving_window:
+                        self.follow(zone, BP)
+
+                    # Vérification que la grosse particule est toujours dans l'environnement
+                    if not self.periodic and not zone.inside(BP.x, BP.y):
+                        raise OutsideEnv
+
+                if show:
+                    display.point(BP.x, BP.y)
+                    display.image(time, zone.particles, BP, collision=True)
+
+                yield Event.from_particle(time, BP, "collision")
+        finally:
             if show:
-                ####
-                ax.clear()
+                display.close()
 
-                X = [elem[1].x for elem in historic_BP]
-                Y = [elem[1].y for elem in historic_BP]
-                plt.plot(X, Y, color='red')
+    # ---------------------------- Plusieurs traceurs ---------------------------- #
 
-                show_listparticles_point(ax, zone.particles, 'blue')
-                show_listparticles_point(ax, [zone.particles[i] for i in indices_suppression], 'green')
-                if i_argmin == -1:
-                    show_listparticles_point(ax, [BP], 'red', marker='o')
+    def tracer_starts(self):
+        """
+        Points de départ des traceurs : centre de l'environnement, ou en périodique noeuds d'un réseau
+        régulier couvrant le tore (environnements proches des traceurs distincts au départ).
+        Les angles des vitesses initiales sont répartis sur le cercle à partir de theta_BP_init.
+
+        Returns:
+            (float, float, float) list -- coordonnées x, y et angle de la vitesse initiale de chaque traceur
+        """
+        n = ceil(sqrt(self.tracers))
+        pas = 2 * self.dim / n
+        starts = []
+        for k in range(self.tracers):
+            theta = self.theta_BP_init + 2 * pi * k / self.tracers
+            if self.periodic:
+                starts.append((-self.dim + (k // n + 0.5) * pas, -self.dim + (k % n + 0.5) * pas, theta))
+            else:
+                starts.append((0, 0, theta))
+        return starts
+
+    def calcul_tracers(self):
+        """
+        Calcul d'une simulation à plusieurs traceurs (voir iter_tracer_events)
+
+        Sauvegarde dans la classe Simulation2:
+            self.historic_tracers {(float, Particle) list list} -- historique du temps et de chaque traceur, au départ
+                                                                   et à chaque collision, positions relatives à son
+                                                                   point de départ (voir tracer)
+            self.historic_BP {(float, Particle) list} -- historique du premier traceur
+            self.status_tracers {str list} -- arrêt de chaque traceur (voir iter_tracer_events)
+        """
+        historic = [[] for _ in range(self.tracers)]
+        for k, event in self.iter_tracer_events():
+            if event.kind != "advance":
+                historic[k].append((event.time, event.particle(self.epsilon_time)))
+        self.historic_tracers = historic
+        self.historic_BP = historic[0]
+
+    def iter_tracer_events(self):
+        """
+        Générateur des évènements de plusieurs traceurs (grosses particules sans interaction entre elles)
+        suivis dans le même environnement, dans l'ordre du temps.
+
+        L'environnement est généré et avancé une seule fois pour tous les traceurs. La prochaine collision
+        de chaque traceur est conservée d'un évènement à l'autre : seul le traceur de l'évènement est
+        recherché dans tout l'environnement, les autres ne testent que la petite particule déviée et les
+        particules régénérées (recherche complète si l'une d'elles était leur prochaine collision).
+        Chaque traceur se déroule comme une simulation seule : avance jusqu'à l'horizon de détection en
+        périodique, arrêt après nb_max_collisions collisions ou après la durée. Un traceur sans grosse
+        collision possible ou sorti de l'environnement est arrêté sans interrompre les autres.
+
+        Yields:
+            int -- indice du traceur
+            Event -- évènement du traceur (voir iter_events), positions relatives à son point de départ
+
+        Sauvegarde dans la classe Simulation2:
+            self.status_tracers {str list} -- arrêt de chaque traceur : None (fin normale),
+                                              "NoBigCollision" ou "OutsideEnv"
+        """
+        time = 0
+        starts = self.tracer_starts()
+        tracers = [Particle(x, y, self.speed_BP_init, theta, self.epsilon_time) for x, y, theta in starts]
+        self.status_tracers = [None] * self.tracers
+
+        def event(k, kind):
+            # Position relative au point de départ du traceur
+            return Event.from_particle(time, tracers[k], kind)._replace(x=tracers[k].x - starts[k][0],
+                                                                         y=tracers[k].y - starts[k][1])
+
+        for k in range(self.tracers):
+            yield k, event(k, "start")
+
+        # Initialisation de l'environnement commun
+        if self.dtype is None:
+            zone = Workzone_square(self.particle_number, self.dim, self.speed, self.epsilon_time, self.periodic,
+                                   self.streams, self.grid)
+        else:
+            zone = ArrayBath(self.particle_number, self.dim, self.speed, self.epsilon_time, self.periodic,
+                             self.dtype, self.streams, self.workers)
+        horizon = zone.periodic_horizon(self.speed + self.speed_BP_init) if self.periodic else None
+        if self.particle_number == 0:
+            self.status_tracers = ["NoBigCollision"] * self.tracers
+            return
+
+        # Prochaine collision de chaque traceur (indice de la particule, date absolue)
+        # et date jusqu'à laquelle la recherche est fiable
+        cible = [-1] * self.tracers
+        date = [infini] * self.tracers
+        validite = [infini] * self.tracers
+
+        def recherche(k):
+            i, t = zone.first_collision(tracers[k], infini if horizon is None else horizon)
+            validite[k] = infini if horizon is None else time + horizon
+            if i == -1 or (horizon is not None and t > horizon):
+                cible[k], date[k] = -1, infini
+            else:
+                cible[k], date[k] = i, time + t
+
+        actifs = list(range(self.tracers))
+        nb_collisions = [0] * self.tracers
+        for k in actifs:
+            recherche(k)
+
+        while actifs:
+            # Traceurs sans grosse collision possible (jamais en périodique, sauf environnement vide)
+            for j in [j for j in actifs if min(date[j], validite[j]) == infini]:
+                self.status_tracers[j] = "NoBigCollision"
+                actifs.remove(j)
+            if not actifs:
+                break
+
+            # Prochain évènement : première collision fiable ou fin de validité d'une recherche
+            k = min(actifs, key=lambda j: (min(date[j], validite[j]), j))
+            prochain = min(date[k], validite[k])
+            delta_time = prochain - time
+            time = prochain
+            zone.workzone_update_time(delta_time)
+            for j in actifs:
+                tracers[j].update_time(delta_time)
+
+            # Aucune collision fiable avant l'horizon : avance jusqu'à l'horizon et nouvelle recherche
+            if date[k] > validite[k]:
+                zone.boundary()
+                yield k, event(k, "advance")
+                if time >= self.duree:
+                    actifs.remove(k)
                 else:
-                    show_listparticles_point(ax, [BP], 'fuchsia', marker='*')
-                    circ = plt.Circle((BP.x, BP.y), radius=self.dim * coeff_affichage / 15, color='fuchsia', fill=False)
-                    ax.add_artist(circ)
+                    recherche(k)
+                continue
+
+            # Grosse collision du traceur k
+            i_argmin = cible[k]
+            nb_collisions[k] += 1
+            tracers[k].change_theta(2 * pi * self.streams.angle())
+            zone.change_theta(i_argmin, 2 * pi * self.streams.bath())
+            modifiees = [i_argmin] + zone.boundary()
+
+            if not self.periodic and not zone.inside(tracers[k].x, tracers[k].y):
+                self.status_tracers[k] = "OutsideEnv"
+                actifs.remove(k)
+            else:
+                yield k, event(k, "collision")
+                if nb_collisions[k] >= self.nb_max_collisions or time >= self.duree:
+                    actifs.remove(k)
+
+            # Mise à jour des prochaines collisions
+            for j in actifs:
+                if j == k or cible[j] in modifiees:
+                    recherche(j)
+                else:
+                    i, t = zone.first_collision_among(tracers[j], modifiees)
+                    if i != -1 and time + t < date[j] and time + t <= validite[j]:
+                        cible[j], date[j] = i, time + t
 
-                plt.title(self.title + '\nt=' + str(round(time, 4)))
-                plt.xlim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                plt.ylim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                plt.draw()
-                plt.pause(pause)
-                #####
+    def tracer(self, k):
+        """
+        Simulation réduite à un traceur, par exemple pour outils.stats(simulation.tracer(k))
+        Nécessite d'avoir exécuté un calcul avant.
 
-        if show:
-            plt.close()
+        Arguments:
+            k {int} -- indice du traceur
 
-        # Sauvegarde de l'historique de la grosse particule
-        self.historic_BP = historic_BP
-        # Sauvegarde de l'historique des petites particules pour la vidéo
-        if movie:
-            self.historic_PP = historic_PP
+        Returns:
+            Simulation2 -- copie de la simulation dont historic_BP est l'historique du traceur
+        """
+        simulation = copy.copy(self)
+        simulation.historic_BP = self.historic_tracers[k]
+        return simulation
+
+    def follow(self, zone, BP):
+        """
+        Environnement mobile : recentrage de la zone sur la grosse particule
+        lorsqu'elle s'éloigne de plus de dim/2 du centre
+
+        Arguments:
+            zone {Workzone_square} -- environnement
+            BP {Particle} -- grosse particule
+
+        Returns:
+            int list -- indices des particules régénérées
+        """
+        if abs(BP.x - zone.x_center) > self.dim / 2 or abs(BP.y - zone.y_center) > self.dim / 2:
+            return zone.recenter(BP.x, BP.y)
+        return []
 
     def traj_image(self, coeff_affichage=1):
         """
@@ -276,6 +823,8 @@ class Simulation2:
         Keyword Arguments:
             coeff_affichage {float} -- zoom de l'affichage (default: {1})
         """
+        import matplotlib.pyplot as plt
+
         historic = self.historic_BP
         fig, ax = plt.subplots()
         X = [elem[1].x for elem in historic]
@@ -297,6 +846,8 @@ class Simulation2:
             coeff_affichage {float} -- zoom de l'affichage (default: {1})
             nb_images {int} -- nombres d'images pour la vidéo (default: {300})
         """
+        import matplotlib.pyplot as plt
+
         historic_BP = self.historic_BP
         historic_PP = self.historic_PP
         fig, ax = plt.subplots()
@@ -1,9 +1,11 @@
-from .outils import Particle, show_listparticles_point, show_listparticles_vector
+from .outils import Particle, Event, DEFAULT_STREAMS
+from .affichage import LiveDisplay
+from .bath import ArrayBath
 from .simulation2 import Workzone_square, OutsideEnv
-from random import random
-import matplotlib.pyplot as plt
 import copy
-from math import pi
+from math import pi, ceil, sqrt
+
+import numpy as np
 
 # ---------------------------------------------------------------------------- #
 #                             Simulation de type 3                             #
@@ -16,8 +18,8 @@ class Workzone_square_v2(Workzone_square):
     Ajout d'une fonctionnalité de détection de collision entre toutes
     les particules de la zone.
     """
-    def __init__(self, particle_number, dim, speed, epsilon_time):
-        super().__init__(particle_number, dim, speed, epsilon_time)
+    def __init__(self, particle_number, dim, speed, epsilon_time, periodic=False, streams=None):
+        super().__init__(particle_number, dim, speed, epsilon_time, periodic, streams)
 
     def collision_zone(self):
         """
@@ -32,7 +34,7 @@ class Workzone_square_v2(Workzone_square):
         indices = -1, -1
         for i in range(0, self.particle_number - 1):
             for j in range(i + 1, self.particle_number):
-                collision, t = self.particles[i].collision(self.particles[j])
+                collision, t = self.particles[i].collision(self.particles[j], self.periodic_dim)
                 if collision and t < t_min:
                     t_min = t
                     indices = i, j
@@ -54,7 +56,7 @@ class NoBigLittleCollision(Exception):
 
 
 class Simulation3:
-    def __init__(self, nb_max_collisions=infini, duree=infini, density=10**4, speed_BP_init=1, theta_BP_init=-pi / 4, speed=1, dim=0.2, epsilon_time=0.005, limit_collision_zone=1):
+    def __init__(self, nb_max_collisions=infini, duree=infini, density=10**4, speed_BP_init=1, theta_BP_init=-pi / 4, speed=1, dim=0.2, epsilon_time=0.005, limit_collision_zone=1, periodic=False, dtype=None, streams=None, workers=1, collision_rate=None, time_step=None):
         """
         Définition de l'espace de travail pour une simulation de type 3
 
@@ -68,12 +70,26 @@ class Simulation3:
             dim {float} -- environnement carré de côté 2*dim (default: {0.2})
             epsilon_time {float} -- précision pour la détection des collisions (default: {0.005})
             limit_collision_zone {float} -- coefficient pour réduire le nombre de petites collisions (default: {1})
+            periodic {bool} -- si True : environnement périodique (torique), la grosse particule ne sort
+                               jamais de l'environnement et ses coordonnées sont conservées non repliées (default: {False})
+            dtype {str} -- si défini ("float32" ou "float64") : environnement stocké dans des tableaux numpy
+                           de cette précision (voir bath.ArrayBath), la grosse particule et le temps restent
+                           en float64 (default: {None}, listes de Particle)
+            streams {Streams} -- flux aléatoires : angles de déviation et environnement (default: {None}, générateur global)
+            workers {int} -- nombre de threads des recherches de collisions, avec dtype défini (voir bath.ArrayBath),
+                             mêmes résultats quel que soit ce nombre (default: {1})
+            collision_rate {float} -- si défini (avec dtype) : petites collisions tirées par DSMC (voir iter_events_dsmc),
+                                      nombre moyen de collisions d'une petite particule par unité de temps ;
+                                      epsilon_time ne sert plus qu'aux grosses collisions (default: {None}, calcul exact)
+            time_step {float} -- pas de temps des tirages DSMC (default: {None}, 0.1 / collision_rate)
         """
         assert nb_max_collisions != infini or duree != infini, "Choisir un nombre max de grosses collisions ou une durée max"
         if nb_max_collisions != infini:
             assert duree == infini, "Impossible de choisir à la foix un nombre max de grosses collisions et une durée max"
         if duree != infini:
             assert nb_max_collisions == infini, "Impossible de choisir à la foix un nombre max de grosses collisions et une durée max"
+        assert workers == 1 or dtype is not None, "Recherche parallèle (workers > 1) seulement avec dtype défini"
+        assert collision_rate is None or dtype is not None, "Collisions DSMC (collision_rate) seulement avec dtype défini"
 
         # Nombre de particules dans l'environnement
         self.particle_number = int(density * 4 * dim**2)
@@ -86,6 +102,14 @@ class Simulation3:
         self.dim = dim
         self.epsilon_time = epsilon_time
         self.limit_collision_zone = limit_collision_zone
+        self.periodic = periodic
+        self.dtype = dtype
+        self.streams = DEFAULT_STREAMS if streams is None else streams
+        self.workers = workers
+        self.collision_rate = collision_rate
+        if collision_rate is not None and time_step is None:
+            time_step = 0.1 / collision_rate if collision_rate > 0 else infini
+        self.time_step = time_step
 
         self.title = "Simulation de type 3"
 
@@ -97,21 +121,54 @@ class Simulation3:
         Keyword Arguments:
             show {bool} -- si True : affichage de chaque étape (default: {False})
             vector {bool} -- si True : affichage des vecteurs vitesses (si show=True) (default: {True})
-            pause {float} -- délai entre chaque affichage (si show=True) (default: {0.5})
+            pause {float} -- délai entre deux rafraîchissements de l'affichage, sans bloquer le calcul (si show=True) (default: {0.5})
             coeff_affichage {float} -- zoom de l'affichage (si show=True) (default: {1})
 
         Raises:
-            NoBigLittleCollision: Aucune grosse ou petite collision n'est possible dans le futur
-            OutsideEnv: Grosse particule en dehors de la zone
+            NoBigLittleCollision: Aucune grosse ou petite collision n'est possible dans le futur (jamais en périodique, sauf environnement vide)
+            OutsideEnv: Grosse particule en dehors de la zone (jamais en périodique)
 
         Sauvegarde dans la classe Simulation3:
             self.historic_BP {(float, Particle) list} -- historique du temps et de la grosse particule à chaque collision
         """
+        historic_BP = []
+        for event in self.iter_events(show=show, vector=vector, pause=pause, coeff_affichage=coeff_affichage):
+            if event.kind in ("start", "collision"):
+                historic_BP.append((event.time, event.particle(self.epsilon_time)))
+
+        # Sauvegarde de l'historique de la grosse particule
+        self.historic_BP = historic_BP
+
+    def iter_events(self, show=False, vector=True, pause=0.5, coeff_affichage=1, endless=False):
+        """
+        Générateur des évènements d'une simulation, calculés au fur et à mesure :
+        un évènement "start", puis un évènement "collision" par grosse collision,
+        "small_collision" par petite collision (et "advance" à chaque avance jusqu'à l'horizon en périodique),
+        ou avec collision_rate défini les évènements de iter_events_dsmc.
+        L'arrêt anticipé de la lecture arrête le calcul.
+
+        Keyword Arguments:
+            show {bool} -- si True : affichage de chaque étape (default: {False})
+            vector {bool} -- si True : affichage des vecteurs vitesses (si show=True) (default: {True})
+            pause {float} -- délai entre deux rafraîchissements de l'affichage, sans bloquer le calcul (si show=True) (default: {0.5})
+            coeff_affichage {float} -- zoom de l'affichage (si show=True) (default: {1})
+            endless {bool} -- si True : ignore nb_max_collisions et duree, le calcul s'arrête avec la lecture (default: {False})
+
+        Raises:
+            NoBigLittleCollision: Aucune grosse ou petite collision n'est possible dans le futur (jamais en périodique, sauf environnement vide)
+            OutsideEnv: Grosse particule en dehors de la zone (jamais en périodique)
+
+        Yields:
+            Event -- évènement (voir outils.Event)
+        """
+        if self.collision_rate is not None:
+            assert not show, "Affichage impossible avec les collisions DSMC"
+            yield from self.iter_events_dsmc(endless)
+            return
+
         if show:
-            fig, ax = plt.subplots()
-            plt.grid()
-            plt.xlim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-            plt.ylim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
+            display = LiveDisplay(self.title, (-coeff_affichage * self.dim, coeff_affichage * self.dim),
+                                  (-coeff_affichage * self.dim, coeff_affichage * self.dim), pause)
 
         time = 0
         nb_collision = 0
@@ -119,168 +176,223 @@ class Simulation3:
         # Initialisation de la grosse particule
         BP = Particle(0, 0, self.speed_BP_init, self.theta_BP_init, self.epsilon_time)
 
-        # Initialisation de l'historique de la grosse particule
-        historic_BP = []
-        historic_BP.append((time, copy.copy(BP)))
+        try:
+            yield Event.from_particle(time, BP, "start")
+            # La trajectoire affichée comporte aussi les positions aux petites collisions
+            if show:
+                display.point(BP.x, BP.y)
+
+            # Initialisation de l'unique environnement
+            if self.dtype is None:
+                zone = Workzone_square_v2(self.particle_number, self.dim, self.speed, self.epsilon_time / self.limit_collision_zone, self.periodic,
+                                          self.streams)
+            else:
+                zone = ArrayBath(self.particle_number, self.dim, self.speed, self.epsilon_time / self.limit_collision_zone,
+                                 self.periodic, self.dtype, self.streams, self.workers)
+            if self.periodic:
+                horizon = zone.periodic_horizon(max(2 * self.speed, self.speed + self.speed_BP_init))
+                if self.particle_number == 0:
+                    raise NoBigLittleCollision
 
-        # Historique distant pour le show car sauvegarde même lorsque pas de grosse collision
-        if show:
-            historic_BP_show = []
-            historic_BP_show.append((time, copy.copy(BP)))
+            # Boucle de calcul des grosses collisions
+            while endless or (nb_collision < self.nb_max_collisions and time < self.duree):
+                if show and vector:
+                    display.image(time, zone.particles, BP, vector=True)
+
+                # Boucle des petites collision
+                while True:
+                    # Calcul de la premiere petite collision dans la zone
+                    collision_zone, t_zone, indices = zone.collision_zone()
+                    if not collision_zone:
+                        t_zone = float("inf")
+
+                    # Calcul de la première grosse collision
+                    i_argmin, t_min = zone.first_collision(BP)
+
+                    # En périodique, les collisions au-delà de l'horizon peuvent masquer une collision
+                    # antérieure avec une autre image : on avance jusqu'à l'horizon et on recommence
+                    if self.periodic and min(t_zone, t_min) > horizon:
+                        time += horizon
+                        zone.workzone_update_time(horizon)
+                        BP.update_time(horizon)
+                        zone.wrap_inside()
+                        yield Event.from_particle(time, BP, "advance")
+                        continue
+
+                    # Cas 1 : aucune petite collision, aucune grosse collision
+                    if t_zone == float("inf") and t_min == float("inf"):
+                        raise NoBigLittleCollision
+
+                    # Cas 2 : petite collision (zone) avant grosse collision
+                    # ou : petite collision et pas de grosse collision (t_zone != inf et t_min = inf)
+                    elif t_zone < t_min:
+                        delta_time = t_zone
+
+                        # Mise à jour du temps, de la zone et de la grosse particule
+                        time += delta_time
+                        zone.workzone_update_time(delta_time)
+                        BP.update_time(delta_time)
+
+                        # Changement de l'angle de la vitesse des 2 petites particule percutées
+                        new_theta1 = 2 * pi * self.streams.bath()
+                        new_theta2 = 2 * pi * self.streams.bath()
+                        zone.change_theta(indices[0], new_theta1)
+                        zone.change_theta(indices[1], new_theta2)
+
+                        # Pas de sauvegarde dans l'historique car seulement grosse collision
+
+                        # Supression des particules en dehors de l'environnement et régénération (ou repliement en périodique)
+                        zone.boundary()
+
+                        # Vérification grosse particule toujours dans l'environnement
+                        if not self.periodic and (abs(BP.x) > self.dim or abs(BP.y) > self.dim):
+                            raise OutsideEnv
+
+                        if show:
+                            display.point(BP.x, BP.y)
+                            display.image(time, zone.particles, BP)
+
+                        yield Event.from_particle(time, BP, "small_collision")
+
+                    # Cas 3 : grosse collision avant petite collision
+                    # ou grosse collision et pas de petite collision (t_zone = inf)
+                    elif t_min <= t_zone and t_min < float('inf'):
+                        nb_collision += 1
+                        delta_time = t_min
+
+                        # Mise à jour du temps, de la zone et de la grosse particule
+                        time += delta_time
+                        zone.workzone_update_time(delta_time)
+                        BP.update_time(delta_time)
+
+                        # Changement de l'angle de la vitesse de la grosse particule
+                        new_theta = 2 * pi * self.streams.angle()
+                        BP.change_theta(new_theta)
+
+                        # Changement de l'angle de la vitesse de la petite particule percutée
+                        new_theta = 2 * pi * self.streams.bath()
+                        zone.change_theta(i_argmin, new_theta)
+
+                        # Supression des particules en dehors de l'environnement et régénération (ou repliement en périodique)
+                        zone.boundary()
+
+                        # Vérification grosse particule toujours dans l'environnement
+                        if not self.periodic and (abs(BP.x) > self.dim or abs(BP.y) > self.dim):
+                            raise OutsideEnv
+
+                        if show:
+                            display.point(BP.x, BP.y)
+                            display.image(time, zone.particles, BP, collision=True)
+
+                        yield Event.from_particle(time, BP, "collision")
+
+                    break   # On sort de la boucle While true car on a obtenu une grosse collision
+        finally:
+            if show:
+                display.close()
+
+    def iter_events_dsmc(self, endless=False):
+        """
+        Générateur des évènements d'une simulation dont les petites collisions sont tirées par DSMC
+        (option collision_rate) : les grosses collisions sont calculées exactement comme dans iter_events,
+        les petites collisions sont tirées à chaque pas de temps time_step (voir bath.ArrayBath.dsmc_collisions).
+        Un évènement "start", puis un évènement "collision" par grosse collision, "dsmc" à chaque pas
+        (et "advance" à chaque avance jusqu'à l'horizon en périodique).
+
+        La fréquence des petites collisions est un paramètre physique : une particule subit en moyenne
+        collision_rate collisions par unité de temps. Les particules ont la même vitesse v et des angles
+        uniformes, donc une vitesse relative moyenne 4v/π : pendant un pas, une paire de la même case
+        entre en collision à vitesse relative maximale 2v avec la probabilité
+        π * collision_rate * time_step * (nombre de cases) / (2 * nombre de particules).
+        Les cases ont environ un libre parcours moyen (speed / collision_rate) de côté.
 
-        # Initialisation de l'unique environnement
-        zone = Workzone_square_v2(self.particle_number, self.dim, self.speed, self.epsilon_time / self.limit_collision_zone)
+        Keyword Arguments:
+            endless {bool} -- si True : ignore nb_max_collisions et duree, le calcul s'arrête avec la lecture (default: {False})
 
-        # Boucle de calcul des grosses collisions
-        while nb_collision < self.nb_max_collisions and time < self.duree:
-            if show and vector:
-                ####
-                ax.clear()
-
-                X = [elem[1].x for elem in historic_BP_show]
-                Y = [elem[1].y for elem in historic_BP_show]
-                plt.plot(X, Y, color='red')
-
-                show_listparticles_vector(ax, zone.particles, 'blue')
-                show_listparticles_vector(ax, [BP], 'red')
-
-                plt.title(self.title + '\nt=' + str(round(time, 4)))
-                plt.xlim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                plt.ylim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                plt.draw()
-                plt.pause(pause)
-                #####
-
-            # Boucle des petites collision
-            while True:
-                # Calcul de la premiere petite collision dans la zone
-                collision_zone, t_zone, indices = zone.collision_zone()
-
-                # Calcul de la première grosse collision
-                t_min = float("inf")
-                i_argmin = -1
-                for i in range(self.particle_number):
-                    collision, t = BP.collision(zone.particles[i])
-                    if collision and t <= t_min:
-                        t_min = t
-                        i_argmin = i
-
-                # Cas 1 : aucune petite collision, aucune grosse collision
-                if t_zone == float("inf") and t_min == float("inf"):
-                    raise NoBigLittleCollision
+        Raises:
+            NoBigLittleCollision: Aucune grosse collision et aucune petite collision possible (collision_rate nul, environnement non périodique)
+            OutsideEnv: Grosse particule en dehors de la zone (jamais en périodique)
 
-                # Cas 2 : petite collision (zone) avant grosse collision
-                # ou : petite collision et pas de grosse collision (t_zone != inf et t_min = inf)
-                elif t_zone < t_min:
-                    delta_time = t_zone
-
-                    # Mise à jour du temps, de la zone et de la grosse particule
-                    time += delta_time
-                    zone.workzone_update_time(delta_time)
-                    BP.update_time(delta_time)
-
-                    # Changement de l'angle de la vitesse des 2 petites particule percutées
-                    PP1 = zone.particles[indices[0]]
-                    PP2 = zone.particles[indices[1]]
-
-                    new_theta1 = 2 * pi * random()
-                    new_theta2 = 2 * pi * random()
-                    PP1.change_theta(new_theta1)
-                    PP2.change_theta(new_theta2)
-
-                    # Sauvegarde de la grosse particule dans l'historique (seulement show)
-                    if show:
-                        historic_BP_show.append((time, copy.copy(BP)))
-                    # Pas de sauvegarde dans l'autre historique car seulement grosse collision
-
-                    # Supression des particules en dehors de l'environnement et régénération
-                    indices_suppression = zone.delete_outside()
-
-                    # Vérification grosse particule toujours dans l'environnement
-                    if abs(BP.x) > self.dim or abs(BP.y) > self.dim:
-                        raise OutsideEnv
-
-                    if show:
-                        ####
-                        ax.clear()
-
-                        X = [elem[1].x for elem in historic_BP_show]
-                        Y = [elem[1].y for elem in historic_BP_show]
-                        plt.plot(X, Y, color='red')
-
-                        show_listparticles_point(ax, zone.particles, 'blue')
-                        show_listparticles_point(ax, [zone.particles[i] for i in indices_suppression], 'green')
-                        show_listparticles_point(ax, [zone.particles[i] for i in indices], 'fuchsia', marker='*')
-                        circ = plt.Circle((zone.particles[indices[0]].x, zone.particles[indices[0]].y), radius=self.dim * coeff_affichage / 15, color='fuchsia', fill=False)
-                        ax.add_artist(circ)
-                        show_listparticles_point(ax, [BP], 'red', marker='o')
-
-                        plt.title(self.title + '\nt=' + str(round(time, 4)))
-                        plt.xlim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                        plt.ylim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                        plt.draw()
-                        plt.pause(pause)
-                        #####
-
-                # Cas 3 : grosse collision avant petite collision
-                # ou grosse collision et pas de petite collision (t_zone = inf)
-                elif t_min <= t_zone and t_min < float('inf'):
-                    nb_collision += 1
-                    delta_time = t_min
-
-                    # Mise à jour du temps, de la zone et de la grosse particule
-                    time += delta_time
-                    zone.workzone_update_time(delta_time)
-                    BP.update_time(delta_time)
-
-                    # Changement de l'angle de la vitesse de la grosse particule
-                    new_theta = 2 * pi * random()
-                    BP.change_theta(new_theta)
-
-                    # Changement de l'angle de la vitesse de la petite particule percutée
-                    PP = zone.particles[i_argmin]
-                    new_theta = 2 * pi * random()
-                    PP.change_theta(new_theta)
-
-                    # Sauvegarde de la grosse particule dans l'historique
-                    historic_BP.append((time, copy.copy(BP)))
-                    if show:
-                        historic_BP_show.append((time, copy.copy(BP)))
-
-                    # Supression des particules en dehors de l'environnement et régénération
-                    indices_suppression = zone.delete_outside()
-
-                    # Vérification grosse particule toujours dans l'environnement
-                    if abs(BP.x) > self.dim or abs(BP.y) > self.dim:
-                        raise OutsideEnv
-
-                    if show:
-                        ####
-                        ax.clear()
-
-                        X = [elem[1].x for elem in historic_BP_show]
-                        Y = [elem[1].y for elem in historic_BP_show]
-                        plt.plot(X, Y, color='red')
-
-                        show_listparticles_point(ax, zone.particles, 'blue')
-                        show_listparticles_point(ax, [zone.particles[i] for i in indices_suppression], 'green')
-                        show_listparticles_point(ax, [BP], 'fuchsia', marker='*')
-                        circ = plt.Circle((BP.x, BP.y), radius=self.dim * coeff_affichage / 15, color='fuchsia', fill=False)
-                        ax.add_artist(circ)
-                        plt.title(self.title + '\nt=' + str(round(time, 4)))
-                        plt.xlim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                        plt.ylim(-coeff_affichage * self.dim, coeff_affichage * self.dim)
-                        plt.draw()
-                        plt.pause(pause)
-                        #####
-
-                break   # On sort de la boucle While true car on a obtenu une grosse collision
+        Yields:
+            Event -- évènement (voir outils.Event)
 
-        if show:
-            plt.close()
+        Sauvegarde dans la classe Simulation3:
+            self.nb_small_collisions {int} -- nombre de petites collisions tirées
+        """
+        time = 0
+        nb_collision = 0
+        self.nb_small_collisions = 0
 
-        # Sauvegarde de l'historique de la grosse particule
-        self.historic_BP = historic_BP
+        # Initialisation de la grosse particule
+        BP = Particle(0, 0, self.speed_BP_init, self.theta_BP_init, self.epsilon_time)
+        yield Event.from_particle(time, BP, "start")
+
+        # Initialisation de l'unique environnement
+        zone = ArrayBath(self.particle_number, self.dim, self.speed, self.epsilon_time, self.periodic, self.dtype,
+                         self.streams, self.workers)
+        horizon = infini
+        if self.periodic:
+            horizon = zone.periodic_horizon(self.speed + self.speed_BP_init)
+            if self.particle_number == 0:
+                raise NoBigLittleCollision
+
+        if self.collision_rate > 0:
+            # Générateur des petites collisions, graine tirée dans le flux de l'environnement
+            rng = np.random.default_rng(int(self.streams.bath() * 2**32))
+            libre_parcours = self.speed / self.collision_rate
+            grid_size = max(1, min(ceil(2 * self.dim / libre_parcours), int(sqrt(self.particle_number))))
+            probabilite = pi * self.collision_rate * self.time_step * grid_size**2 / (2 * max(self.particle_number, 1))
+        # Durée restante avant le prochain pas
+        restant = self.time_step
+
+        # Boucle de calcul des grosses collisions
+        while endless or (nb_collision < self.nb_max_collisions and time < self.duree):
+            # La recherche n'est fiable que jusqu'au prochain pas (vitesses modifiées) et jusqu'à l'horizon
+            limite = min(restant, horizon)
+            i_argmin, t_min = zone.first_collision(BP)
+
+            # Pas de grosse collision avant la limite : avance jusqu'à la limite
+            if i_argmin == -1 or t_min > limite:
+                if limite == infini:
+                    raise NoBigLittleCollision
+                time += limite
+                zone.workzone_update_time(limite)
+                BP.update_time(limite)
+                zone.boundary()
+                if not self.periodic and (abs(BP.x) > self.dim or abs(BP.y) > self.dim):
+                    raise OutsideEnv
+                if limite == restant:
+                    # Petites collisions du pas
+                    self.nb_small_collisions += zone.dsmc_collisions(rng, probabilite, grid_size)
+                    restant = self.time_step
+                    yield Event.from_particle(time, BP, "dsmc")
+                else:
+                    restant -= limite
+                    yield Event.from_particle(time, BP, "advance")
+                continue
+
+            # Grosse collision
+            nb_collision += 1
+            delta_time = t_min
+            time += delta_time
+            restant -= delta_time
+            zone.workzone_update_time(delta_time)
+            BP.update_time(delta_time)
+
+            # Changement de l'angle de la vitesse de la grosse particule et de la petite particule percutée
+            new_theta = 2 * pi * self.streams.angle()
+            BP.change_theta(new_theta)
+            new_theta = 2 * pi * self.streams.bath()
+            zone.change_theta(i_argmin, new_theta)
+
+            # Supression des particules en dehors de l'environnement et régénération (ou repliement en périodique)
+            zone.boundary()
+
+            # Vérification grosse particule toujours dans l'environnement
+            if not self.periodic and (abs(BP.x) > self.dim or abs(BP.y) > self.dim):
+                raise OutsideEnv
+
+            yield Event.from_particle(time, BP, "collision")
 
     def traj_image(self, coeff_affichage=1):
         """
@@ -290,6 +402,8 @@ class Simulation3:
         Keyword Arguments:
             coeff_affichage {float} -- zoom de l'affichage (default: {1})
         """
+        import matplotlib.pyplot as plt
+
         historic = self.historic_BP
         fig, ax = plt.subplots()
         X = [elem[1].x for elem in historic]
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+Modèles de substitution de la grosse particule, calibrés sur des résultats des modèles 1 à 3, pour
+générer rapidement beaucoup de trajectoires (calcul vectorisé numpy, sans environnement) :
+
+- CTRW : marche aléatoire en temps continu. Les segments entre deux collisions sont tirés
+  indépendamment dans la distribution empirique des couples (libre parcours, durée), avec une
+  direction uniforme (les angles de déviation des modèles sont uniformes). Reproduit la fréquence
+  des collisions, le lpm et la diffusion ; les corrélations entre segments successifs sont ignorées.
+- Langevin : vitesse de la grosse particule en processus d'Ornstein-Uhlenbeck, de même coefficient
+  de diffusion et de même vitesse quadratique moyenne que les segments. Positions aux dates
+  demandées, tirées exactement (sans erreur de discrétisation) ; pas de collisions.
+
+Les modèles se calibrent sur des trajectoires (temps et positions au départ et à chaque collision,
+voir ensemble.run_simulation(trajectory=True) et arena.EnsembleArena.trajectory) ou, à défaut, sur
+les enregistrements d'un ensemble (fréquence et lpm moyens, durées entre collisions exponentielles).
+
+check compare un modèle de substitution aux trajectoires du modèle microscopique : mêmes mesures
+calculées de la même façon (outils1_1.RaggedTrajectories), distance de Kolmogorov-Smirnov et écart
+relatif des moyennes, et déplacement quadratique moyen à quelques dates.
+"""
+import numpy as np
+
+from .comparison import ks_distance
+from .outils1_1 import RaggedTrajectories
+
+# ---------------------------------------------------------------------------- #
+#                                  Calibration                                 #
+# ---------------------------------------------------------------------------- #
+
+
+def segments(trajectories):
+    """
+    Libres parcours et durées entre deux collisions successives
+
+    Arguments:
+        trajectories {iterable} -- trajectoires (T, X, Y) : temps et positions au départ et à chaque collision
+
+    Returns:
+        np.ndarray -- longueurs des segments
+        np.ndarray -- durées des segments
+    """
+    longueurs, durees = [], []
+    for T, X, Y in trajectories:
+        T, X, Y = (np.asarray(v, dtype=np.float64) for v in (T, X, Y))
+        longueurs.append(np.hypot(np.diff(X), np.diff(Y)))
+        durees.append(np.diff(T))
+    longueurs = np.concatenate(longueurs) if longueurs else np.zeros(0)
+    durees = np.concatenate(durees) if durees else np.zeros(0)
+    assert len(durees) > 0, "Aucune collision dans les trajectoires de calibration"
+    return longueurs, durees
+
+
+def _exponential_segments(records, n_samples, rng):
+    """
+    Segments tirés d'après la fréquence et le lpm moyens d'un ensemble : durées exponentielles
+    de moyenne 1 / fréquence, vitesse constante lpm * fréquence
+
+    Returns:
+        np.ndarray -- longueurs des segments
+        np.ndarray -- durées des segments
+    """
+    if hasattr(records, "to_dict"):
+        records = records.to_dict("records")
+    frequence = np.nanmean([record["Fréquence"] for record in records])
+    l_p_m = np.nanmean([record["lpm"] for record in records])
+    durees = rng.exponential(1 / frequence, n_samples)
+    return l_p_m * frequence * durees, durees
+
+
+def _positions(T, X, Y, dates):
+    """
+    Positions aux dates demandées, par interpolation linéaire entre les collisions
+    (trajectoires de même longueur, une par ligne)
+
+    Returns:
+        np.ndarray -- coordonnées x et y, de forme (nombre de trajectoires, nombre de dates)
+    """
+    lignes = np.arange(len(T))[:, None]
+    k = np.clip((T[:, :, None] <= np.asarray(dates)[None, None, :]).sum(axis=1) - 1, 0, T.shape[1] - 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = np.clip(np.nan_to_num((dates - T[lignes, k]) / (T[lignes, k + 1] - T[lignes, k])), 0, 1)
+    x = X[lignes, k] + alpha * (X[lignes, k + 1] - X[lignes, k])
+    y = Y[lignes, k] + alpha * (Y[lignes, k + 1] - Y[lignes, k])
+    return x, y
+
+
+# ---------------------------------------------------------------------------- #
+#                                   Modèles                                    #
+# ---------------------------------------------------------------------------- #
+
+
+class CTRW:
+    """
+    Marche aléatoire en temps continu : segments (libre parcours, durée) tirés dans une distribution
+    empirique, directions uniformes
+    """
+    def __init__(self, longueurs, durees):
+        """
+        Arguments:
+            longueurs {np.ndarray} -- libres parcours de la distribution empirique
+            durees {np.ndarray} -- durées correspondantes
+        """
+        self.longueurs = np.asarray(longueurs, dtype=np.float64)
+        self.durees = np.asarray(durees, dtype=np.float64)
+        assert len(self.longueurs) == len(self.durees) > 0, "Un libre parcours par durée"
+
+    @classmethod
+    def calibrate(cls, trajectories):
+        """
+        Arguments:
+            trajectories {iterable} -- trajectoires (T, X, Y) du modèle microscopique
+
+        Returns:
+            CTRW -- modèle de distribution empirique des segments des trajectoires
+        """
+        return cls(*segments(trajectories))
+
+    @classmethod
+    def from_records(cls, records, n_samples=10**5, seed=None):
+        """
+        Arguments:
+            records {dict list} -- enregistrements d'un ensemble (ou pandas.DataFrame), avec "Fréquence" et "lpm"
+
+        Keyword Arguments:
+            n_samples {int} -- taille de la distribution des segments (default: {10**5})
+            seed {int} -- graine des tirages (default: {None})
+
+        Returns:
+            CTRW -- modèle de durées exponentielles et de vitesse constante
+        """
+        return cls(*_exponential_segments(records, n_samples, np.random.default_rng(seed)))
+
+    @property
+    def frequency(self):
+        """
+        Returns:
+            float -- fréquence des collisions
+        """
+        return 1 / self.durees.mean()
+
+    @property
+    def lpm(self):
+        """
+        Returns:
+            float -- libre parcours moyen
+        """
+        return self.longueurs.mean()
+
+    @property
+    def diffusion(self):
+        """
+        Returns:
+            float -- coefficient de diffusion (déplacement quadratique moyen ~ 4 * diffusion * t)
+        """
+        return np.mean(self.longueurs**2) / (4 * self.durees.mean())
+
+    def generate(self, n, nb_collisions, rng=None):
+        """
+        Génération de trajectoires partant de l'origine
+
+        Arguments:
+            n {int} -- nombre de trajectoires
+            nb_collisions {int} -- nombre de collisions de chaque trajectoire
+
+        Keyword Arguments:
+            rng {np.random.Generator} -- générateur aléatoire (default: {None}, nouveau générateur)
+
+        Returns:
+            np.ndarray -- temps, x et y au départ et à chaque collision, de forme (n, nb_collisions + 1)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        tirages = rng.integers(0, len(self.durees), size=(n, nb_collisions))
+        angles = 2 * np.pi * rng.random((n, nb_collisions))
+        longueurs = self.longueurs[tirages]
+        zeros = np.zeros((n, 1))
+        T = np.concatenate((zeros, np.cumsum(self.durees[tirages], axis=1)), axis=1)
+        X = np.concatenate((zeros, np.cumsum(longueurs * np.cos(angles), axis=1)), axis=1)
+        Y = np.concatenate((zeros, np.cumsum(longueurs * np.sin(angles), axis=1)), axis=1)
+        return T, X, Y
+
+    def sample_measures(self, n, nb_collisions, rng=None, chunk=10**5):
+        """
+        Mesures de n trajectoires générées par paquets (mémoire bornée pour des millions de trajectoires)
+
+        Arguments:
+            n {int} -- nombre de trajectoires
+            nb_collisions {int} -- nombre de collisions de chaque trajectoire
+
+        Keyword Arguments:
+            rng {np.random.Generator} -- générateur aléatoire (default: {None}, nouveau générateur)
+            chunk {int} -- nombre de trajectoires par paquet (default: {10**5})
+
+        Returns:
+            dict -- mesures de chaque trajectoire (np.ndarray) : "Fréquence", "lpm", "Distance moyenne",
+                    "Distance max" et "Nb collisions" (voir outils1_1.RaggedTrajectories.stats)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        paquets = []
+        for debut in range(0, n, chunk):
+            T, X, Y = self.generate(min(chunk, n - debut), nb_collisions, rng)
+            paquets.append(_measures(T, X, Y))
+        return {cle: np.concatenate([paquet[cle] for paquet in paquets]) for cle in paquets[0]}
+
+
+class Langevin:
+    """
+    Vitesse de la grosse particule en processus d'Ornstein-Uhlenbeck (chaque composante)
+    """
+    def __init__(self, diffusion, relaxation):
+        """
+        Arguments:
+            diffusion {float} -- coefficient de diffusion D (déplacement quadratique moyen ~ 4 D t)
+            relaxation {float} -- temps de relaxation de la vitesse
+        """
+        self.diffusion = diffusion
+        self.relaxation = relaxation
+
+    @classmethod
+    def calibrate(cls, trajectories):
+        """
+        Calibration sur les segments des trajectoires : même coefficient de diffusion
+        E[l²] / (4 E[τ]), et même variance de la vitesse E[l² / τ] / (2 E[τ]) par composante,
+        moyenne sur le temps (temps de relaxation E[l²] / (2 E[l² / τ]), 1 / fréquence pour une
+        vitesse constante et des durées exponentielles)
+
+        Arguments:
+            trajectories {iterable} -- trajectoires (T, X, Y) du modèle microscopique
+
+        Returns:
+            Langevin -- modèle calibré
+        """
+        return cls._from_segments(*segments(trajectories))
+
+    @classmethod
+    def from_records(cls, records, n_samples=10**5, seed=None):
+        """
+        Arguments:
+            records {dict list} -- enregistrements d'un ensemble (ou pandas.DataFrame), avec "Fréquence" et "lpm"
+
+        Keyword Arguments:
+            n_samples {int} -- nombre de segments tirés pour la calibration (default: {10**5})
+            seed {int} -- graine des tirages (default: {None})
+
+        Returns:
+            Langevin -- modèle calibré sur des durées exponentielles et une vitesse constante
+        """
+        return cls._from_segments(*_exponential_segments(records, n_samples, np.random.default_rng(seed)))
+
+    @classmethod
+    def _from_segments(cls, longueurs, durees):
+        carres = np.mean(longueurs**2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vitesses = np.nanmean(np.where(durees > 0, longueurs**2 / durees, np.nan))
+        return cls(carres / (4 * durees.mean()), carres / (2 * vitesses))
+
+    def generate(self, n, dates, rng=None):
+        """
+        Génération de trajectoires partant de l'origine, vitesse initiale tirée dans la loi stationnaire.
+        Chaque pas est tiré exactement (loi jointe gaussienne de la position et de la vitesse).
+
+        Arguments:
+            n {int} -- nombre de trajectoires
+            dates {float list} -- dates croissantes des positions
+
+        Keyword Arguments:
+            rng {np.random.Generator} -- générateur aléatoire (default: {None}, nouveau générateur)
+
+        Returns:
+            np.ndarray -- x et y aux dates, de forme (n, nombre de dates)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        tau = self.relaxation
+        variance = self.diffusion / tau
+        dates = np.asarray(dates, dtype=np.float64)
+        pas = np.diff(np.concatenate(([0], dates)))
+        mu = np.exp(-pas / tau)
+        # Variances et covariance de la vitesse et de la position après un pas, vitesse initiale connue
+        var_v = variance * (1 - mu**2)
+        var_x = variance * tau**2 * (2 * pas / tau - 3 + 4 * mu - mu**2)
+        cov = variance * tau * (1 - mu)**2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = np.nan_to_num(cov / np.sqrt(var_v))
+        b = np.sqrt(np.maximum(var_x - a**2, 0))
+
+        positions = []
+        for _ in range(2):
+            v = rng.normal(0, np.sqrt(variance), n)
+            x = np.zeros(n)
+            colonnes = []
+            for k in range(len(dates)):
+                xi1 = rng.standard_normal(n)
+                xi2 = rng.standard_normal(n)
+                x = x + v * tau * (1 - mu[k]) + a[k] * xi1 + b[k] * xi2
+                v = v * mu[k] + np.sqrt(var_v[k]) * xi1
+                colonnes.append(x)
+            positions.append(np.stack(colonnes, axis=1))
+        return positions[0], positions[1]
+
+
+# ---------------------------------------------------------------------------- #
+#                                  Vérification                                #
+# ---------------------------------------------------------------------------- #
+
+
+def _measures(T, X, Y, lengths=None):
+    """
+    Mesures de trajectoires de même longueur (une par ligne), ou des lengths premiers points de chaque ligne
+    """
+    if lengths is None:
+        lengths = np.full(len(T), T.shape[1])
+    masque = np.arange(T.shape[1])[None, :] < lengths[:, None]
+    mesures = RaggedTrajectories(X[masque], Y[masque], lengths).stats()
+    duree = T[np.arange(len(T)), lengths - 1]
+    mesures["Fréquence"] = np.full(len(T), np.nan)
+    np.divide(mesures["Nb collisions"], duree, out=mesures["Fréquence"], where=duree > 0)
+    return mesures
+
+
+def _ligne(mesure, micro, substitution):
+    micro = micro[~np.isnan(micro)]
+    substitution = substitution[~np.isnan(substitution)]
+    ks, p_ks = ks_distance(micro, substitution)
+    return {"Mesure": mesure, "Microscopique": float(micro.mean()), "Substitution": float(substitution.mean()),
+            "Écart relatif": float(substitution.mean() / micro.mean() - 1), "KS": ks, "p-value KS": p_ks}
+
+
+def check(surrogate, trajectories, n=10**4, nb_dates=3, seed=None):
+    """
+    Comparaison d'un modèle de substitution aux trajectoires du modèle microscopique
+
+    Les mesures des collisions (Fréquence, lpm, Distance moyenne, Distance max : CTRW seulement) sont
+    calculées sur des trajectoires de substitution ayant la même distribution du nombre de collisions.
+    Le déplacement quadratique est comparé à nb_dates dates régulières jusqu'à la plus courte des
+    durées des trajectoires microscopiques.
+
+    Arguments:
+        surrogate {CTRW or Langevin} -- modèle de substitution
+        trajectories {iterable} -- trajectoires (T, X, Y) du modèle microscopique
+
+    Keyword Arguments:
+        n {int} -- nombre de trajectoires de substitution (default: {10**4})
+        nb_dates {int} -- nombre de dates du déplacement quadratique (default: {3})
+        seed {int} -- graine des tirages (default: {None})
+
+    Returns:
+        dict list -- une ligne par mesure : "Mesure", "Microscopique" et "Substitution" (moyennes),
+                     "Écart relatif" des moyennes, "KS" et "p-value KS" (voir comparison.ks_distance)
+    """
+    rng = np.random.default_rng(seed)
+    trajectories = [tuple(np.asarray(v, dtype=np.float64) for v in trajectoire) for trajectoire in trajectories]
+    trajectories = [trajectoire for trajectoire in trajectories if len(trajectoire[0]) > 1]
+    assert trajectories, "Aucune collision dans les trajectoires microscopiques"
+    dates = np.linspace(0, min(T[-1] for T, _, _ in trajectories), nb_dates + 1)[1:]
+
+    # Déplacement quadratique du modèle microscopique aux dates
+    carres_micro = np.array([np.interp(dates, T, X)**2 + np.interp(dates, T, Y)**2 for T, X, Y in trajectories])
+
+    lignes = []
+    if isinstance(surrogate, CTRW):
+        micro = _measures(*_padded(trajectories))
+        lengths = np.array([len(T) for T, _, _ in trajectories])
+        # Assez de collisions pour couvrir la dernière date
+        moyenne = dates[-1] * surrogate.frequency
+        nb_collisions = max(int(lengths.max()) - 1, int(moyenne + 10 * np.sqrt(moyenne) + 10))
+        T, X, Y = surrogate.generate(n, nb_collisions, rng)
+        substitution = _measures(T, X, Y, rng.choice(lengths, n))
+        for mesure in ("Fréquence", "lpm", "Distance moyenne", "Distance max"):
+            lignes.append(_ligne(mesure, micro[mesure], substitution[mesure]))
+        x, y = _positions(T, X, Y, dates)
+    else:
+        x, y = surrogate.generate(n, dates, rng)
+    carres = x**2 + y**2
+    for k, date in enumerate(dates):
+        lignes.append(_ligne("Déplacement quadratique t=" + format(date, ".4g"), carres_micro[:, k], carres[:, k]))
+    return lignes
+
+
+def _padded(trajectories):
+    """
+    Trajectoires de longueurs différentes complétées (par leur dernier point) en tableaux rectangulaires
+
+    Returns:
+        np.ndarray -- temps, x et y, une trajectoire par ligne
+        np.ndarray -- nombre de points de chaque trajectoire
+    """
+    lengths = np.array([len(T) for T, _, _ in trajectories])
+    tableaux = []
+    for i in range(3):
+        tableau = np.empty((len(trajectories), lengths.max()))
+        for ligne, trajectoire in enumerate(trajectories):
+            tableau[ligne, :lengths[ligne]] = trajectoire[i]
+            tableau[ligne, lengths[ligne]:] = trajectoire[i][-1]
+        tableaux.append(tableau)
+    return tableaux[0], tableaux[1], tableaux[2], lengths
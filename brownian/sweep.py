@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Balayage de paramètres : chaque point d'une grille donne un ensemble de simulations,
+exécutées en parallèle et mémorisées dans un cache sur disque adressé par contenu.
+
+La clé d'une simulation est l'empreinte de (modèle, paramètres, graine, version du code) :
+relancer un balayage après l'ajout d'un point ne calcule que ce point, et un balayage
+interrompu reprend où il s'était arrêté (chaque résultat est écrit dès qu'il est obtenu).
+"""
+import hashlib
+import itertools
+import json
+import multiprocessing
+import numbers
+import os
+import tempfile
+
+from .ensemble import _run_simulation
+
+# ---------------------------------------------------------------------------- #
+#                                     Cache                                    #
+# ---------------------------------------------------------------------------- #
+
+
+def code_version():
+    """
+    Empreinte des sources du package : un changement de code invalide les résultats mémorisés
+
+    Returns:
+        str -- empreinte hexadécimale
+    """
+    empreinte = hashlib.sha256()
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    for nom in sorted(os.listdir(dossier)):
+        if nom.endswith(".py"):
+            with open(os.path.join(dossier, nom), "rb") as f:
+                empreinte.update(nom.encode())
+                empreinte.update(f.read())
+    return empreinte.hexdigest()
+
+
+def _normalise(valeur):
+    """
+    Forme canonique JSON d'une valeur de paramètre : nombres entiers (10 et 10.0, entiers numpy)
+    ramenés à int, autres réels à float, tuples à des listes
+
+    Raises:
+        TypeError: valeur non représentable en JSON (objet sans représentation stable)
+    """
+    if valeur is None or isinstance(valeur, (bool, str)):
+        return valeur
+    if isinstance(valeur, numbers.Integral):
+        return int(valeur)
+    if isinstance(valeur, numbers.Real):
+        valeur = float(valeur)
+        return int(valeur) if valeur.is_integer() else valeur
+    if isinstance(valeur, (list, tuple)):
+        return [_normalise(element) for element in valeur]
+    if isinstance(valeur, dict):
+        if not all(isinstance(cle, str) for cle in valeur):
+            raise TypeError("Clés de paramètres non textuelles : " + repr(list(valeur)))
+        return {cle: _normalise(element) for cle, element in valeur.items()}
+    raise TypeError("Paramètre non sérialisable en JSON, impossible de le mettre en cache : " + repr(valeur))
+
+
+def job_key(modele, params, seed, version):
+    """
+    Clé d'une simulation dans le cache
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du modèle (valeurs JSON : nombres, textes, listes, dictionnaires)
+        seed {int} -- graine
+        version {str} -- version du code (voir code_version)
+
+    Raises:
+        TypeError: paramètre non sérialisable en JSON (par exemple un objet Streams)
+
+    Returns:
+        str -- empreinte hexadécimale
+    """
+    contenu = json.dumps(_normalise({"modele": modele, "params": params, "seed": seed, "version": version}),
+                         sort_keys=True)
+    return hashlib.sha256(contenu.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache de résultats sur disque : un fichier JSON par simulation, nommé par sa clé.
+    Au-delà de max_size octets, les résultats les moins récemment utilisés sont supprimés.
+    """
+    def __init__(self, directory, max_size=10**9):
+        """
+        Arguments:
+            directory {str} -- dossier du cache (créé si besoin)
+
+        Keyword Arguments:
+            max_size {int} -- taille maximale du cache en octets (default: {10**9})
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        """
+        Arguments:
+            key {str} -- clé d'une simulation
+
+        Returns:
+            str -- chemin du fichier de résultat
+        """
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        """
+        Arguments:
+            key {str} -- clé d'une simulation
+
+        Returns:
+            dict -- résultat mémorisé, None si absent
+        """
+        chemin = self.path(key)
+        try:
+            with open(chemin) as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(chemin)    # Résultat récemment utilisé
+        self.hits += 1
+        return record
+
+    def put(self, key, record):
+        """
+        Écriture atomique d'un résultat
+
+        Arguments:
+            key {str} -- clé d'une simulation
+            record {dict} -- résultat
+        """
+        chemin = self.path(key)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        descripteur, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix=".tmp")
+        with os.fdopen(descripteur, "w") as f:
+            json.dump(record, f)
+        os.replace(temporaire, chemin)
+
+    def files(self):
+        """
+        Returns:
+            (str, int, float) list -- chemin, taille et date de dernière utilisation de chaque résultat
+        """
+        fichiers = []
+        for racine, _, noms in os.walk(self.directory):
+            for nom in noms:
+                if nom.endswith(".json"):
+                    chemin = os.path.join(racine, nom)
+                    etat = os.stat(chemin)
+                    fichiers.append((chemin, etat.st_size, etat.st_mtime))
+        return fichiers
+
+    def size(self):
+        """
+        Returns:
+            int -- taille totale du cache en octets
+        """
+        return sum(taille for _, taille, _ in self.files())
+
+    def evict(self):
+        """
+        Suppression des résultats les moins récemment utilisés jusqu'à respecter max_size
+
+        Returns:
+            int -- nombre de résultats supprimés
+        """
+        fichiers = sorted(self.files(), key=lambda fichier: fichier[2])
+        total = sum(taille for _, taille, _ in fichiers)
+        nb = 0
+        for chemin, taille, _ in fichiers:
+            if total <= self.max_size:
+                break
+            os.remove(chemin)
+            total -= taille
+            nb += 1
+        return nb
+
+
+# ---------------------------------------------------------------------------- #
+#                                   Balayage                                   #
+# ---------------------------------------------------------------------------- #
+
+
+def expand_grid(grille):
+    """
+    Produit cartésien d'une grille de paramètres
+
+    Arguments:
+        grille {dict} -- valeurs de chaque paramètre, par ex. {"density": [10**3, 10**4], "speed": [1, 10]}
+
+    Returns:
+        dict list -- un dictionnaire de paramètres par point de la grille
+    """
+    return [dict(zip(grille, valeurs)) for valeurs in itertools.product(*grille.values())]
+
+
+def sweep(modele, params, grille, n, seed=0, cache=None, processes=None):
+    """
+    Balayage d'une grille : n simulations par point, les graines seed, ..., seed + n - 1
+    étant communes à tous les points.
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres communs à tous les points
+        grille {dict} -- valeurs des paramètres variables (voir expand_grid)
+        n {int} -- nombre de simulations par point
+
+    Keyword Arguments:
+        seed {int} -- première graine (default: {0})
+        cache {ResultCache} -- cache des résultats (default: {None}, pas de mémorisation)
+        processes {int} -- nombre de processus, 1 pour un calcul séquentiel (default: {None}, tous les cœurs)
+
+    Returns:
+        dict list -- enregistrements des simulations (voir ensemble.run_simulation),
+                     complétés par les valeurs des paramètres variables
+    """
+    version = code_version()
+    points = expand_grid(grille)
+
+    records = {}
+    taches = []
+    for point in points:
+        params_point = {**params, **point}
+        for graine in range(seed, seed + n):
+            cle = job_key(modele, params_point, graine, version)
+            record = cache.get(cle) if cache is not None else None
+            if record is None:
+                taches.append((cle, (modele, params_point, graine)))
+            else:
+                records[cle] = record
+
+    def enregistrement(cle, record):
+        records[cle] = record
+        if cache is not None:
+            cache.put(cle, record)
+
+    if processes == 1:
+        for cle, tache in taches:
+            enregistrement(cle, _run_simulation(tache))
+    elif taches:
+        with multiprocessing.Pool(processes=processes) as pool:
+            resultats = pool.imap_unordered(_run_keyed, taches)
+            for cle, record in resultats:
+                enregistrement(cle, record)
+
+    if cache is not None:
+        cache.evict()
+
+    # Résultats dans l'ordre de la grille
+    resultats = []
+    for point in points:
+        params_point = {**params, **point}
+        for graine in range(seed, seed + n):
+            record = dict(records[job_key(modele, params_point, graine, version)])
+            record.update(point)
+            resultats.append(record)
+    return resultats
+
+
+def _run_keyed(tache):
+    cle, args = tache
+    return cle, _run_simulation(args)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Réduction de variance des ensembles de simulations.
+
+Les simulations sont calculées avec des flux aléatoires séparés (voir outils.Streams) :
+- nombres aléatoires communs : deux ensembles de mêmes graines partagent les angles de
+  déviation de la grosse particule, même si leurs environnements consomment un nombre
+  différent de tirages ; la différence de deux paramètres est estimée sur des paires corrélées,
+- angles antithétiques : chaque simulation est doublée d'une simulation de même graine dont
+  les angles de déviation sont symétriques (u remplacé par 1 - u),
+- environnements initiaux tirés dans une suite de Sobol brouillée (option sobol).
+
+Les estimateurs renvoient l'estimation, son erreur type et le facteur de réduction de variance
+par rapport à des simulations indépendantes en nombre égal (1 : aucun gain). Les simulations
+interrompues (mesure nan) sont retirées avec leur paire.
+"""
+import statistics
+from math import isnan, sqrt
+
+from .ensemble import new_seeds, run_ensemble
+
+# ---------------------------------------------------------------------------- #
+#                                   Ensembles                                  #
+# ---------------------------------------------------------------------------- #
+
+
+def run_common(modele, params_a, params_b, n, seeds=None, processes=None, sobol=False):
+    """
+    Calcul de deux ensembles de n simulations avec des nombres aléatoires communs
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params_a {dict} -- paramètres du premier ensemble (voir ensemble.run_simulation)
+        params_b {dict} -- paramètres du second ensemble
+        n {int} -- nombre de simulations de chaque ensemble
+
+    Keyword Arguments:
+        seeds {int list} -- graines des simulations (default: {None}, graines aléatoires)
+        processes {int} -- nombre de processus, 1 pour un calcul séquentiel (default: {None}, tous les cœurs)
+        sobol {bool} -- si True : environnements initiaux de Sobol (default: {False})
+
+    Returns:
+        dict list -- enregistrements du premier ensemble
+        dict list -- enregistrements du second ensemble, la i-ème simulation partage les tirages
+                     de la i-ème du premier
+    """
+    if seeds is None:
+        seeds = new_seeds(n)
+    variance = {"sobol": sobol}
+    records_a = run_ensemble(modele, params_a, n, seeds, processes, variance)
+    records_b = run_ensemble(modele, params_b, n, seeds, processes, variance)
+    return records_a, records_b
+
+
+def run_antithetic(modele, params, n, seeds=None, processes=None, sobol=False):
+    """
+    Calcul de n paires de simulations antithétiques
+
+    Arguments:
+        modele {str} -- "1", "1.1", "2" ou "3"
+        params {dict} -- paramètres du modèle (voir ensemble.run_simulation)
+        n {int} -- nombre de paires
+
+    Keyword Arguments:
+        seeds {int list} -- graines des paires (default: {None}, graines aléatoires)
+        processes {int} -- nombre de processus, 1 pour un calcul séquentiel (default: {None}, tous les cœurs)
+        sobol {bool} -- si True : environnements initiaux de Sobol (default: {False})
+
+    Returns:
+        dict list -- enregistrements des simulations
+        dict list -- enregistrements des simulations antithétiques, dans le même ordre
+    """
+    if seeds is None:
+        seeds = new_seeds(n)
+    records = run_ensemble(modele, params, n, seeds, processes, {"sobol": sobol})
+    records_anti = run_ensemble(modele, params, n, seeds, processes, {"sobol": sobol, "antithetic": True})
+    return records, records_anti
+
+
+# ---------------------------------------------------------------------------- #
+#                                  Estimateurs                                 #
+# ---------------------------------------------------------------------------- #
+
+
+def _paires(records_a, records_b, mesure):
+    """
+    Returns:
+        (float, float) list -- valeurs de la mesure des paires dont les deux simulations ont abouti
+    """
+    assert len(records_a) == len(records_b), "Les deux ensembles doivent être appariés"
+    paires = [(a[mesure], b[mesure]) for a, b in zip(records_a, records_b)]
+    paires = [(a, b) for a, b in paires if not (isnan(a) or isnan(b))]
+    assert len(paires) >= 2, "Au moins deux paires abouties sont nécessaires"
+    return paires
+
+
+def _reduction(variance_independante, variance):
+    if variance == 0:
+        return float("inf")
+    return variance_independante / variance
+
+
+def paired_difference(records_a, records_b, mesure):
+    """
+    Différence moyenne d'une mesure entre deux ensembles appariés (nombres aléatoires communs)
+
+    Arguments:
+        records_a {dict list} -- enregistrements du premier ensemble
+        records_b {dict list} -- enregistrements du second ensemble (voir run_common)
+        mesure {str} -- colonne des enregistrements, par exemple "lpm"
+
+    Returns:
+        dict -- "Estimation" (moyenne de a - b), "Erreur type", "Réduction de variance"
+                (var(a) + var(b)) / var(a - b), "n" (nombre de paires utilisées)
+    """
+    paires = _paires(records_a, records_b, mesure)
+    differences = [a - b for a, b in paires]
+    variance = statistics.variance(differences)
+    variance_independante = (statistics.variance([a for a, _ in paires]) +
+                             statistics.variance([b for _, b in paires]))
+    return {"Estimation": statistics.mean(differences), "Erreur type": sqrt(variance / len(paires)),
+            "Réduction de variance": _reduction(variance_independante, variance), "n": len(paires)}
+
+
+def antithetic_mean(records, records_anti, mesure):
+    """
+    Moyenne d'une mesure estimée sur des paires antithétiques
+
+    Arguments:
+        records {dict list} -- enregistrements des simulations
+        records_anti {dict list} -- enregistrements des simulations antithétiques (voir run_antithetic)
+        mesure {str} -- colonne des enregistrements, par exemple "lpm"
+
+    Returns:
+        dict -- "Estimation" (moyenne des paires), "Erreur type", "Réduction de variance"
+                var(X) / (2 var((X + X') / 2)), "n" (nombre de paires utilisées)
+    """
+    paires = _paires(records, records_anti, mesure)
+    moyennes = [(a + b) / 2 for a, b in paires]
+    variance = statistics.variance(moyennes)
+    variance_independante = statistics.variance([valeur for paire in paires for valeur in paire]) / 2
+    return {"Estimation": statistics.mean(moyennes), "Erreur type": sqrt(variance / len(paires)),
+            "Réduction de variance": _reduction(variance_independante, variance), "n": len(paires)}
+
+
+def variance_ratio(records_ref, records, mesure):
+    """
+    Réduction de variance d'un ensemble par rapport à un ensemble de référence de même taille
+    (par exemple environnements de Sobol contre environnements indépendants)
+
+    Arguments:
+        records_ref {dict list} -- enregistrements de référence
+        records {dict list} -- enregistrements comparés
+        mesure {str} -- colonne des enregistrements, par exemple "lpm"
+
+    Returns:
+        dict -- "Estimation" (moyenne de records), "Erreur type", "Réduction de variance"
+                var(référence) / var(records), "n" (nombre de simulations utilisées)
+    """
+    valeurs_ref = [record[mesure] for record in records_ref if not isnan(record[mesure])]
+    valeurs = [record[mesure] for record in records if not isnan(record[mesure])]
+    assert len(valeurs_ref) >= 2 and len(valeurs) >= 2, "Au moins deux simulations abouties sont nécessaires"
+    variance = statistics.variance(valeurs)
+    return {"Estimation": statistics.mean(valeurs), "Erreur type": sqrt(variance / len(valeurs)),
+            "Réduction de variance": _reduction(statistics.variance(valeurs_ref), variance), "n": len(valeurs)}
@@ -11,8 +11,7 @@ import psutil
 
 from brownian.simulation1 import Simulation1
 from brownian.outils import stats
-from brownian.simulation1_1 import BrownianMotion1_1
-from brownian.outils1_1 import statsSimulations
+from brownian.arena import run_ensemble_shared
 from brownian.simulation2 import Simulation2, NoBigCollision, OutsideEnv
 from brownian.simulation3 import Simulation3, NoBigLittleCollision
 
@@ -22,8 +21,6 @@ DUREE = 1
 
 a = Simulation1(duree=DUREE, density=10**4, epsilon_time=10**-4, time_interval=10**-2, speed=10, speed_BP_init=0.1)
 
-a1 = BrownianMotion1_1(epsilon=10**-4, n_etoile=10**4, v=10, V=0.1, h=10**-3)
-
 b = Simulation2(duree=DUREE, density=10**4, epsilon_time=10**-4, dim=2, speed=10, speed_BP_init=0.1)
 
 c = Simulation3(duree=DUREE, density=10**4, epsilon_time=10**-4, dim=0.05, speed=10, speed_BP_init=0.1)
@@ -33,9 +30,8 @@ def modele1(i):
     a.calcul()
     return a.nb_no_collision, stats(a)
 
-def modele1_1(i):
-    X, Y = a1.simulation(1024)
-    return X, Y
+# Le modèle 1.1 renvoie ses trajectoires par une arène partagée (voir brownian.arena)
+params1_1 = dict(epsilon=10**-4, n_etoile=10**4, v=10, V=0.1, h=10**-3, nb_etapes=1024)
 
 def modele2(i):
     try:
@@ -77,14 +73,8 @@ if __name__ == '__main__':
     print("\nTemps d'exécution :", tm.time() - temps1)
 
     temps1_1 = tm.time()
-    pool = multiprocessing.Pool(processes=nb_process)
-    pool_outputs = pool.map(modele1_1, [1] * N)
-    pool.close()
-    pool.join()
-    resul = pool_outputs
-    LX = [elem[0] for elem in resul]
-    LY = [elem[1] for elem in resul]
-    df1_1 = statsSimulations(LX, LY)
+    arena = run_ensemble_shared("1.1", params1_1, N, processes=nb_process)
+    df1_1 = pd.DataFrame(arena.records())[["lpm", "Distance moyenne", "Distance max", "Nb collisions"]]
     df1_1["Modèle"] = ["1.1"] * N
     print("\n#####################  Modèle n°1.1  #####################\n")
     print(df1_1.describe())
@@ -1,34 +1,29 @@
 """
-Statistiques multivariées déstinées à comparer nos différents modèles.
+Comparaison statistique de nos différents modèles (voir brownian.comparison).
 Les données traitées se trouvent par défaut à l'emplacement ~/Documents/resultats.pkl.
 Ces données ont été préalablement générées avec le script bench.py.
+
+Pour chaque mesure et chaque paire de modèles : intervalles de confiance bootstrap des moyennes
+et de leur différence, p-value de la différence et distance de Kolmogorov-Smirnov.
 """
 
 import pandas as pd
 from matplotlib import pyplot as plt
-from pandas.plotting import scatter_matrix
-
-res = pd.read_pickle("~/Documents/resultats.pkl")
 
-res.boxplot(column=['lpm'], by='Modèle')
-res.boxplot(column=['Nb collisions'], by='Modèle')
-res.boxplot(column=['Distance moyenne'], by='Modèle')
-res.boxplot(column=['Distance max'], by='Modèle')
+from brownian.comparison import compare
 
-for key in ["lpm", "Nb collisions", "Distance moyenne", "Distance max"]:
-	var1 = list(res[res["Modèle"] == "1"][key])
-	var1_1 = list(res[res["Modèle"] == "1.1"][key])
-	var2 = list(res[res["Modèle"] == "2"][key])
-	var3 = list(res[res["Modèle"] == "3"][key])
-	var1.sort()
-	var1_1.sort()
-	var2.sort()
-	var3.sort()
+MESURES = ["lpm", "Nb collisions", "Distance moyenne", "Distance max"]
 
-	result = pd.DataFrame({key+"1": var1, key+"1.1": var1_1, key+"2": var2, key+"3": var3})
+res = pd.read_pickle("~/Documents/resultats.pkl")
 
-	scatter_matrix(result, figsize=(6, 6), diagonal='kde')
+for key in MESURES:
+    res.boxplot(column=[key], by='Modèle')
 
-	print(result.corr())
+comparaisons = pd.DataFrame(compare(res, mesures=MESURES, seed=0))
+pd.set_option("display.width", 200)
+for key in MESURES:
+    print("\n#####################", key, "#####################\n")
+    print(comparaisons[comparaisons["Mesure"] == key][["A", "B", "Différence", "IC différence", "p-value différence",
+                                                       "KS", "p-value KS"]].to_string(index=False))
 
 plt.show()
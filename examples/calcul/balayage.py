@@ -0,0 +1,20 @@
+"""
+Balayage de la densité et de la vitesse des petites particules pour le modèle 2.
+Les résultats sont mémorisés dans ~/.cache/brownian : relancer le script après avoir
+ajouté une valeur à la grille ne calcule que les nouveaux points.
+"""
+import os
+
+from brownian.ensemble import dataframe
+from brownian.sweep import ResultCache, sweep
+
+params = dict(nb_max_collisions=20, epsilon_time=10**-3, dim=1, speed_BP_init=1, moving_window=True)
+grille = {"density": [10**3, 5 * 10**3, 10**4], "speed": [1, 10]}
+
+if __name__ == '__main__':
+    cache = ResultCache(os.path.expanduser("~/.cache/brownian"), max_size=10**8)
+    records = sweep("2", params, grille, n=16, cache=cache)
+    print("Résultats mémorisés :", cache.hits, "/ calculés :", cache.misses, "\n")
+
+    df = dataframe(records)
+    print(df.groupby(["density", "speed"])[["lpm", "Distance moyenne", "Temps de calcul"]].mean())
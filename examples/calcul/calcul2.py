@@ -8,7 +8,8 @@ from brownian.outils import stats
 
 n = 16
 
-b = Simulation2(nb_max_collisions=5, density=10**4, epsilon_time=10**(-3), dim=1, speed=10, speed_BP_init=1)
+# Environnement mobile : aucune simulation n'est interrompue par NoBigCollision ou OutsideEnv
+b = Simulation2(nb_max_collisions=5, density=10**4, epsilon_time=10**(-3), dim=1, speed=10, speed_BP_init=1, moving_window=True)
 
 
 def f(i):
@@ -0,0 +1,20 @@
+"""
+Réglage automatique de dim pour le modèle 2 par simulations pilotes.
+
+La probabilité d'interruption d'une configuration est bornée par la borne de confiance de ses
+pilotes (environ 2.7 / n_pilot sans interruption observée), extrapolée à la longueur complète :
+des pilotes de la longueur complète (pilot={}) évitent d'amplifier cette borne.
+"""
+from brownian.autotune import autotune
+
+params = dict(nb_max_collisions=50, density=10**4, epsilon_time=10**-3, speed=10, speed_BP_init=1)
+
+if __name__ == '__main__':
+    resultat = autotune("2", params, {"dim": [0.25, 0.5, 1, 2], "epsilon_time": [10**-3, 10**-2]},
+                        max_failure=0.05, n_pilot=64, pilot={}, processes=None)
+
+    for configuration in resultat["configurations"]:
+        print(configuration)
+    print("\nParamètres retenus :", resultat["params"])
+    print("Débit prédit (grosses collisions / s) :", resultat["throughput"])
+    print("Probabilité d'interruption prédite :", resultat["failure"])
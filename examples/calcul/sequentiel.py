@@ -0,0 +1,17 @@
+"""
+Calcul d'un ensemble du modèle 2 jusqu'à une précision de 5% sur le lpm, la distance moyenne
+et la fréquence (demi-largeurs relatives des intervalles de confiance à 95%).
+"""
+from brownian.sequential import run_until
+
+params = dict(nb_max_collisions=5, density=10**4, epsilon_time=10**-3, dim=1, speed=10, speed_BP_init=1,
+              moving_window=True)
+
+if __name__ == '__main__':
+    resultat = run_until("2", params, targets={"lpm": 0.05, "Distance moyenne": 0.05, "Fréquence": 0.05},
+                         batch=16, budget=1024)
+
+    print("Simulations :", len(resultat["records"]), "en lots de", resultat["batches"])
+    print("Précision atteinte :" if resultat["converged"] else "Budget épuisé, précision :")
+    for mesure, demi_largeur in resultat["precision"].items():
+        print("   ", mesure, ":", round(100 * demi_largeur, 2), "% (visée", 100 * resultat["targets"][mesure], "%)")
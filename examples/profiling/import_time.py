@@ -0,0 +1,47 @@
+"""
+Mesure du temps d'import des modules de calcul, comparé à un budget.
+
+Chaque mesure est faite dans un nouvel interpréteur (comme au démarrage d'un processus
+de calcul), en excluant le temps de démarrage de Python lui-même.
+"""
+import statistics
+import subprocess
+import sys
+
+MODULES = ["brownian.simulation1", "brownian.simulation1_1", "brownian.simulation2",
+           "brownian.simulation3", "brownian.outils", "brownian.outils1_1"]
+# Modules lourds qui ne doivent pas être chargés par le cœur de calcul
+INTERDITS = ["matplotlib", "pandas"]
+BUDGET = 0.3    # secondes
+NB_MESURES = 5
+
+CODE = """
+import sys, time
+t = time.perf_counter()
+import {modules}
+print(time.perf_counter() - t)
+print(",".join(m for m in {interdits} if m in sys.modules))
+"""
+
+
+def mesure():
+    """
+    Returns:
+        float -- temps d'import (s)
+        str list -- modules interdits chargés
+    """
+    code = CODE.format(modules=", ".join(MODULES), interdits=INTERDITS)
+    sortie = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    temps, charges = sortie.splitlines()
+    return float(temps), [m for m in charges.split(",") if m]
+
+
+if __name__ == '__main__':
+    resultats = [mesure() for _ in range(NB_MESURES)]
+    temps = statistics.median(r[0] for r in resultats)
+    charges = resultats[0][1]
+
+    print("Temps d'import médian :", round(temps, 4), "s (budget :", BUDGET, "s)")
+    print("Modules lourds chargés :", charges if charges else "aucun")
+    if temps > BUDGET or charges:
+        sys.exit(1)
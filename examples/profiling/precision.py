@@ -0,0 +1,43 @@
+"""
+Comparaison des environnements en double et simple précision (paramètre dtype) pour le modèle 2.
+
+Les deux précisions sont calculées avec les mêmes graines, donc les mêmes environnements initiaux
+et les mêmes tirages d'angles : les écarts entre les mesures ne viennent que des arrondis.
+Pour chaque mesure, on affiche la moyenne dans chaque précision et l'écart moyen apparié
+avec son intervalle de confiance à 95% : un intervalle contenant 0 signifie que l'effet
+de la simple précision n'est pas détectable avec ce nombre de simulations.
+"""
+import statistics
+from math import sqrt
+
+import numpy as np
+
+from brownian.ensemble import run_ensemble
+
+N = 128
+params = dict(nb_max_collisions=200, density=10**4, epsilon_time=10**-4, dim=1, speed=10, speed_BP_init=1,
+              periodic=True)
+MESURES = ["Fréquence", "lpm", "Distance moyenne", "Distance max"]
+
+
+if __name__ == '__main__':
+    seeds = list(range(N))
+    resultats = {}
+    for dtype in ["float64", "float32"]:
+        resultats[dtype] = run_ensemble("2", {**params, "dtype": dtype}, N, seeds=seeds)
+
+    nb_particules = int(params["density"] * 4 * params["dim"]**2)
+    print("Particules dans l'environnement :", nb_particules)
+    for dtype in ["float64", "float32"]:
+        memoire = 4 * nb_particules * np.dtype(dtype).itemsize
+        temps = statistics.mean(record["Temps de calcul"] for record in resultats[dtype])
+        print(dtype, ": environnement", round(memoire / 2**20, 2), "Mo, temps de calcul moyen", round(temps, 3), "s")
+
+    print()
+    for mesure in MESURES:
+        doubles = [record[mesure] for record in resultats["float64"]]
+        simples = [record[mesure] for record in resultats["float32"]]
+        ecarts = [s - d for s, d in zip(simples, doubles)]
+        demi_largeur = 1.96 * statistics.stdev(ecarts) / sqrt(N)
+        print(mesure, ": float64", round(statistics.mean(doubles), 5), "| float32", round(statistics.mean(simples), 5),
+              "| écart", round(statistics.mean(ecarts), 5), "+/-", round(demi_largeur, 5))
@@ -0,0 +1,37 @@
+"""
+Réduction de variance pour le modèle 2 : nombres aléatoires communs, angles antithétiques
+et environnements initiaux de Sobol (voir brownian.variance).
+
+Pour chaque méthode et chaque mesure, on affiche l'estimation, son erreur type et le facteur
+de réduction de variance par rapport à des simulations indépendantes en nombre égal
+(1 : aucun gain).
+"""
+from brownian.variance import antithetic_mean, paired_difference, run_antithetic, run_common, variance_ratio
+
+N = 64
+params = dict(nb_max_collisions=100, density=10**3, epsilon_time=10**-3, dim=1, speed=10, speed_BP_init=1,
+              periodic=True)
+MESURES = ["lpm", "Distance moyenne"]
+
+
+def affichage(methode, mesure, resultat):
+    print(methode, "|", mesure, ": estimation", round(float(resultat["Estimation"]), 5),
+          "+/-", round(float(resultat["Erreur type"]), 5),
+          "| réduction de variance", round(float(resultat["Réduction de variance"]), 2))
+
+
+if __name__ == '__main__':
+    seeds = list(range(N))
+
+    # Différence entre deux densités, nombres aléatoires communs
+    records_a, records_b = run_common("2", params, {**params, "density": 1.2 * 10**3}, N, seeds=seeds)
+    for mesure in MESURES:
+        affichage("Nombres communs", mesure, paired_difference(records_a, records_b, mesure))
+
+    records, records_anti = run_antithetic("2", params, N, seeds=seeds)
+    for mesure in MESURES:
+        affichage("Antithétique", mesure, antithetic_mean(records, records_anti, mesure))
+
+    records_sobol, _ = run_antithetic("2", params, N, seeds=seeds, sobol=True)
+    for mesure in MESURES:
+        affichage("Sobol", mesure, variance_ratio(records, records_sobol, mesure))
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
-from distutils.core import setup
-from setuptools import find_packages
+from setuptools import setup, find_packages
 
 here = os.path.dirname(__file__)
 if here == "":
@@ -24,4 +23,9 @@ setup(name='brownian',
       url='https://github.com/baptiste-pasquier/brownian',
       packages=packages,
       package_dir=package_dir,
-      requires=requirements)
+      requires=requirements,
+      # Le calcul n'a besoin que de numpy, l'affichage et les DataFrame sont optionnels
+      install_requires=['numpy'],
+      extras_require={'affichage': ['matplotlib'],
+                      'stats': ['pandas'],
+                      'examples': ['matplotlib', 'pandas', 'psutil']})
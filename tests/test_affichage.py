@@ -0,0 +1,73 @@
+"""
+Unit tests for ``affichage``.
+"""
+import os
+import random
+import unittest
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from brownian.affichage import _Rendu, _Tampon
+from brownian.outils import Particle
+from brownian.simulation2 import Simulation2
+
+_BACKEND = {}
+
+
+def setUpModule():
+    # Rendu sans fenêtre, y compris dans le processus de rendu ; rétabli pour les autres modules de tests
+    _BACKEND["env"] = os.environ.get("MPLBACKEND")
+    _BACKEND["matplotlib"] = matplotlib.get_backend()
+    os.environ["MPLBACKEND"] = "Agg"
+    plt.switch_backend("Agg")
+
+
+def tearDownModule():
+    if _BACKEND["env"] is None:
+        os.environ.pop("MPLBACKEND", None)
+    else:
+        os.environ["MPLBACKEND"] = _BACKEND["env"]
+    plt.switch_backend(_BACKEND["matplotlib"])
+
+
+class TestTampon(unittest.TestCase):
+
+    def test_ajout(self):
+        tampon = _Tampon(capacite=2)
+        tampon.ajout([(0, 0), (1, 1)])
+        tampon.ajout([(2, 2)])
+        self.assertEqual(tampon.vue().tolist(), [[0, 0], [1, 1], [2, 2]])
+
+
+class TestRendu(unittest.TestCase):
+
+    def test_image(self):
+        fig, ax = plt.subplots()
+        rendu = _Rendu(ax, "test", (-1, 1), (-1, 1))
+        rendu.ajout_points([(0, 0), (0.5, 0.5)])
+        image = {'t': 0.1, 'x': [0.1, 0.2], 'y': [0.3, 0.4], 'u': [1, 0], 'v': [0, 1], 'bp': (0.5, 0.5)}
+        rendu.image(image)
+        self.assertEqual(len(rendu.ligne.get_xdata()), 2)
+        self.assertEqual(rendu.bain.get_offsets().shape, (2, 2))
+        self.assertEqual(rendu.fleches.N, 2)
+        rendu.image({**image, 'cercle': (0, 0, 0.5)})
+        self.assertTrue(rendu.cercle.get_visible())
+        # Image suivante sans disque : le disque précédent est effacé
+        rendu.image(image)
+        self.assertFalse(rendu.cercle.get_visible())
+        plt.close(fig)
+
+
+class TestLiveDisplay(unittest.TestCase):
+
+    def test_simulation_show(self):
+        random.seed(0)
+        b = Simulation2(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=180, speed=10, speed_BP_init=10)
+        b.calcul(show=True, pause=0.001)
+        self.assertEqual(len(b.historic_BP), 4)
+        self.assertIsInstance(b.historic_BP[-1][1], Particle)
+
+
+if __name__ == '__main__':
+    unittest.main()
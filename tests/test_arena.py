@@ -0,0 +1,48 @@
+"""
+Unit tests for ``arena``.
+"""
+import math
+import unittest
+
+from brownian.arena import run_ensemble_shared
+from brownian.ensemble import run_ensemble, run_simulation
+
+PARAMS = dict(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+PARAMS1_1 = dict(epsilon=10**-4, n_etoile=10**4, v=10, V=0.1, h=10**-3, nb_etapes=50)
+
+
+class TestArena(unittest.TestCase):
+
+    def test_records(self):
+        seeds = [0, 1, 2, 3]
+        arena = run_ensemble_shared("2", PARAMS, 4, seeds=seeds, processes=2)
+        attendus = run_ensemble("2", PARAMS, 4, seeds=seeds, processes=1)
+        for record, attendu in zip(arena.records(), attendus):
+            self.assertEqual(record["Statut"], attendu["Statut"])
+            self.assertEqual(record["lpm"], attendu["lpm"])
+            self.assertEqual(record["Nb collisions"], attendu["Nb collisions"])
+
+    def test_trajectory(self):
+        arena = run_ensemble_shared("1.1", PARAMS1_1, 3, seeds=[0, 1, 2], processes=1)
+        _, (T, X, Y) = run_simulation("1.1", PARAMS1_1, 1, trajectory=True)
+        trajectoire = arena.trajectory(1)
+        self.assertEqual(trajectoire[1].tolist(), X)
+        self.assertEqual(trajectoire[2].tolist(), Y)
+        self.assertEqual(trajectoire[0].tolist(), T)
+        self.assertTrue(math.isnan(arena.records()[1]["Nb no collision"]))
+
+    def test_trajectories(self):
+        arena = run_ensemble_shared("1.1", PARAMS1_1, 3, seeds=[0, 1, 2], processes=2)
+        lpms = arena.trajectories().lpms()
+        for i, record in enumerate(arena.records()):
+            self.assertAlmostEqual(lpms[i], record["lpm"])
+
+    def test_overflow(self):
+        arena = run_ensemble_shared("2", PARAMS, 3, seeds=[0, 1, 2], processes=1, capacity=5)
+        complete = run_ensemble_shared("2", PARAMS, 3, seeds=[0, 1, 2], processes=1)
+        for i in range(3):
+            self.assertEqual(arena.trajectory(i).tolist(), complete.trajectory(i).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Unit tests for ``autotune``.
+"""
+import unittest
+
+import numpy as np
+
+from brownian.autotune import autotune, logistic_fit, logistic_predict, upper_bound
+
+
+class TestLogistic(unittest.TestCase):
+
+    def test_logistic_fit(self):
+        X = np.column_stack((np.ones(3), np.log([1, 2, 4])))
+        beta = logistic_fit(X, [90, 50, 10], [100, 100, 100])
+        p = logistic_predict(X, beta)
+        self.assertTrue(p[0] > p[1] > p[2])
+        self.assertAlmostEqual(p[1], 0.5, delta=0.1)
+
+    def test_upper_bound(self):
+        # Aucun succès : borne d'environ 2.7 / n
+        self.assertAlmostEqual(float(upper_bound(0, 100)), 0.0264, delta=10**-3)
+        bornes = upper_bound([0, 5, 50], [100, 100, 100])
+        self.assertTrue(np.all(bornes > [0, 0.05, 0.5]))
+        self.assertEqual(float(upper_bound(10, 10)), 1)
+
+
+class TestAutotune(unittest.TestCase):
+
+    def test_autotune(self):
+        params = dict(nb_max_collisions=10, density=0.01, epsilon_time=0.5, speed=10, speed_BP_init=10, periodic=True)
+        resultat = autotune("2", params, {"dim": [20, 40]}, n_pilot=2, max_failure=1, seed=0)
+        self.assertIn(resultat["params"]["dim"], [20, 40])
+        self.assertEqual(resultat["params"]["nb_max_collisions"], 10)
+        self.assertEqual(len(resultat["configurations"]), 2)
+        self.assertTrue(resultat["throughput"] > 0)
+        # 2 pilotes sans interruption ne suffisent pas à garantir une probabilité d'interruption de 1%
+        with self.assertRaises(ValueError):
+            autotune("2", params, {"dim": [20, 40]}, n_pilot=2, seed=0)
+
+    def test_autotune_failures(self):
+        # Environnement ouvert : interruptions (NoBigCollision) fréquentes pour un petit dim
+        params = dict(nb_max_collisions=5, density=0.05, epsilon_time=0.5, speed=10, speed_BP_init=1)
+        n_pilot = 16
+        resultat = autotune("2", params, {"dim": [5, 10, 20, 40, 80]}, n_pilot=n_pilot, max_failure=0.2,
+                            pilot={}, seed=0)
+        configurations = resultat["configurations"]
+        self.assertGreater(configurations[0]["observed_failures"], 0)
+        self.assertIn(resultat["params"]["dim"], [40, 80])
+        for configuration in configurations:
+            # Sans interruption observée, pas de probabilité prédite inférieure à environ 1 / n_pilot
+            self.assertGreaterEqual(configuration["failure"], 1 / n_pilot)
+            self.assertGreaterEqual(configuration["failure"], configuration["observed_failures"] / n_pilot)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Unit tests for ``broker``.
+"""
+import asyncio
+import json
+import multiprocessing
+import unittest
+
+from brownian.broker import Coordinator, worker_agent
+from brownian.ensemble import run_ensemble
+
+PARAMS = dict(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+
+
+def _agents(port, nombre):
+    processus = [multiprocessing.Process(target=worker_agent, args=("127.0.0.1", port), kwargs={"heartbeat": 0.1})
+                 for _ in range(nombre)]
+    for agent in processus:
+        agent.start()
+    return processus
+
+
+class TestBroker(unittest.TestCase):
+
+    def test_ensemble(self):
+        async def scenario():
+            coordinator = Coordinator()
+            await coordinator.start()
+            processus = _agents(coordinator.port, 3)
+            try:
+                records = await coordinator.run_ensemble("2", PARAMS, 6, seeds=list(range(6)))
+            finally:
+                await coordinator.close()
+            for agent in processus:
+                agent.join()
+            return records
+
+        records = asyncio.run(scenario())
+        attendus = run_ensemble("2", PARAMS, 6, seeds=list(range(6)), processes=1)
+        self.assertEqual([record["lpm"] for record in records], [record["lpm"] for record in attendus])
+
+    def test_lost_worker(self):
+        async def scenario():
+            coordinator = Coordinator(heartbeat_timeout=0.5)
+            await coordinator.start()
+            try:
+                flux = coordinator.stream("2", PARAMS, 2, seeds=[0, 1])
+                suivant = asyncio.ensure_future(flux.__anext__())
+                # Agent silencieux : prend les deux tâches sans jamais les calculer
+                reader, writer = await asyncio.open_connection("127.0.0.1", coordinator.port)
+                writer.write(json.dumps({"type": "request", "max": 2}).encode() + b"\n")
+                reponse = json.loads(await reader.readline())
+                self.assertEqual(len(reponse["tasks"]), 2)
+
+                processus = _agents(coordinator.port, 1)
+                records = [await suivant, await flux.__anext__()]
+                writer.close()
+            finally:
+                await coordinator.close()
+            for agent in processus:
+                agent.join()
+            return coordinator, records
+
+        coordinator, records = asyncio.run(scenario())
+        self.assertEqual(sorted(index for index, _ in records), [0, 1])
+        # Une tâche volée à l'agent silencieux, l'autre relancée après sa perte
+        self.assertEqual((coordinator.stolen, coordinator.requeued), (1, 1))
+
+    def test_cancelled_stream(self):
+        async def scenario():
+            coordinator = Coordinator()
+            await coordinator.start()
+            try:
+                flux = coordinator.stream("2", PARAMS, 4, seeds=list(range(4)))
+                suivant = asyncio.ensure_future(flux.__anext__())
+                # Agent A : prend les quatre tâches sans les calculer
+                reader, writer = await asyncio.open_connection("127.0.0.1", coordinator.port)
+                writer.write(json.dumps({"type": "request", "max": 4}).encode() + b"\n")
+                self.assertEqual(len(json.loads(await reader.readline())["tasks"]), 4)
+                # Lecture abandonnée : les tâches sont annulées
+                suivant.cancel()
+                await asyncio.gather(suivant, return_exceptions=True)
+                await flux.aclose()
+                # Agent B : rien à voler, la connexion reste ouverte
+                reader_b, writer_b = await asyncio.open_connection("127.0.0.1", coordinator.port)
+                writer_b.write(json.dumps({"type": "request", "max": 2}).encode() + b"\n")
+                reponse = json.loads(await reader_b.readline())
+                writer.close()
+                writer_b.close()
+            finally:
+                await coordinator.close()
+            return coordinator, reponse
+
+        coordinator, reponse = asyncio.run(scenario())
+        self.assertEqual(reponse["type"], "wait")
+        self.assertEqual(coordinator.stolen, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Unit tests for ``comparison``.
+"""
+import unittest
+
+import numpy as np
+
+from brownian.comparison import bootstrap_means, compare, ks_distance, ks_distances
+
+
+class TestBootstrap(unittest.TestCase):
+
+    def test_bootstrap_means(self):
+        groupes = [np.array([1.0, 1.0, 1.0]), np.array([0.0, 10.0])]
+        boot = bootstrap_means(groupes, 500, np.random.default_rng(0))
+        self.assertEqual(boot.shape, (500, 2))
+        self.assertTrue(np.all(boot[:, 0] == 1))
+        self.assertEqual(set(boot[:, 1].tolist()), {0.0, 5.0, 10.0})
+
+    def test_ks_distance(self):
+        distance, p_value = ks_distance(np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 3.0]))
+        self.assertEqual(distance, 0)
+        self.assertEqual(p_value, 1)
+        distance, p_value = ks_distance(np.arange(50.0), np.arange(50.0) + 100)
+        self.assertEqual(distance, 1)
+        self.assertLess(p_value, 10**-6)
+
+    def test_ks_distances(self):
+        rng = np.random.default_rng(0)
+        groupes = [rng.normal(k / 4, 1, 20 + 5 * k) for k in range(4)]
+        i, j = np.array([0, 0, 1, 2]), np.array([1, 3, 2, 3])
+        distances, p_values = ks_distances(groupes, i, j, block=100)
+        for k in range(len(i)):
+            a, b = groupes[i[k]], groupes[j[k]]
+            # Écart maximal des fonctions de répartition aux valeurs des deux groupes
+            attendu = max(abs(np.mean(a <= x) - np.mean(b <= x)) for x in np.concatenate((a, b)))
+            self.assertAlmostEqual(distances[k], attendu)
+            self.assertTrue(0 <= p_values[k] <= 1)
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_compare(self):
+        rng = np.random.default_rng(1)
+        records = ([{"Modèle": "2", "lpm": x} for x in rng.normal(1, 0.1, 40)] +
+                   [{"Modèle": "3", "lpm": x} for x in rng.normal(2, 0.1, 40)] +
+                   [{"Modèle": "3", "lpm": float("nan")}, {"Modèle": "1", "lpm": 1.0}])
+        lignes = compare(records, mesures=["lpm", "Distance max"], seed=0)
+        # Le modèle 1 n'a qu'une simulation aboutie, Distance max n'est pas renseignée
+        self.assertEqual(len(lignes), 1)
+        ligne = lignes[0]
+        self.assertEqual((ligne["A"], ligne["B"], ligne["n B"]), ("2", "3", 40))
+        self.assertAlmostEqual(ligne["Différence"], -1, delta=0.1)
+        self.assertLess(ligne["IC différence"][1], 0)
+        self.assertLess(ligne["p-value différence"], 0.01)
+        self.assertEqual(ligne["KS"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
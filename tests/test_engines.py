@@ -0,0 +1,55 @@
+"""
+Unit tests for ``engines``.
+"""
+import unittest
+
+from brownian.engines import BACKENDS, HistoricEngine, engines, register, select
+from brownian.ensemble import run_simulation
+
+PARAMS = dict(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+
+
+class TestSelect(unittest.TestCase):
+
+    def test_auto(self):
+        # 16 particules : backend de référence
+        self.assertEqual(select("2", PARAMS).backend, "python")
+        self.assertEqual(select("2", {**PARAMS, "density": 1}).backend, "numpy")
+        self.assertEqual(select("3", {**PARAMS, "density": 0.1}).backend, "numpy")
+        self.assertEqual(select("1.1", {"nb_etapes": 10}).backend, "python")
+        # Backend non exact ou précision imposée : backend de référence
+        self.assertEqual(select("2", {**PARAMS, "density": 1, "periodic": False, "moving_window": True}).backend,
+                         "python")
+        self.assertEqual(select("2", {**PARAMS, "density": 1, "dtype": "float32"}).backend, "python")
+        # Recherche sur grille demandée : backend qui la réalise
+        self.assertGreaterEqual(select("2", {**PARAMS, "density": 1}).size({**PARAMS, "density": 1}), 40)
+        self.assertEqual(select("2", {**PARAMS, "density": 1, "grid": True}).backend, "python")
+
+    def test_explicit(self):
+        self.assertEqual(select("2", PARAMS, "numpy32").options, {"dtype": "float32"})
+        with self.assertRaises(ValueError):
+            select("1", PARAMS, "numpy")
+        with self.assertRaises(ValueError):
+            select("4", PARAMS)
+
+    def test_unavailable(self):
+        register(HistoricEngine("2", "compile", requires="module_inexistant", min_size=0))
+        try:
+            self.assertNotIn("compile", [engine.backend for engine in engines("2")])
+            with self.assertRaises(ValueError):
+                select("2", PARAMS, "compile")
+        finally:
+            del BACKENDS["2"]["compile"]
+
+
+class TestRun(unittest.TestCase):
+
+    def test_backends(self):
+        reference = run_simulation("3", {**PARAMS, "backend": "python"}, seed=1)
+        numpy = run_simulation("3", {**PARAMS, "backend": "numpy"}, seed=1)
+        self.assertEqual(reference["lpm"], numpy["lpm"])
+        self.assertEqual(reference["Nb collisions"], numpy["Nb collisions"])
+
+
+if __name__ == '__main__':
+    unittest.main()
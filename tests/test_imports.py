@@ -0,0 +1,24 @@
+"""
+Le cœur de calcul ne doit pas charger les modules d'affichage ni pandas.
+"""
+import subprocess
+import sys
+import unittest
+
+CODE = """
+import sys
+import brownian.simulation1, brownian.simulation1_1, brownian.simulation2, brownian.simulation3
+import brownian.outils, brownian.outils1_1
+print(",".join(m for m in ("matplotlib", "pandas") if m in sys.modules))
+"""
+
+
+class TestImports(unittest.TestCase):
+
+    def test_coeur_sans_affichage(self):
+        sortie = subprocess.run([sys.executable, "-c", CODE], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(sortie.strip(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,11 @@
 """
 Unit tests for ``random_strategy``.
 """
+import random
 import unittest
-from brownian.outils import Particle
-from math import pi, cos, sin
+from brownian.outils import Particle, first_collision, minimum_image, radial_index
+from brownian.simulation1 import random_particle
+from math import pi, cos, sin, sqrt
 
 
 class TestParticle(unittest.TestCase):
@@ -15,6 +17,53 @@ class TestParticle(unittest.TestCase):
         self.assertAlmostEqual(p.x, cos(pi / 2))
         self.assertAlmostEqual(p.y, sin(pi / 2))
 
+    def test_collision_periodic(self):
+        BP = Particle(0, 0, 1, pi / 4, 10 ** -4)
+        p = Particle(-1.5, -1.5, 1, pi / 4 + pi, 10 ** -4)
+        self.assertFalse(BP.collision(p)[0])
+        collision, t = BP.collision(p, periodic_dim=1)
+        self.assertTrue(collision)
+        self.assertAlmostEqual(t, 0.5 / sqrt(2))
+
+
+class TestMinimumImage(unittest.TestCase):
+
+    def test_minimum_image(self):
+        self.assertAlmostEqual(minimum_image(1.5, 1), -0.5)
+        self.assertAlmostEqual(minimum_image(-0.25, 1), -0.25)
+        self.assertAlmostEqual(minimum_image(-3.5, 1), 0.5)
+
+
+class TestFirstCollision(unittest.TestCase):
+
+    def test_radial_index(self):
+        u = [0.5, 0.1, 0.9, 0.3, 0.7]
+        index = radial_index(u, 2)
+        self.assertEqual(sum((indices for _, indices in index), []), [1, 3, 0, 4, 2])
+        self.assertEqual([rayon for rayon, _ in index], [2 * sqrt(0.1), 2 * sqrt(0.5), 2 * sqrt(0.9)])
+
+    def test_pruning_exact(self):
+        random.seed(0)
+        BP = Particle(0, 0, 1, pi / 4, 10 ** -3)
+        nb_tests = [0, 0]
+        for _ in range(20):
+            tirages = [(random.random(), random.random(), random.random()) for _ in range(400)]
+            particles = [random_particle(0.11, 10, 10 ** -3, uniforms) for uniforms in tirages]
+            index = radial_index([uniforms[0] for uniforms in tirages], 0.11)
+            tests = []
+
+            def collision(i):
+                tests.append(i)
+                return BP.collision(particles[i])
+
+            complet = first_collision(collision, len(particles), 0.01)
+            nb_tests[0] += len(tests)
+            del tests[:]
+            # Même particule et même date qu'un parcours complet, avec moins de tests
+            self.assertEqual(first_collision(collision, len(particles), 0.01, index, 11, 10 ** -3), complet)
+            nb_tests[1] += len(tests)
+        self.assertLess(nb_tests[1], nb_tests[0] / 4)
+
 
 if __name__ == '__main__':
     unittest.main()
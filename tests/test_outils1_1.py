@@ -0,0 +1,45 @@
+"""
+Unit tests for ``outils1_1``.
+"""
+import math
+import unittest
+
+import numpy as np
+
+from brownian.outils1_1 import RaggedTrajectories, distance, distances, lpm, lpms, nb_collisions
+
+LX = [[0, 3, 3], [0], [0, 1, 1, 0]]
+LY = [[0, 4, 0], [0], [0, 0, 1, 1]]
+
+
+class TestRaggedTrajectories(unittest.TestCase):
+
+    def test_metrics(self):
+        trajectoires = RaggedTrajectories.from_lists(LX, LY)
+        self.assertEqual(trajectoires.nb_collisions().tolist(), [2, 0, 3])
+        np.testing.assert_array_equal(trajectoires.lpms(), [lpm(LX[0], LY[0]), np.nan, lpm(LX[2], LY[2])])
+        d_moy, d_max = trajectoires.distances()
+        np.testing.assert_array_equal(d_moy, [distance(LX[0], LY[0])[0], np.nan, distance(LX[2], LY[2])[0]])
+        np.testing.assert_array_equal(d_max, [5, np.nan, math.sqrt(2)])
+
+    def test_from_arena(self):
+        # Trajectoires écrites dans le désordre, avec une simulation interrompue (longueur 0)
+        class Arena:
+            coordonnees = np.array([[0, 0, 0, 0, 0],
+                                    [0, 1, 0, 3, 3],
+                                    [0, 0, 0, 4, 0]], dtype=float)
+            offsets = np.array([2, 0, 0])
+            lengths = np.array([3, 0, 2])
+        trajectoires = RaggedTrajectories.from_arena(Arena)
+        self.assertEqual(trajectoires.trajectory(0)[0].tolist(), [0, 3, 3])
+        self.assertEqual(trajectoires.trajectory(2)[0].tolist(), [0, 1])
+        np.testing.assert_array_equal(trajectoires.lpms(), [4.5, np.nan, 1])
+
+    def test_functions(self):
+        self.assertEqual(lpms(LX[:1], LY[:1]), [4.5])
+        self.assertEqual(distances(LX[:1], LY[:1]), ([4.0], [5.0]))
+        self.assertEqual(nb_collisions(LX, LY), [2, 0, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
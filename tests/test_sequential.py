@@ -0,0 +1,40 @@
+"""
+Unit tests for ``sequential``.
+"""
+import math
+import unittest
+
+from brownian.sequential import precision, run_until
+
+PARAMS = dict(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+
+
+class TestPrecision(unittest.TestCase):
+
+    def test_precision(self):
+        records = [{"lpm": x} for x in [1.0, 3.0, float("nan")]]
+        # moyenne 2, écart type sqrt(2), 2 valeurs
+        attendu = 1.959964 * math.sqrt(2) / math.sqrt(2) / 2
+        self.assertAlmostEqual(precision(records, ["lpm"])["lpm"], attendu, places=5)
+        self.assertEqual(precision(records[:1], ["lpm"])["lpm"], math.inf)
+
+
+class TestRunUntil(unittest.TestCase):
+
+    def test_converged(self):
+        resultat = run_until("2", PARAMS, targets={"lpm": 10}, batch=4, min_runs=4, seed=0, processes=1)
+        self.assertTrue(resultat["converged"])
+        self.assertEqual(resultat["batches"], [4])
+        self.assertEqual([record["Graine"] for record in resultat["records"]], [0, 1, 2, 3])
+
+    def test_budget(self):
+        resultat = run_until("2", PARAMS, targets={"lpm": 10**-6, "Distance moyenne": 10**-6}, batch=2,
+                             budget=6, min_runs=2, seed=0, processes=1)
+        self.assertFalse(resultat["converged"])
+        self.assertEqual(len(resultat["records"]), 6)
+        self.assertEqual(resultat["batches"], [2, 4])
+        self.assertTrue(resultat["precision"]["lpm"] > 10**-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
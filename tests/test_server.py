@@ -0,0 +1,59 @@
+"""
+Unit tests for ``server``.
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from brownian.ensemble import run_ensemble
+from brownian.server import Client, JobServer
+
+PARAMS = dict(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+
+
+class TestServer(unittest.TestCase):
+
+    def test_ensemble(self):
+        async def scenario(chemin):
+            server = JobServer(path=chemin, processes=2)
+            await server.start()
+            try:
+                client = Client(path=chemin)
+                avancement = []
+                records, records_bis = await asyncio.gather(
+                    client.run_ensemble("2", PARAMS, 4, seeds=[0, 1, 2, 3],
+                                        progress=lambda k, n: avancement.append((k, n))),
+                    client.run_ensemble("2", PARAMS, 2, seeds=[0, 1], priority=-1))
+            finally:
+                await server.close()
+            return records, records_bis, avancement
+
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "brownian.sock")
+            records, records_bis, avancement = asyncio.run(scenario(chemin))
+            self.assertFalse(os.path.exists(chemin))
+
+        attendus = run_ensemble("2", PARAMS, 4, seeds=[0, 1, 2, 3], processes=1)
+        self.assertEqual([record["lpm"] for record in records], [record["lpm"] for record in attendus])
+        self.assertEqual([record["lpm"] for record in records_bis], [record["lpm"] for record in attendus[:2]])
+        self.assertEqual(avancement, [(1, 4), (2, 4), (3, 4), (4, 4)])
+
+    def test_error(self):
+        async def scenario(modele, n, seeds):
+            server = JobServer(processes=1)
+            await server.start()
+            try:
+                client = Client(port=server.port)
+                await client.run_ensemble(modele, PARAMS, n, seeds=seeds)
+            finally:
+                await server.close()
+
+        # Modèle inconnu, nombre de graines différent du nombre de simulations
+        for modele, n, seeds in (("4", 1, None), ("2", 10, [0, 1, 2])):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(scenario(modele, n, seeds))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,341 @@
+"""
+Unit tests for the simulations.
+"""
+import math
+import random
+import unittest
+
+import numpy as np
+
+from brownian.simulation1 import Simulation1, Workzone, optimal_time_interval
+from brownian.simulation1_1 import BrownianMotion1_1
+from brownian.simulation2 import NoBigCollision, Simulation2, Workzone_square
+from brownian.simulation3 import Simulation3
+from brownian.bath import ArrayBath
+from brownian.outils import Particle, Streams, stats
+
+
+class TestPeriodic(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+
+    def test_simulation2_periodic(self):
+        b = Simulation2(nb_max_collisions=30, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+        b.calcul()
+        self.assertEqual(len(b.historic_BP), 31)
+        # Coordonnées de la grosse particule non repliées
+        self.assertTrue(max(max(abs(elem[1].x), abs(elem[1].y)) for elem in b.historic_BP) > b.dim)
+
+    def test_simulation3_periodic(self):
+        c = Simulation3(nb_max_collisions=5, density=0.01, epsilon_time=1, dim=20, speed=10, speed_BP_init=10,
+                        limit_collision_zone=10, periodic=True)
+        c.calcul()
+        self.assertEqual(len(c.historic_BP), 6)
+
+
+class TestMovingWindow(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+
+    def test_recenter(self):
+        zone = Workzone_square(200, 1, 1, 0.01)
+        anciennes = list(zone.particles)
+        indices = zone.recenter(0.8, -0.5)
+        self.assertEqual(len(zone.particles), 200)
+        self.assertTrue(all(zone.inside(p.x, p.y) for p in zone.particles))
+        # Les particules de la partie commune sont conservées
+        conservees = [i for i in range(200) if zone.particles[i] is anciennes[i]]
+        self.assertEqual(len(conservees), 200 - len(indices))
+
+    def test_simulation2_moving_window(self):
+        b = Simulation2(nb_max_collisions=30, density=0.05, epsilon_time=0.5, dim=10, speed=10, speed_BP_init=10, moving_window=True)
+        b.calcul()
+        self.assertEqual(len(b.historic_BP), 31)
+
+
+class TestGrid(unittest.TestCase):
+
+    def historic(self, **params):
+        simulation = Simulation2(nb_max_collisions=40, density=10**4, dim=0.1, epsilon_time=0.005,
+                                 streams=Streams(1), **params)
+        simulation.calcul()
+        return [(t, p.x, p.y) for t, p in simulation.historic_BP]
+
+    def test_grid_identical(self):
+        # Même trajectoire qu'avec le parcours de toutes les particules
+        for params in ({"periodic": True}, {"moving_window": True}):
+            self.assertEqual(self.historic(grid=True, **params), self.historic(**params))
+
+    def test_grid_first_collision(self):
+        random.seed(0)
+        zone = Workzone_square(400, 1, 1, 0.05, periodic=True, grid=True)
+        BP = Particle(0.9, -0.95, 1, 1, 0.05)
+        i, t = zone.first_collision(BP)
+        zone.grid = False
+        self.assertEqual(zone.first_collision(BP), (i, t))
+        # Peu de particules testées
+        self.assertLess(zone.nb_tests, 400)
+
+    def test_grid_leaves_zone(self):
+        # Grosse particule plus rapide que l'environnement : la recherche s'arrête à la sortie de la zone
+        for grid in (False, True):
+            random.seed(0)
+            simulation = Simulation2(nb_max_collisions=5, density=0.01, epsilon_time=0.01, dim=20, speed=1,
+                                     speed_BP_init=10, grid=grid)
+            with self.assertRaises(NoBigCollision):
+                simulation.calcul()
+
+
+class TestAdaptive(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+
+    def test_optimal_time_interval(self):
+        h_faible = optimal_time_interval(10, 10**5, 20, 10**-4, 1)
+        h_fort = optimal_time_interval(1000, 10**5, 20, 10**-4, 1)
+        self.assertTrue(10**-4 <= h_fort < h_faible <= 1)
+
+    def test_simulation1_adaptive(self):
+        a = Simulation1(duree=0.5, density=10**4, epsilon_time=10**-4, time_interval=10**-2, speed=10,
+                        speed_BP_init=0.1, adaptive=True, time_interval_min=10**-3, time_interval_max=2 * 10**-2)
+        a.calcul()
+        nb_etapes = len(a.historic_BP) - 1 + a.nb_no_collision
+        self.assertEqual(len(a.historic_time_interval), nb_etapes)
+        self.assertTrue(all(10**-3 <= h <= 2 * 10**-2 for h in a.historic_time_interval))
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+
+    def test_update_environment_density(self):
+        MVT = BrownianMotion1_1(n_etoile=10**4, V=1, v=10, h=10**-2, incremental=True)
+        t = 0.002
+        R = MVT.R - MVT.V * t
+        nombres = []
+        for _ in range(50):
+            MVT.Particule_X = [0]
+            MVT.Particule_Y = [0]
+            MVT.generEnvironment(0, MVT.R)
+            MVT.Particule_X[0] += t * MVT.V
+            MVT.updateEnvironment(0, R, t, -1)
+            nombres.append(len(MVT.particules_X))
+        # Même densité qu'un environnement régénéré
+        self.assertAlmostEqual(sum(nombres) / len(nombres) / (math.pi * R**2 * MVT.n_etoile), 1, delta=0.02)
+
+    def test_simulation_incremental(self):
+        # Même nombre moyen de collisions qu'en régénérant chaque environnement
+        nombres = {}
+        for incremental in (False, True):
+            nombres[incremental] = []
+            for seed in range(50):
+                random.seed(seed)
+                MVT = BrownianMotion1_1(epsilon=10**-4, n_etoile=10**4, v=10, V=0.1, h=10**-3,
+                                        incremental=incremental)
+                X, Y = MVT.simulation(1000)
+                nombres[incremental].append(len(X) - 1)
+        self.assertAlmostEqual(np.mean(nombres[True]) / np.mean(nombres[False]), 1, delta=0.1)
+
+    def test_workzone_shift(self):
+        # Disque de rayon (v + V) * h, grosse particule déplacée de V * h
+        radius, density = 0.13, 3000
+        nombres, r2, xv = [], [], []
+        for _ in range(100):
+            zone = Workzone(int(density * math.pi * radius**2), radius, 1, 0.1)
+            zone.workzone_update_time(0.1)
+            zone.shift(0.03 * math.cos(0.7), 0.03 * math.sin(0.7), 0.1, density)
+            nombres.append(zone.particle_number)
+            r2 += [(p.x**2 + p.y**2) / radius**2 for p in zone.particles]
+            xv += [(p.x * p.vx + p.y * p.vy) / radius for p in zone.particles]
+        # Même densité, même répartition radiale et vitesses indépendantes des positions qu'un disque régénéré
+        self.assertAlmostEqual(np.mean(nombres) / (density * math.pi * radius**2), 1, delta=0.02)
+        self.assertAlmostEqual(np.mean(r2), 0.5, delta=0.01)
+        self.assertAlmostEqual(np.mean(xv), 0, delta=0.01)
+
+    def test_simulation1_incremental(self):
+        a = Simulation1(nb_max_collisions=20, density=10**4, epsilon_time=10**-3, time_interval=10**-2,
+                        incremental=True)
+        a.calcul()
+        self.assertEqual(len(a.historic_BP), 21)
+        self.assertGreater(a.nb_no_collision, 0)
+
+
+class TestEvents(unittest.TestCase):
+
+    def test_events_historic(self):
+        random.seed(0)
+        a = Simulation1(nb_max_collisions=20, density=10**3, time_interval=0.02)
+        a.calcul()
+        random.seed(0)
+        events = list(a.iter_events())
+        collisions = [event for event in events if event.kind in ("start", "collision")]
+        self.assertEqual([(t, BP.x, BP.y) for t, BP in a.historic_BP],
+                         [(event.time, event.x, event.y) for event in collisions])
+        self.assertEqual(sum(event.kind == "no_collision" for event in events), a.nb_no_collision)
+
+    def test_early_stop(self):
+        random.seed(0)
+        b = Simulation2(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10,
+                        periodic=True)
+        events = b.iter_events(endless=True)
+        premiers = [next(events) for _ in range(10)]    # Au-delà de nb_max_collisions
+        events.close()
+        self.assertEqual(premiers[0].kind, "start")
+        self.assertTrue(all(t1.time <= t2.time for t1, t2 in zip(premiers, premiers[1:])))
+
+    def test_simulation3_events(self):
+        random.seed(0)
+        c = Simulation3(nb_max_collisions=5, density=0.01, epsilon_time=1, dim=20, speed=10, speed_BP_init=10,
+                        limit_collision_zone=10, periodic=True)
+        kinds = [event.kind for event in c.iter_events()]
+        self.assertEqual(kinds.count("collision"), 5)
+
+    def test_brownian_motion1_1_events(self):
+        MVT = BrownianMotion1_1(epsilon=10**-4, n_etoile=10**4, v=10, V=0.1, h=10**-3)
+        random.seed(0)
+        X, Y = MVT.simulation(50)
+        # Évènements enregistrés seulement pendant iter_events
+        self.assertIsNone(MVT.evenements)
+        random.seed(0)
+        events = [event for event in MVT.iter_events(50) if event.kind != "no_collision"]
+        self.assertEqual(X, [event.x for event in events])
+        self.assertEqual(Y, [event.y for event in events])
+        # Mémoire bornée : seule l'étape courante est conservée
+        self.assertEqual(len(MVT.Particule_X), 1)
+        self.assertTrue(all(0 <= event.time <= 50 * MVT.h for event in events))
+
+
+class TestArrayBath(unittest.TestCase):
+
+    def historique(self, simulation, seed):
+        random.seed(seed)
+        simulation.calcul()
+        return [(t, BP.x, BP.y) for t, BP in simulation.historic_BP]
+
+    def test_float64_identical(self):
+        params = dict(nb_max_collisions=30, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10,
+                      periodic=True)
+        self.assertEqual(self.historique(Simulation2(dtype="float64", **params), 0),
+                         self.historique(Simulation2(**params), 0))
+        params = dict(nb_max_collisions=5, density=0.01, epsilon_time=1, dim=20, speed=10, speed_BP_init=10,
+                      limit_collision_zone=10, periodic=True)
+        self.assertEqual(self.historique(Simulation3(dtype="float64", **params), 1),
+                         self.historique(Simulation3(**params), 1))
+
+    def test_float32(self):
+        random.seed(0)
+        zone = ArrayBath(1000, 1, 10, 0.01, dtype="float32")
+        self.assertEqual(zone.x.dtype, np.float32)
+        BP = Particle(0, 0, 1, 0.3, 10**-3)
+        i, t = zone.first_collision(BP)
+        # Même résultat que le calcul exact en float64 sur les valeurs stockées
+        particles = zone.particles
+        collisions = [(BP.collision(particle)[1], j) for j, particle in enumerate(particles) if BP.collision(particle)[0]]
+        self.assertEqual((t, i), min(collisions))
+
+        b = Simulation2(nb_max_collisions=30, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10,
+                        periodic=True, dtype="float32")
+        self.assertEqual(len(self.historique(b, 0)), 31)
+
+    def test_workers(self):
+        # Mêmes collisions quel que soit le nombre de threads
+        for dtype in ("float64", "float32"):
+            params = dict(nb_max_collisions=30, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10,
+                          periodic=True, dtype=dtype)
+            self.assertEqual(self.historique(Simulation2(workers=3, **params), 0),
+                             self.historique(Simulation2(**params), 0))
+            params = dict(nb_max_collisions=5, density=0.01, epsilon_time=1, dim=20, speed=10, speed_BP_init=10,
+                          limit_collision_zone=10, periodic=True, dtype=dtype)
+            self.assertEqual(self.historique(Simulation3(workers=3, **params), 1),
+                             self.historique(Simulation3(**params), 1))
+        # Copie de l'environnement pour la vidéo
+        b = Simulation2(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10,
+                        periodic=True, dtype="float64", workers=2)
+        b.calcul(movie=True)
+        self.assertEqual(len(b.historic_PP), 7)
+        with self.assertRaises(AssertionError):
+            Simulation2(nb_max_collisions=3, workers=2)
+
+
+class TestTracers(unittest.TestCase):
+
+    PARAMS = dict(nb_max_collisions=20, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10,
+                  periodic=True)
+
+    def test_single_tracer(self):
+        # Un traceur : même déroulement qu'une simulation seule
+        a = Simulation2(streams=Streams(3), **self.PARAMS)
+        a.calcul()
+        b = Simulation2(streams=Streams(3), **self.PARAMS)
+        events = [event for k, event in b.iter_tracer_events() if event.kind != "advance"]
+        self.assertEqual(len(events), len(a.historic_BP))
+        for event, (t, BP) in zip(events, a.historic_BP):
+            self.assertAlmostEqual(event.time, t)
+            self.assertAlmostEqual(event.x, BP.x)
+            self.assertAlmostEqual(event.y, BP.y)
+
+    def test_tracers(self):
+        historiques = []
+        for dtype in (None, "float64"):
+            b = Simulation2(tracers=4, dtype=dtype, streams=Streams(1), **self.PARAMS)
+            b.calcul()
+            self.assertEqual(len(b.historic_tracers), 4)
+            self.assertEqual(b.status_tracers, [None] * 4)
+            for k, historic in enumerate(b.historic_tracers):
+                self.assertEqual(len(historic), 21)
+                self.assertEqual((historic[0][1].x, historic[0][1].y), (0, 0))
+                self.assertEqual(stats(b.tracer(k))[4], 20)
+            historiques.append([[(t, BP.x, BP.y) for t, BP in historic] for historic in b.historic_tracers])
+        # Environnement en tableaux float64 : mêmes collisions
+        self.assertEqual(historiques[0], historiques[1])
+
+    def test_stopped_tracers(self):
+        b = Simulation2(nb_max_collisions=20, density=0.01, epsilon_time=0.5, dim=100, speed=10, speed_BP_init=10,
+                        tracers=4, streams=Streams(1))
+        b.calcul()
+        for historic, status in zip(b.historic_tracers, b.status_tracers):
+            self.assertIn(status, (None, "NoBigCollision", "OutsideEnv"))
+            self.assertEqual(status is None, len(historic) == 21)
+        with self.assertRaises(AssertionError):
+            Simulation2(nb_max_collisions=3, moving_window=True, tracers=2)
+
+
+class TestDSMC(unittest.TestCase):
+
+    def test_collision_rate(self):
+        # Nombre moyen de collisions par particule et par unité de temps : collision_rate
+        b = Simulation3(duree=1, density=10**4, dim=0.1, periodic=True, dtype="float64", collision_rate=50,
+                        streams=Streams(1))
+        b.calcul()
+        rate = 2 * b.nb_small_collisions / (b.particle_number * b.historic_BP[-1][0])
+        self.assertAlmostEqual(rate / 50, 1, delta=0.05)
+
+    def test_reproducible(self):
+        params = dict(nb_max_collisions=20, density=10**4, dim=0.1, periodic=True, dtype="float64",
+                      collision_rate=50)
+        a = Simulation3(streams=Streams(2), **params)
+        a.calcul()
+        b = Simulation3(streams=Streams(2), **params)
+        b.calcul()
+        self.assertEqual([(t, BP.x, BP.y) for t, BP in a.historic_BP], [(t, BP.x, BP.y) for t, BP in b.historic_BP])
+        self.assertGreater(a.nb_small_collisions, 0)
+
+    def test_without_small_collisions(self):
+        # collision_rate nul : même calcul que le modèle 2
+        params = dict(nb_max_collisions=20, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10,
+                      periodic=True, dtype="float64")
+        a = Simulation2(streams=Streams(3), **params)
+        a.calcul()
+        b = Simulation3(collision_rate=0, streams=Streams(3), **params)
+        b.calcul()
+        self.assertEqual([(t, BP.x, BP.y) for t, BP in a.historic_BP], [(t, BP.x, BP.y) for t, BP in b.historic_BP])
+        with self.assertRaises(AssertionError):
+            Simulation3(nb_max_collisions=3, collision_rate=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Unit tests for ``surrogate``.
+"""
+import unittest
+
+import numpy as np
+
+from brownian.ensemble import run_simulation
+from brownian.surrogate import CTRW, Langevin, check, segments
+
+PARAMS = dict(nb_max_collisions=10, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+
+
+class TestCTRW(unittest.TestCase):
+
+    def test_calibrate(self):
+        trajectoire = ([0.0, 1.0, 3.0], [0.0, 3.0, 3.0], [0.0, 4.0, 2.0])
+        longueurs, durees = segments([trajectoire])
+        np.testing.assert_allclose(longueurs, [5.0, 2.0])
+        np.testing.assert_allclose(durees, [1.0, 2.0])
+        ctrw = CTRW.calibrate([trajectoire])
+        self.assertAlmostEqual(ctrw.frequency, 2 / 3)
+        self.assertAlmostEqual(ctrw.lpm, 3.5)
+
+    def test_generate(self):
+        ctrw = CTRW([1.0, 2.0], [0.5, 1.0])
+        T, X, Y = ctrw.generate(100, 7, np.random.default_rng(0))
+        self.assertEqual(T.shape, (100, 8))
+        self.assertTrue(np.all(np.diff(T, axis=1) > 0))
+        longueurs = np.hypot(np.diff(X, axis=1), np.diff(Y, axis=1))
+        # Chaque segment garde sa durée : vitesse 2
+        np.testing.assert_allclose(longueurs / np.diff(T, axis=1), 2)
+        mesures = ctrw.sample_measures(250, 7, np.random.default_rng(0), chunk=100)
+        self.assertEqual(len(mesures["lpm"]), 250)
+        np.testing.assert_allclose(mesures["Fréquence"] * mesures["lpm"], 2)
+
+    def test_from_records(self):
+        records = [{"Fréquence": 2.0, "lpm": 0.5}, {"Fréquence": 2.0, "lpm": 0.5}]
+        ctrw = CTRW.from_records(records, seed=0)
+        self.assertAlmostEqual(ctrw.frequency, 2, delta=0.05)
+        self.assertAlmostEqual(ctrw.lpm, 0.5, delta=0.01)
+
+
+class TestLangevin(unittest.TestCase):
+
+    def test_msd(self):
+        langevin = Langevin(diffusion=2.0, relaxation=0.5)
+        dates = np.array([0.1, 0.5, 2.0, 10.0])
+        x, y = langevin.generate(20000, dates, np.random.default_rng(0))
+        attendu = 4 * 2.0 * (dates - 0.5 * (1 - np.exp(-dates / 0.5)))
+        np.testing.assert_allclose((x**2 + y**2).mean(axis=0), attendu, rtol=0.05)
+
+    def test_from_records(self):
+        langevin = Langevin.from_records([{"Fréquence": 2.0, "lpm": 0.5}], seed=0)
+        self.assertAlmostEqual(langevin.diffusion, 0.5**2 * 2 / 2, delta=0.01)
+        self.assertAlmostEqual(langevin.relaxation, 0.5, delta=0.02)
+
+
+class TestCheck(unittest.TestCase):
+
+    def test_check(self):
+        trajectories = [run_simulation("2", PARAMS, seed=seed, trajectory=True)[1] for seed in range(5)]
+        lignes = check(CTRW.calibrate(trajectories), trajectories, n=500, seed=0)
+        self.assertEqual([ligne["Mesure"] for ligne in lignes[:4]], ["Fréquence", "lpm", "Distance moyenne",
+                                                                     "Distance max"])
+        self.assertEqual(len(lignes), 7)
+        # Même distribution des segments : fréquence et lpm proches
+        self.assertLess(abs(lignes[1]["Écart relatif"]), 0.2)
+        lignes = check(Langevin.calibrate(trajectories), trajectories, n=500, seed=0)
+        self.assertEqual(len(lignes), 3)
+        self.assertTrue(all(0 <= ligne["p-value KS"] <= 1 for ligne in lignes))
+
+
+if __name__ == '__main__':
+    unittest.main()
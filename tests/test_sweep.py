@@ -0,0 +1,52 @@
+"""
+Unit tests for ``sweep``.
+"""
+import tempfile
+import unittest
+
+import numpy as np
+
+from brownian.outils import Streams
+from brownian.sweep import ResultCache, expand_grid, job_key, sweep
+
+PARAMS = dict(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed_BP_init=10, periodic=True)
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_expand_grid(self):
+        points = expand_grid({"a": [1, 2], "b": [3]})
+        self.assertEqual(points, [{"a": 1, "b": 3}, {"a": 2, "b": 3}])
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            cache = ResultCache(dossier)
+            records = sweep("2", PARAMS, {"speed": [10]}, 2, cache=cache, processes=1)
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+            self.assertEqual([record["speed"] for record in records], [10, 10])
+
+            # Ajout d'un point : seul ce point est calculé
+            cache = ResultCache(dossier)
+            records_bis = sweep("2", PARAMS, {"speed": [10, 5]}, 2, cache=cache, processes=1)
+            self.assertEqual((cache.hits, cache.misses), (2, 2))
+            self.assertEqual([record["lpm"] for record in records_bis[:2]], [record["lpm"] for record in records])
+
+    def test_job_key(self):
+        cle = job_key("2", {"dim": 10, "epsilon_time": 0.5}, 0, "v")
+        # Même valeur numérique, même clé
+        self.assertEqual(job_key("2", {"dim": 10.0, "epsilon_time": np.float64(0.5)}, 0, "v"), cle)
+        self.assertEqual(job_key("2", {"dim": np.int64(10), "epsilon_time": 0.5}, 0, "v"), cle)
+        self.assertNotEqual(job_key("2", {"dim": 10.5, "epsilon_time": 0.5}, 0, "v"), cle)
+        # Objet sans représentation stable : refusé
+        with self.assertRaises(TypeError):
+            job_key("2", {"streams": Streams(0)}, 0, "v")
+
+    def test_evict(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            cache = ResultCache(dossier, max_size=0)
+            sweep("2", PARAMS, {"speed": [10]}, 2, cache=cache, processes=1)
+            self.assertEqual(cache.size(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
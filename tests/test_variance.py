@@ -0,0 +1,78 @@
+"""
+Unit tests for ``variance``.
+"""
+import importlib.util
+import random
+import unittest
+
+from brownian.outils import Streams
+from brownian.simulation2 import Simulation2
+from brownian.variance import antithetic_mean, paired_difference, run_antithetic, variance_ratio
+
+PARAMS = dict(nb_max_collisions=3, density=0.01, epsilon_time=0.5, dim=20, speed=10, speed_BP_init=10, periodic=True)
+
+
+def _first_collision(simulation):
+    for event in simulation.iter_events():
+        if event.kind == "collision":
+            return event
+
+
+class TestStreams(unittest.TestCase):
+
+    def test_default_global(self):
+        random.seed(1)
+        attendu = random.random()
+        random.seed(1)
+        self.assertEqual(Streams().bath(), attendu)
+
+    def test_antithetic(self):
+        self.assertAlmostEqual(Streams(3).angle() + Streams(3, antithetic=True).angle(), 1)
+
+    def test_common_angles(self):
+        # Environnements différents, mêmes angles de déviation
+        a = _first_collision(Simulation2(**PARAMS, streams=Streams(4)))
+        b = _first_collision(Simulation2(**{**PARAMS, "dim": 15}, streams=Streams(4)))
+        self.assertNotEqual(a.time, b.time)
+        self.assertAlmostEqual(a.vx, b.vx)
+        self.assertAlmostEqual(a.vy, b.vy)
+
+    @unittest.skipUnless(importlib.util.find_spec("scipy"), "scipy non installé")
+    def test_sobol(self):
+        tirages = Streams(0, sobol=True).initial(8)
+        self.assertEqual(len(tirages), 8)
+        # Un point par intervalle [k/8, (k+1)/8) sur chaque coordonnée
+        for coordonnee in zip(*tirages):
+            self.assertEqual(sorted(int(8 * u) for u in coordonnee), list(range(8)))
+
+
+class TestEstimateurs(unittest.TestCase):
+
+    def test_paired_difference(self):
+        a = [{"lpm": x} for x in [1.0, 2.0, 3.0, 4.0, float("nan")]]
+        b = [{"lpm": x} for x in [0.1, 1.0, 1.9, 3.0, 2.0]]
+        resultat = paired_difference(a, b, "lpm")
+        self.assertEqual(resultat["n"], 4)
+        self.assertAlmostEqual(resultat["Estimation"], 1.0)
+        self.assertGreater(resultat["Réduction de variance"], 100)
+
+    def test_antithetic_mean(self):
+        a = [{"lpm": x} for x in [1.0, 2.0, 3.0]]
+        b = [{"lpm": x} for x in [3.1, 2.0, 1.0]]
+        resultat = antithetic_mean(a, b, "lpm")
+        self.assertAlmostEqual(resultat["Estimation"], 12.1 / 6)
+        self.assertGreater(resultat["Réduction de variance"], 10)
+
+    def test_variance_ratio(self):
+        reference = [{"lpm": x} for x in [0.0, 2.0, 4.0]]
+        records = [{"lpm": x} for x in [1.0, 2.0, 3.0]]
+        self.assertAlmostEqual(variance_ratio(reference, records, "lpm")["Réduction de variance"], 4)
+
+    def test_run_antithetic(self):
+        records, records_anti = run_antithetic("2", PARAMS, 2, seeds=[0, 1], processes=1)
+        self.assertEqual([record["Graine"] for record in records_anti], [0, 1])
+        self.assertNotEqual(records[0]["lpm"], records_anti[0]["lpm"])
+
+
+if __name__ == '__main__':
+    unittest.main()